@@ -2,6 +2,59 @@ import React, { useState } from "react";
 import axiosInstance from "../../axiosInstance";
 import DOMPurify from "dompurify";
 
+// One server-sent event block ("event: delta\ndata: {...}") -> { event, data }
+const parseEvent = (block) => {
+  let event = "message";
+  const data = [];
+  block.split("\n").forEach((line) => {
+    if (line.startsWith("event:")) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith("data:")) {
+      data.push(line.slice(5).trim());
+    }
+  });
+  return { event, data: data.length ? JSON.parse(data.join("\n")) : null };
+};
+
+// Post to /virtual-assistant/stream and pass each formatted delta to onDelta as it
+// arrives; resolves with the final "done" payload. axios cannot read a response
+// body while it streams, so this uses fetch.
+const streamAssistantReply = async (body, onDelta) => {
+  const response = await fetch(`${axiosInstance.defaults.baseURL}virtual-assistant/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok) {
+    const error = new Error(`Virtual assistant request failed with status ${response.status}`);
+    error.status = response.status;
+    throw error;
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const { event, data } = parseEvent(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      if (event === "delta") {
+        onDelta(data.text);
+      } else if (event === "done") {
+        return data;
+      } else if (event === "error") {
+        throw new Error(data.detail);
+      }
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+  throw new Error("Virtual assistant stream ended before its reply was complete");
+};
+
 const VirtualAssistantModal = ({ onClose }) => {
   const [messages, setMessages] = useState([
     {
@@ -10,26 +63,37 @@ const VirtualAssistantModal = ({ onClose }) => {
     },
   ]);
   const [userInput, setUserInput] = useState("");
+  // The server keeps the conversation; the first reply starts the session
+  const [sessionId, setSessionId] = useState(null);
 
   const handleSendMessage = async () => {
     if (userInput.trim() === "") return;
 
-    const newMessages = [...messages, { sender: "user", text: userInput }];
-    setMessages(newMessages);
+    const message = userInput;
+    const newMessages = [...messages, { sender: "user", text: message }];
+    setMessages([...newMessages, { sender: "assistant", text: "" }]);
     setUserInput("");
 
-    try {
-      // Send the chat history along with the new user input to the backend
-      const response = await axiosInstance.post("/virtual-assistant", {
-        chatHistory: newMessages.map((message) => ({
-          role: message.sender === "assistant" ? "assistant" : "user",
-          content: message.text,
-        })),
+    // Send only the new message; the server holds the rest of the conversation.
+    // Show the reply as it streams in.
+    let reply = "";
+    const send = (session_id) =>
+      streamAssistantReply({ session_id, message }, (text) => {
+        reply += text;
+        setMessages([...newMessages, { sender: "assistant", text: reply }]);
       });
 
-      const aiResponse = response.data.suggestions.join("\n");
-
-      setMessages([...newMessages, { sender: "assistant", text: aiResponse }]);
+    try {
+      let result;
+      try {
+        result = await send(sessionId);
+      } catch (error) {
+        // Sessions expire after a while without messages; continue in a new one
+        if (error.status !== 404 || sessionId === null) throw error;
+        reply = "";
+        result = await send(null);
+      }
+      setSessionId(result.session_id);
     } catch (error) {
       console.error("Error fetching virtual assistant response:", error);
       setMessages([
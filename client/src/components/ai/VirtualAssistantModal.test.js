@@ -1,24 +1,55 @@
 import React from "react";
 import { render, screen, fireEvent, waitFor } from "@testing-library/react";
 import VirtualAssistantModal from "./VirtualAssistantModal";
-import axiosInstance from "../../axiosInstance"; // Import axiosInstance to mock it
 
-// Mock axiosInstance
+// Mock axiosInstance; the modal only reads its baseURL
 jest.mock("../../axiosInstance");
 
+// One server-sent event, as written by the /virtual-assistant/stream endpoint
+const sseEvent = (event, data) =>
+  `event: ${event}\ndata: ${JSON.stringify(data)}\n\n`;
+
+// A fetch response whose body streams the given chunks
+const streamResponse = (...chunks) => ({
+  ok: true,
+  status: 200,
+  body: new ReadableStream({
+    start(controller) {
+      const encoder = new TextEncoder();
+      chunks.forEach((chunk) => controller.enqueue(encoder.encode(chunk)));
+      controller.close();
+    },
+  }),
+});
+
+const sendMessage = (text) => {
+  fireEvent.change(screen.getByPlaceholderText("Type your message here..."), {
+    target: { value: text },
+  });
+  fireEvent.click(screen.getByText("Send"));
+};
+
 describe("VirtualAssistantModal Component", () => {
   const onCloseMock = jest.fn(); // Mock onClose function
 
   beforeEach(() => {
-    axiosInstance.post.mockResolvedValue({
-      data: {
-        suggestions: ["Here is some helpful information based on your query."],
-      },
-    });
+    global.fetch = jest.fn(() =>
+      Promise.resolve(
+        streamResponse(
+          sseEvent("delta", { text: "Here is some " }),
+          sseEvent("delta", { text: "helpful information based on your query." }),
+          sseEvent("done", {
+            suggestions: ["Here is some helpful information based on your query."],
+            session_id: "session-1",
+          })
+        )
+      )
+    );
   });
 
   afterEach(() => {
     jest.clearAllMocks();
+    delete global.fetch;
   });
 
   test("renders the modal with initial assistant message", () => {
@@ -45,23 +76,17 @@ describe("VirtualAssistantModal Component", () => {
     expect(onCloseMock).toHaveBeenCalled();
   });
 
-  test("sends a message and receives a response from the assistant", async () => {
+  test("sends a message and streams the assistant's response", async () => {
     render(<VirtualAssistantModal onClose={onCloseMock} />);
 
-    // Type a message in the input
-    fireEvent.change(screen.getByPlaceholderText("Type your message here..."), {
-      target: { value: "What is the recommended dosage of aspirin?" },
-    });
-
-    // Click the send button
-    fireEvent.click(screen.getByText("Send"));
+    sendMessage("What is the recommended dosage of aspirin?");
 
     // Check if the user's message is rendered
     expect(
       screen.getByText("What is the recommended dosage of aspirin?")
     ).toBeInTheDocument();
 
-    // Wait for the assistant's response to appear
+    // Wait for the streamed deltas to be joined into the assistant's response
     await waitFor(() => {
       expect(
         screen.getByText(
@@ -69,21 +94,120 @@ describe("VirtualAssistantModal Component", () => {
         )
       ).toBeInTheDocument();
     });
+
+    expect(global.fetch).toHaveBeenCalledWith(
+      expect.stringContaining("virtual-assistant/stream"),
+      expect.objectContaining({ method: "POST" })
+    );
+    expect(JSON.parse(global.fetch.mock.calls[0][1].body)).toEqual({
+      session_id: null,
+      message: "What is the recommended dosage of aspirin?",
+    });
   });
 
-  test("displays an error message when the assistant response fails", async () => {
-    // Mock axiosInstance to throw an error
-    axiosInstance.post.mockRejectedValueOnce(new Error("Network Error"));
+  test("joins events split across chunks", async () => {
+    const events =
+      sseEvent("delta", { text: "Drink plenty of water." }) +
+      sseEvent("done", { suggestions: ["Drink plenty of water."], session_id: "session-1" });
+    global.fetch.mockResolvedValueOnce(
+      streamResponse(events.slice(0, 10), events.slice(10, 40), events.slice(40))
+    );
+
+    render(<VirtualAssistantModal onClose={onCloseMock} />);
+
+    sendMessage("I have a fever");
+
+    await waitFor(() => {
+      expect(screen.getByText("Drink plenty of water.")).toBeInTheDocument();
+    });
+  });
+
+  test("sends the session id with later messages", async () => {
+    render(<VirtualAssistantModal onClose={onCloseMock} />);
+
+    sendMessage("I have a headache");
+    await waitFor(() => {
+      expect(
+        screen.getByText("Here is some helpful information based on your query.")
+      ).toBeInTheDocument();
+    });
+    sendMessage("It started yesterday");
+
+    await waitFor(() => {
+      expect(global.fetch).toHaveBeenCalledTimes(2);
+    });
+    expect(JSON.parse(global.fetch.mock.calls[1][1].body)).toEqual({
+      session_id: "session-1",
+      message: "It started yesterday",
+    });
+  });
+
+  test("starts a new session when the stored one has expired", async () => {
+    render(<VirtualAssistantModal onClose={onCloseMock} />);
+
+    sendMessage("I have a headache");
+    await waitFor(() => {
+      expect(
+        screen.getByText("Here is some helpful information based on your query.")
+      ).toBeInTheDocument();
+    });
+
+    // The server no longer knows session-1, so the message is sent again without it
+    global.fetch
+      .mockResolvedValueOnce({ ok: false, status: 404 })
+      .mockResolvedValueOnce(
+        streamResponse(
+          sseEvent("delta", { text: "Rest in a quiet, dark room." }),
+          sseEvent("done", { suggestions: ["Rest in a quiet, dark room."], session_id: "session-2" })
+        )
+      );
+    sendMessage("It started yesterday");
+
+    await waitFor(() => {
+      expect(screen.getByText("Rest in a quiet, dark room.")).toBeInTheDocument();
+    });
+    expect(global.fetch).toHaveBeenCalledTimes(3);
+    expect(JSON.parse(global.fetch.mock.calls[1][1].body).session_id).toBe("session-1");
+    expect(JSON.parse(global.fetch.mock.calls[2][1].body)).toEqual({
+      session_id: null,
+      message: "It started yesterday",
+    });
+    expect(
+      screen.queryByText("Sorry, I couldn't process your request. Please try again.")
+    ).not.toBeInTheDocument();
+
+    // Later messages continue in the new session
+    sendMessage("Thanks");
+    await waitFor(() => {
+      expect(global.fetch).toHaveBeenCalledTimes(4);
+    });
+    expect(JSON.parse(global.fetch.mock.calls[3][1].body).session_id).toBe("session-2");
+  });
+
+  test("does not retry a 404 without a session", async () => {
+    global.fetch.mockResolvedValueOnce({ ok: false, status: 404 });
 
     render(<VirtualAssistantModal onClose={onCloseMock} />);
 
-    // Type a message in the input
-    fireEvent.change(screen.getByPlaceholderText("Type your message here..."), {
-      target: { value: "What is the recommended dosage of aspirin?" },
+    sendMessage("I have a headache");
+
+    await waitFor(() => {
+      expect(
+        screen.getByText(
+          "Sorry, I couldn't process your request. Please try again."
+        )
+      ).toBeInTheDocument();
     });
+    expect(global.fetch).toHaveBeenCalledTimes(1);
+  });
+
+  test("displays an error message when the assistant response fails", async () => {
+    // Mock fetch to throw an error
+    global.fetch.mockRejectedValueOnce(new Error("Network Error"));
+
+    render(<VirtualAssistantModal onClose={onCloseMock} />);
 
-    // Click the send button
-    fireEvent.click(screen.getByText("Send"));
+    sendMessage("What is the recommended dosage of aspirin?");
 
     // Check if the user's message is rendered
     expect(
@@ -99,4 +223,42 @@ describe("VirtualAssistantModal Component", () => {
       ).toBeInTheDocument();
     });
   });
+
+  test("displays an error message when the server fails the request", async () => {
+    global.fetch.mockResolvedValueOnce({ ok: false, status: 500 });
+
+    render(<VirtualAssistantModal onClose={onCloseMock} />);
+
+    sendMessage("What is the recommended dosage of aspirin?");
+
+    await waitFor(() => {
+      expect(
+        screen.getByText(
+          "Sorry, I couldn't process your request. Please try again."
+        )
+      ).toBeInTheDocument();
+    });
+  });
+
+  test("replaces a partial reply when the stream reports an error", async () => {
+    global.fetch.mockResolvedValueOnce(
+      streamResponse(
+        sseEvent("delta", { text: "Aspirin is" }),
+        sseEvent("error", { detail: "AI response timed out" })
+      )
+    );
+
+    render(<VirtualAssistantModal onClose={onCloseMock} />);
+
+    sendMessage("What is the recommended dosage of aspirin?");
+
+    await waitFor(() => {
+      expect(
+        screen.getByText(
+          "Sorry, I couldn't process your request. Please try again."
+        )
+      ).toBeInTheDocument();
+    });
+    expect(screen.queryByText("Aspirin is")).not.toBeInTheDocument();
+  });
 });
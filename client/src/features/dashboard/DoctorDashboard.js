@@ -8,6 +8,7 @@ const DoctorDashboard = () => {
   const [cancelledAppointments, setCancelledAppointments] = useState([]);
   const [feedbackSummary, setFeedbackSummary] = useState("");
   const [loadingFeedbackSummary, setLoadingFeedbackSummary] = useState(false);
+  const [nextCursors, setNextCursors] = useState({});
 
   useEffect(() => {
     const fetchAppointments = async () => {
@@ -19,11 +20,12 @@ const DoctorDashboard = () => {
             Authorization: `Bearer ${token}`,
           },
         });
-        const { upcoming, completed, cancelled } = response.data;
+        const { upcoming, completed, cancelled, next_cursors } = response.data;
 
         setUpcomingAppointments(upcoming);
         setCompletedAppointments(completed);
         setCancelledAppointments(cancelled);
+        setNextCursors(next_cursors || {});
       } catch (error) {
         console.error("Error fetching appointments:", error);
       }
@@ -52,6 +54,29 @@ const DoctorDashboard = () => {
     fetchFeedbackSummary();
   }, []);
 
+  // Each bucket is paged on its own; its cursor fetches the next page of just that bucket
+  const handleLoadMore = async (bucket) => {
+    try {
+      const token = localStorage.getItem("token");
+
+      const response = await axiosInstance.get("/doctor/appointments", {
+        params: { cursor: nextCursors[bucket] },
+        headers: {
+          Authorization: `Bearer ${token}`,
+        },
+      });
+      const setters = {
+        upcoming: setUpcomingAppointments,
+        completed: setCompletedAppointments,
+        cancelled: setCancelledAppointments,
+      };
+      setters[bucket]((prev) => [...prev, ...response.data[bucket]]);
+      setNextCursors((prev) => ({ ...prev, ...response.data.next_cursors }));
+    } catch (error) {
+      console.error("Error loading more appointments:", error);
+    }
+  };
+
   const handleCancelAppointment = async (appointment_id) => {
     try {
       const token = localStorage.getItem("token");
@@ -76,8 +101,8 @@ const DoctorDashboard = () => {
 
       if (cancelledAppointment) {
         setCancelledAppointments((prev) => [
-          ...prev,
           { ...cancelledAppointment, isCancelled: true },
+          ...prev,
         ]);
       }
     } catch (error) {
@@ -109,8 +134,8 @@ const DoctorDashboard = () => {
 
       if (completedAppointment) {
         setCompletedAppointments((prev) => [
-          ...prev,
           { ...completedAppointment, isCompleted: true },
+          ...prev,
         ]);
       }
     } catch (error) {
@@ -176,6 +201,14 @@ const DoctorDashboard = () => {
             ) : (
               <p>No upcoming appointments.</p>
             )}
+            {nextCursors.upcoming && (
+              <button
+                onClick={() => handleLoadMore("upcoming")}
+                className="mt-2 w-full bg-gray-200 text-gray-800 px-4 py-2 rounded-lg hover:bg-gray-300 transition"
+              >
+                Load more
+              </button>
+            )}
           </div>
 
           <div className="p-4 bg-white rounded-lg shadow-md border border-gray-200">
@@ -210,6 +243,14 @@ const DoctorDashboard = () => {
             ) : (
               <p>No completed appointments.</p>
             )}
+            {nextCursors.completed && (
+              <button
+                onClick={() => handleLoadMore("completed")}
+                className="mt-2 w-full bg-gray-200 text-gray-800 px-4 py-2 rounded-lg hover:bg-gray-300 transition"
+              >
+                Load more
+              </button>
+            )}
           </div>
 
           <div className="p-4 bg-white rounded-lg shadow-md border border-gray-200">
@@ -245,6 +286,14 @@ const DoctorDashboard = () => {
             ) : (
               <p>No cancelled appointments.</p>
             )}
+            {nextCursors.cancelled && (
+              <button
+                onClick={() => handleLoadMore("cancelled")}
+                className="mt-2 w-full bg-gray-200 text-gray-800 px-4 py-2 rounded-lg hover:bg-gray-300 transition"
+              >
+                Load more
+              </button>
+            )}
           </div>
         </div>
 
@@ -38,6 +38,7 @@ describe("DoctorDashboard", () => {
         reason: "Patient request",
       },
     ],
+    next_cursors: { upcoming: null, completed: null, cancelled: null },
   };
 
   const mockFeedbackSummary = {
@@ -145,6 +146,59 @@ describe("DoctorDashboard", () => {
     });
   });
 
+  test("loads the next page of a bucket", async () => {
+    axiosInstance.get.mockImplementation((url, config) => {
+      if (url === "/doctor/appointments" && config.params) {
+        return Promise.resolve({
+          data: {
+            completed: [
+              {
+                id: 4,
+                patient_name: "Alice Brown",
+                appointment_datetime: "2023-04-29T09:00:00Z",
+              },
+            ],
+            next_cursors: { completed: null },
+          },
+        });
+      } else if (url === "/doctor/appointments") {
+        return Promise.resolve({
+          data: {
+            ...mockAppointments,
+            next_cursors: { upcoming: null, completed: "completed-cursor", cancelled: null },
+          },
+        });
+      } else if (url === "/doctor/feedback-summary") {
+        return Promise.resolve({ data: mockFeedbackSummary });
+      }
+      return Promise.reject(new Error("Not Found"));
+    });
+
+    render(<DoctorDashboard />);
+
+    await waitFor(() => {
+      expect(
+        screen.getByText((content) => content.includes("Jane Smith"))
+      ).toBeInTheDocument();
+    });
+
+    fireEvent.click(screen.getByText("Load more"));
+
+    await waitFor(() => {
+      expect(
+        screen.getByText((content) => content.includes("Alice Brown"))
+      ).toBeInTheDocument();
+    });
+    expect(
+      screen.getByText((content) => content.includes("Jane Smith"))
+    ).toBeInTheDocument();
+    expect(axiosInstance.get).toHaveBeenCalledWith(
+      "/doctor/appointments",
+      expect.objectContaining({ params: { cursor: "completed-cursor" } })
+    );
+    expect(screen.queryByText("Load more")).not.toBeInTheDocument();
+  });
+
   test("handles API errors gracefully", async () => {
     // Mock the API to return errors
     axiosInstance.get.mockImplementation(() =>
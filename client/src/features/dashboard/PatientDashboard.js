@@ -8,6 +8,7 @@ const PatientDashboard = () => {
   const [cancelledAppointments, setCancelledAppointments] = useState([]);
   const [feedbacks, setFeedbacks] = useState({});
   const [feedbackSubmitted, setFeedbackSubmitted] = useState({});
+  const [nextCursors, setNextCursors] = useState({});
 
   useEffect(() => {
     const fetchAppointments = async () => {
@@ -19,10 +20,11 @@ const PatientDashboard = () => {
             Authorization: `Bearer ${token}`,
           },
         });
-        const { upcoming, past, cancelled } = response.data;
+        const { upcoming, past, cancelled, next_cursors } = response.data;
         setUpcomingAppointments(upcoming);
         setPastAppointments(past);
         setCancelledAppointments(cancelled);
+        setNextCursors(next_cursors || {});
         console.log("Fetched appointments:", response.data);
       } catch (error) {
         console.error("Error fetching appointments:", error);
@@ -32,6 +34,29 @@ const PatientDashboard = () => {
     fetchAppointments();
   }, []);
 
+  // Each bucket is paged on its own; its cursor fetches the next page of just that bucket
+  const handleLoadMore = async (bucket) => {
+    try {
+      const token = localStorage.getItem("token");
+
+      const response = await axiosInstance.get("/dashboard/appointments", {
+        params: { cursor: nextCursors[bucket] },
+        headers: {
+          Authorization: `Bearer ${token}`,
+        },
+      });
+      const setters = {
+        upcoming: setUpcomingAppointments,
+        past: setPastAppointments,
+        cancelled: setCancelledAppointments,
+      };
+      setters[bucket]((prev) => [...prev, ...response.data[bucket]]);
+      setNextCursors((prev) => ({ ...prev, ...response.data.next_cursors }));
+    } catch (error) {
+      console.error("Error loading more appointments:", error);
+    }
+  };
+
   const handleCancelAppointment = async (appointment_id) => {
     const token = localStorage.getItem("token");
     console.log(token);
@@ -58,11 +83,11 @@ const PatientDashboard = () => {
         prev.filter((appointment) => appointment.id !== appointment_id)
       );
 
-      // Add the full appointment object to cancelled appointments
+      // Add the full appointment object to cancelled appointments, which are listed newest first
       if (cancelledAppointment) {
         setCancelledAppointments((prev) => [
-          ...prev,
           { ...cancelledAppointment, isCancelled: true },
+          ...prev,
         ]);
       }
 
@@ -165,6 +190,14 @@ const PatientDashboard = () => {
             ) : (
               <p>No upcoming appointments.</p>
             )}
+            {nextCursors.upcoming && (
+              <button
+                onClick={() => handleLoadMore("upcoming")}
+                className="mt-2 w-full bg-gray-200 text-gray-800 px-4 py-2 rounded-lg hover:bg-gray-300 transition"
+              >
+                Load more
+              </button>
+            )}
           </div>
 
           {/* Past Appointments Column */}
@@ -230,6 +263,14 @@ const PatientDashboard = () => {
             ) : (
               <p>No past appointments.</p>
             )}
+            {nextCursors.past && (
+              <button
+                onClick={() => handleLoadMore("past")}
+                className="mt-2 w-full bg-gray-200 text-gray-800 px-4 py-2 rounded-lg hover:bg-gray-300 transition"
+              >
+                Load more
+              </button>
+            )}
           </div>
 
           {/* Cancelled Appointments Column */}
@@ -269,6 +310,14 @@ const PatientDashboard = () => {
             ) : (
               <p>No cancelled appointments.</p>
             )}
+            {nextCursors.cancelled && (
+              <button
+                onClick={() => handleLoadMore("cancelled")}
+                className="mt-2 w-full bg-gray-200 text-gray-800 px-4 py-2 rounded-lg hover:bg-gray-300 transition"
+              >
+                Load more
+              </button>
+            )}
           </div>
         </div>
       </div>
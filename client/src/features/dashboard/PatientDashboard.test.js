@@ -50,6 +50,7 @@ describe("PatientDashboard", () => {
             reason: "Personal",
           },
         ],
+        next_cursors: { upcoming: null, past: null, cancelled: null },
       },
     };
 
@@ -74,7 +75,57 @@ describe("PatientDashboard", () => {
     });
   });
 
+  test("loads the next page of a bucket", async () => {
+    axiosInstance.get
+      .mockResolvedValueOnce({
+        data: {
+          upcoming: [
+            {
+              id: 1,
+              doctor_name: "Smith",
+              appointment_datetime: "2023-10-10T10:00:00Z",
+            },
+          ],
+          past: [],
+          cancelled: [],
+          next_cursors: { upcoming: "upcoming-cursor", past: null, cancelled: null },
+        },
+      })
+      .mockResolvedValueOnce({
+        data: {
+          upcoming: [
+            {
+              id: 4,
+              doctor_name: "Jones",
+              appointment_datetime: "2023-10-11T10:00:00Z",
+            },
+          ],
+          next_cursors: { upcoming: null },
+        },
+      });
 
+    render(
+      <MemoryRouter>
+        <PatientDashboard />
+      </MemoryRouter>
+    );
+
+    await waitFor(() => {
+      expect(screen.getByText("Dr. Smith")).toBeInTheDocument();
+    });
+
+    fireEvent.click(screen.getByText("Load more"));
+
+    await waitFor(() => {
+      expect(screen.getByText("Dr. Jones")).toBeInTheDocument();
+    });
+    expect(screen.getByText("Dr. Smith")).toBeInTheDocument();
+    expect(axiosInstance.get).toHaveBeenLastCalledWith(
+      "/dashboard/appointments",
+      expect.objectContaining({ params: { cursor: "upcoming-cursor" } })
+    );
+    expect(screen.queryByText("Load more")).not.toBeInTheDocument();
+  });
 
   test("submits feedback for an appointment", async () => {
     const mockData = {
@@ -88,6 +139,7 @@ describe("PatientDashboard", () => {
           },
         ],
         cancelled: [],
+        next_cursors: { upcoming: null, past: null, cancelled: null },
       },
     };
 
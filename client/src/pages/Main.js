@@ -26,9 +26,18 @@ const Main = () => {
   useEffect(() => {
     const fetchDoctors = async () => {
       try {
-        const response = await axiosInstance.get("/doctors");
-        setFullDoctorsList(response.data);
-        setDoctors(response.data);
+        // Follow the cursor until every page of doctors has been loaded
+        let doctorsList = [];
+        let cursor = null;
+        do {
+          const response = await axiosInstance.get("/doctors", {
+            params: cursor ? { cursor } : {},
+          });
+          doctorsList = doctorsList.concat(response.data);
+          cursor = response.headers?.["x-next-cursor"];
+        } while (cursor);
+        setFullDoctorsList(doctorsList);
+        setDoctors(doctorsList);
       } catch (error) {
         console.error("Error fetching doctors:", error);
       }
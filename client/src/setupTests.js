@@ -3,3 +3,13 @@
 // expect(element).toHaveTextContent(/react/i)
 // learn more: https://github.com/testing-library/jest-dom
 import '@testing-library/jest-dom';
+
+// jsdom has no streaming fetch body support; the virtual assistant tests build
+// their SSE responses from Node's implementations
+if (typeof global.TextDecoder === 'undefined') {
+  const { TextDecoder, TextEncoder } = require('util');
+  Object.assign(global, { TextDecoder, TextEncoder });
+}
+if (typeof global.ReadableStream === 'undefined') {
+  global.ReadableStream = require('stream/web').ReadableStream;
+}
@@ -17,6 +17,8 @@ if [ -f "server/requirements.txt" ]; then
    python3 -m venv venv
    . venv/bin/activate
    pip install -r server/requirements.txt
+   echo "Migrating the database..."
+   (cd server && python migrate.py)
 else
    echo "Backend requirements.txt not found"
 fi
@@ -0,0 +1,65 @@
+import json
+
+ASSISTANT_SYSTEM_PROMPT = {
+    "role": "system",
+    "content": "You are a medical assistant helping a patient prepare for their doctor's appointment. Based on the symptoms they provide, generate a concise list of questions they should ask their doctor and possible information they should prepare before the appointment. Keep responses short , brief and to the point. Ask one question at atime. Do not ask many questions"
+}
+
+ASSISTANT_LABEL = "<strong>Assistant:</strong> "
+BULLET = "• "
+LINE_BREAK = "<br>"
+
+
+def format_assistant_reply(text):
+    # Breaking the response into parts and formatting
+    parts = text.split('*')
+    formatted_parts = [ASSISTANT_LABEL + parts[0].strip()]  # Adding bold to the assistant label
+    for part in parts[1:]:
+        formatted_parts.append(BULLET + part.strip())  # Adding bullet points to each item
+
+    formatted_text = LINE_BREAK.join(formatted_parts)  # Joining parts with line breaks for HTML
+    return formatted_text
+
+
+class ReplyFormatter:
+    """Applies format_assistant_reply to a reply arriving in pieces.
+
+    The concatenated output of feed() and close() equals format_assistant_reply
+    of the concatenated input. Whitespace is held back until it is known not to
+    end a part, since parts are stripped.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.at_part_start = True
+        self.pending_space = ""
+
+    def feed(self, text: str):
+        out = []
+        if not self.started:
+            out.append(ASSISTANT_LABEL)
+            self.started = True
+        for char in text:
+            if char == "*":
+                out.append(LINE_BREAK + BULLET)
+                self.at_part_start = True
+                self.pending_space = ""
+            elif char.isspace():
+                if not self.at_part_start:
+                    self.pending_space += char
+            else:
+                out.append(self.pending_space + char)
+                self.at_part_start = False
+                self.pending_space = ""
+        return "".join(out)
+
+    def close(self):
+        # Trailing whitespace is dropped; an empty reply still gets its label
+        return self.feed("")
+
+
+# One server-sent event
+def sse_event(data, event: str = None):
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
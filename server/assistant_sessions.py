@@ -0,0 +1,102 @@
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from llm import ASSISTANT_TIMEOUT
+import models
+
+# Idle time after which a virtual assistant session is discarded
+ASSISTANT_SESSION_TTL = float(os.getenv("ASSISTANT_SESSION_TTL", str(24 * 3600)))
+# Most prompt tokens sent per turn, system prompt and rolling summary included
+ASSISTANT_PROMPT_TOKEN_BUDGET = int(os.getenv("ASSISTANT_PROMPT_TOKEN_BUDGET", "1500"))
+# Longest rolling summary of the older turns
+ASSISTANT_SUMMARY_TOKENS = int(os.getenv("ASSISTANT_SUMMARY_TOKENS", "200"))
+
+COMPACTION_INSTRUCTIONS = "Summarize the conversation below between a patient and a medical assistant helping them prepare for a doctor's appointment. Keep the symptoms, answers and facts the patient gave and the questions already asked, as short notes. Do not include any introductory phrases or headers."
+
+# Rough token count: about four characters per token plus per-message overhead
+def estimate_tokens(text: str):
+    return len(text) // 4 + 4
+
+def new_session_id():
+    return secrets.token_urlsafe(24)
+
+# The session to continue, or a new one when no id is given
+async def open_session(db: AsyncSession, session_id=None):
+    now = datetime.utcnow()
+    if session_id is None:
+        # Starting sessions is rare enough to sweep the expired ones here
+        expired = select(models.AssistantSession.id).where(models.AssistantSession.expires_at <= now)
+        await db.execute(delete(models.AssistantMessage).where(models.AssistantMessage.session_id.in_(expired)))
+        await db.execute(delete(models.AssistantSession).where(models.AssistantSession.expires_at <= now))
+        session = models.AssistantSession(id=new_session_id(), created_at=now, expires_at=now + timedelta(seconds=ASSISTANT_SESSION_TTL))
+        db.add(session)
+        await db.commit()
+        return session
+
+    session = await db.get(models.AssistantSession, session_id)
+    if session is None or session.expires_at <= now:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assistant session not found")
+    return session
+
+# Append a message and push the session's expiry forward
+async def add_message(db: AsyncSession, session_id: str, role: str, content: str):
+    now = datetime.utcnow()
+    db.add(models.AssistantMessage(session_id=session_id, role=role, content=content, created_at=now))
+    await db.execute(
+        update(models.AssistantSession)
+        .where(models.AssistantSession.id == session_id)
+        .values(expires_at=now + timedelta(seconds=ASSISTANT_SESSION_TTL))
+    )
+    await db.commit()
+
+def summary_message(summary: str):
+    return {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+
+# Fold the given messages into the session's rolling summary
+async def compact(db: AsyncSession, llm, session, messages):
+    transcript = "\n".join(f"{message.role}: {message.content}" for message in messages)
+    previous = f"\nEarlier summary: {session.summary}" if session.summary else ""
+    response = await llm.complete(
+        [{"role": "user", "content": f"{COMPACTION_INSTRUCTIONS}{previous}\nConversation:\n{transcript}"}],
+        timeout=ASSISTANT_TIMEOUT,
+        max_tokens=ASSISTANT_SUMMARY_TOKENS,
+        temperature=0.3,
+    )
+    session.summary = response.choices[0].message.content.strip()
+    session.summarized_through = messages[-1].id
+    await db.commit()
+
+# Prompt for the next turn: the system prompt, the rolling summary and the newest
+# messages that fit the token budget. When the unsummarized messages overflow the
+# budget, the oldest are compacted until the rest fill at most half of it, so the
+# summary is not rewritten on every turn.
+async def build_prompt(db: AsyncSession, llm, session, system_prompt, token_budget: Optional[int] = None):
+    token_budget = token_budget or ASSISTANT_PROMPT_TOKEN_BUDGET
+    query = select(models.AssistantMessage).where(models.AssistantMessage.session_id == session.id)
+    if session.summarized_through is not None:
+        query = query.where(models.AssistantMessage.id > session.summarized_through)
+    messages = (await db.scalars(query.order_by(models.AssistantMessage.id))).all()
+
+    fixed_tokens = estimate_tokens(system_prompt["content"]) + ASSISTANT_SUMMARY_TOKENS
+    message_tokens = [estimate_tokens(message.content) for message in messages]
+    if fixed_tokens + sum(message_tokens) > token_budget:
+        target = max(token_budget - fixed_tokens, 0) // 2
+        kept_tokens = 0
+        start = len(messages)
+        # The newest message always stays in the window
+        while start > 0 and (start == len(messages) or kept_tokens + message_tokens[start - 1] <= target):
+            start -= 1
+            kept_tokens += message_tokens[start]
+        if start > 0:
+            await compact(db, llm, session, messages[:start])
+            messages = messages[start:]
+
+    prompt = [system_prompt]
+    if session.summary:
+        prompt.append(summary_message(session.summary))
+    prompt.extend({"role": message.role, "content": message.content} for message in messages)
+    return prompt
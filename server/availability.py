@@ -0,0 +1,137 @@
+import heapq
+import itertools
+import math
+import os
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+from scheduling import load_schedules
+
+# Weekly hours of doctors without a working-hours template: the weekdays, Monday
+# being 0, and one "HH:MM-HH:MM" shift
+DEFAULT_WORKING_DAYS = [int(day) for day in os.getenv("DEFAULT_WORKING_DAYS", "0,1,2,3,4").split(",")]
+DEFAULT_WORKING_HOURS = os.getenv("DEFAULT_WORKING_HOURS", "09:00-17:00")
+# Widest date range a single availability search may cover
+MAX_AVAILABILITY_DAYS = int(os.getenv("MAX_AVAILABILITY_DAYS", "62"))
+# Days of appointments loaded per step of a search
+AVAILABILITY_WINDOW_DAYS = int(os.getenv("AVAILABILITY_WINDOW_DAYS", "7"))
+# Offered slots start on multiples of this many minutes past midnight
+AVAILABILITY_STEP_MINUTES = int(os.getenv("AVAILABILITY_STEP_MINUTES", "15"))
+DEFAULT_AVAILABILITY_LIMIT = 10
+MAX_AVAILABILITY_LIMIT = 100
+
+
+def parse_shift(text: str):
+    start, end = text.split("-")
+    return time.fromisoformat(start.strip()), time.fromisoformat(end.strip())
+
+DEFAULT_TEMPLATE = {weekday: [parse_shift(DEFAULT_WORKING_HOURS)] for weekday in DEFAULT_WORKING_DAYS}
+
+# Sorted intervals with overlapping and touching ones joined
+def merge_intervals(intervals):
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+# Parts of the sorted intervals not covered by the sorted, merged busy intervals
+def subtract_intervals(intervals, busy):
+    index = 0
+    for start, end in intervals:
+        while index < len(busy) and busy[index][1] <= start:
+            index += 1
+        cursor = start
+        position = index
+        while position < len(busy) and busy[position][0] < end:
+            if busy[position][0] > cursor:
+                yield cursor, busy[position][0]
+            cursor = max(cursor, busy[position][1])
+            position += 1
+        if cursor < end:
+            yield cursor, end
+
+# A weekly template laid out over the days from first_day to last_day inclusive
+def working_intervals(template, first_day: date, last_day: date):
+    day = first_day
+    while day <= last_day:
+        shifts = [
+            (datetime.combine(day, start), datetime.combine(day, end))
+            for start, end in sorted(template.get(day.weekday(), ()))
+        ]
+        yield from merge_intervals(shifts)
+        day += timedelta(days=1)
+
+def _round_up(moment: datetime, step: timedelta):
+    midnight = datetime.combine(moment.date(), time())
+    return midnight + math.ceil((moment - midnight) / step) * step
+
+# Slot starts of a doctor, in time order, that fit the duration into free time
+def free_slots(template, busy, first_day: date, last_day: date, duration: timedelta, not_before: datetime, step: timedelta):
+    for start, end in subtract_intervals(working_intervals(template, first_day, last_day), busy):
+        slot = _round_up(max(start, not_before), step)
+        while slot + duration <= end:
+            yield slot
+            slot += step
+
+# Doctors of the specialization with their usernames and weekly templates
+async def load_doctors(db: AsyncSession, specialization_key: str):
+    doctors = dict((await db.execute(
+        select(models.Doctor.user_id, models.User.username)
+        .join(models.User, models.User.id == models.Doctor.user_id)
+        .where(models.Doctor.specialization_key == specialization_key)
+    )).all())
+    templates = {}
+    if doctors:
+        rows = await db.scalars(select(models.DoctorWorkingHours).where(models.DoctorWorkingHours.doctor_id.in_(list(doctors))))
+        for shift in rows:
+            templates.setdefault(shift.doctor_id, {}).setdefault(shift.weekday, []).append((shift.start_time, shift.end_time))
+    return doctors, templates
+
+# Earliest free slots across the doctors of a specialization between two dates
+# inclusive. The range is searched a window of days at a time, so a search that
+# finds its slots early never loads the appointments of later weeks. Within a
+# window every doctor's slots are generated lazily in time order and merged.
+async def earliest_slots(
+    db: AsyncSession,
+    specialization_key: str,
+    first_day: date,
+    last_day: date,
+    duration_minutes: int,
+    limit: int = DEFAULT_AVAILABILITY_LIMIT,
+    per_doctor: int = 1,
+    now=None,
+):
+    doctors, templates = await load_doctors(db, specialization_key)
+    duration = timedelta(minutes=duration_minutes)
+    step = timedelta(minutes=AVAILABILITY_STEP_MINUTES)
+    # Appointments are stored in naive local time, the clock the dashboards use
+    not_before = now or datetime.now()
+
+    results = []
+    offered = Counter()
+    window_start = max(first_day, not_before.date())
+    while doctors and window_start <= last_day and len(results) < limit:
+        window_end = min(window_start + timedelta(days=AVAILABILITY_WINDOW_DAYS - 1), last_day)
+        schedules = await load_schedules(
+            db, doctors, datetime.combine(window_start, time()), datetime.combine(window_end + timedelta(days=1), time())
+        )
+        streams = [
+            zip(itertools.islice(free_slots(
+                templates.get(doctor_id, DEFAULT_TEMPLATE),
+                merge_intervals(zip(schedules[doctor_id].starts, schedules[doctor_id].ends)),
+                window_start, window_end, duration, not_before, step,
+            ), per_doctor - offered[doctor_id]), itertools.repeat(doctor_id))
+            for doctor_id in doctors
+            if offered[doctor_id] < per_doctor
+        ]
+        for start, doctor_id in itertools.islice(heapq.merge(*streams), limit - len(results)):
+            offered[doctor_id] += 1
+            results.append({"doctor_id": doctor_id, "username": doctors[doctor_id], "start": start, "end": start + duration})
+        window_start = window_end + timedelta(days=1)
+    return results
@@ -0,0 +1,89 @@
+"""Latency of the month-wide earliest-availability search.
+
+Seeds a scratch database with doctors of one specialization whose working
+days are booked solid for a month, except for one slot each in the first
+week, then times availability.earliest_slots over that month. Run from the
+server directory:
+
+    python -m benchmarks.availability [doctors] [searches]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from database import Base, apply_sqlite_pragmas, to_async_url
+import availability
+import models
+
+FIRST_DAY = date(2030, 1, 7)
+DAYS = 31
+
+
+def seed(engine, doctors: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.User), [
+            {"id": i, "username": f"doctor{i}", "email": f"doctor{i}@example.com", "hashed_password": "x", "role": "doctor"}
+            for i in range(1, doctors + 1)
+        ])
+        connection.execute(insert(models.Doctor), [
+            {"user_id": i, "specialization": "Cardiology", "specialization_key": "cardiology", "qualification": "MD", "experience": 5, "address": "1 Bench St"}
+            for i in range(1, doctors + 1)
+        ])
+        # Every working slot is booked except one late slot in the doctor's first week
+        rows = []
+        for doctor_id in range(1, doctors + 1):
+            for day in range(DAYS):
+                start = datetime.combine(FIRST_DAY + timedelta(days=day), datetime.min.time()) + timedelta(hours=9)
+                for slot in range(16):
+                    if day == doctor_id % 7 and slot == 15:
+                        continue
+                    rows.append({
+                        "doctor_id": doctor_id,
+                        "patient_id": 1,
+                        "appointment_datetime": start + timedelta(minutes=30 * slot),
+                        "duration_minutes": 30,
+                        "end_datetime": start + timedelta(minutes=30 * slot + 30),
+                        "reason": "Checkup",
+                        "isCompleted": False,
+                        "isCancelled": False,
+                    })
+        connection.execute(insert(models.Appointment), rows)
+    return len(rows)
+
+
+async def search(url: str, searches: int):
+    engine = create_async_engine(to_async_url(url))
+    apply_sqlite_pragmas(engine.sync_engine)
+    sessions = async_sessionmaker(engine, class_=AsyncSession)
+    timings = []
+    for _ in range(searches):
+        async with sessions() as db:
+            started = time.perf_counter()
+            slots = await availability.earliest_slots(
+                db, "cardiology", FIRST_DAY, FIRST_DAY + timedelta(days=DAYS - 1), 30, limit=10,
+                now=datetime.combine(FIRST_DAY, datetime.min.time()),
+            )
+            timings.append(time.perf_counter() - started)
+    await engine.dispose()
+    return slots, sorted(timings)
+
+
+def main(doctors: int = 300, searches: int = 20):
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = apply_sqlite_pragmas(create_engine(url))
+        appointments = seed(engine, doctors)
+        engine.dispose()
+        slots, timings = asyncio.run(search(url, searches))
+
+    print(f"{doctors} doctors, {appointments} appointments, {len(slots)} slots found")
+    print(f"  median {timings[len(timings) // 2] * 1000:.1f} ms  max {timings[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,15 @@
+"""Load test for the API: seed a large synthetic dataset, then drive the real
+endpoints concurrently and report latency percentiles and throughput per route.
+
+Point DATABASE_URL (or --database-url) at a scratch database; seeding refuses
+to run against one that already has users. Run from the server directory:
+
+    python -m benchmarks.loadtest seed --doctors 10000 --patients 200000 --appointments 2000000
+    python -m benchmarks.loadtest run --duration 60 --concurrency 64 --output results.json
+
+By default the app is served in-process through httpx's ASGI transport. To
+compare releases, start the server with uvicorn and pass --url instead, so the
+load generator does not share the server's CPU. No operation calls Groq, but
+feedback schedules summary refreshes, which fail in the background unless a
+real GROQ_API_KEY is configured.
+"""
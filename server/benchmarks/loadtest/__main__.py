@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dotenv import load_dotenv
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Seed a synthetic dataset and load test the API.")
+    parser.add_argument("--database-url", help="database to seed and sample from, defaults to DATABASE_URL")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="fill a scratch database with synthetic doctors, patients and appointments")
+    seed.add_argument("--doctors", type=int, default=10000)
+    seed.add_argument("--patients", type=int, default=200000)
+    seed.add_argument("--appointments", type=int, default=2000000)
+    seed.add_argument("--chunk-size", type=int, default=10000)
+
+    run = commands.add_parser("run", help="drive the endpoints and print latency and throughput per route as JSON")
+    run.add_argument("--url", help="base URL of a running server; the app is served in-process when omitted")
+    run.add_argument("--duration", type=float, default=30, help="measured seconds")
+    run.add_argument("--warmup", type=float, default=5, help="seconds of load before measuring")
+    run.add_argument("--concurrency", type=int, default=32, help="concurrent virtual clients")
+    run.add_argument("--mix", default="", help='operation weights such as "doctors=20,book=5"; defaults to a browsing-heavy mix')
+    run.add_argument("--sample-size", type=int, default=20000, help="appointments sampled for each of cancel, complete and feedback")
+    run.add_argument("--seed", type=int, default=None, help="random seed for a repeatable request sequence")
+    run.add_argument("--output", help="also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    load_dotenv()
+    # The database modules read their configuration on import
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    # No operation calls Groq, but importing the app requires a key
+    os.environ.setdefault("GROQ_API_KEY", "loadtest")
+
+    from database import DATABASE_URL
+
+    if args.command == "seed":
+        from .seed import seed
+
+        result = seed(DATABASE_URL, args.doctors, args.patients, args.appointments, args.chunk_size)
+    else:
+        from .driver import parse_mix, run
+
+        result = asyncio.run(run(
+            DATABASE_URL,
+            parse_mix(args.mix),
+            args.duration,
+            args.concurrency,
+            warmup=args.warmup,
+            url=args.url,
+            sample_size=args.sample_size,
+            random_seed=args.seed,
+        ))
+
+    report = json.dumps(result, indent=2)
+    print(report)
+    if getattr(args, "output", None):
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
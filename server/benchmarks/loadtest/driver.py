@@ -0,0 +1,231 @@
+import asyncio
+import math
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import httpx
+from sqlalchemy import func, select
+from database import create_database_engine
+from oauth2 import create_user_access_token
+import models
+from .seed import BENCHMARK_PASSWORD, SLOT_MINUTES, doctor_username, patient_username
+
+# Relative weight of each operation in the default mix
+DEFAULT_MIX = {
+    "login": 1,
+    "doctors": 20,
+    "patient_dashboard": 20,
+    "doctor_dashboard": 10,
+    "book": 5,
+    "cancel": 2,
+    "complete": 2,
+    "feedback": 2,
+}
+
+# Route each operation is reported under
+ROUTES = {
+    "login": "POST /token",
+    "doctors": "GET /doctors",
+    "patient_dashboard": "GET /dashboard/appointments",
+    "doctor_dashboard": "GET /doctor/appointments",
+    "book": "POST /appointment",
+    "cancel": "PUT /appointments/{id}/cancel",
+    "complete": "PATCH /appointments/{id}/complete",
+    "feedback": "PUT /appointments/{id}/feedback",
+}
+
+# Appointments sampled up front for each state-changing operation, each used once
+DEFAULT_SAMPLE_SIZE = 20000
+
+
+# "doctors=20,book=5" -> {"doctors": 20, "book": 5}
+def parse_mix(text: str):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"Unknown operation {name!r}, expected one of {', '.join(ROUTES)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# Nearest-rank percentile of sorted values
+def percentile(values, p: float):
+    if not values:
+        return None
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+def summarize(samples, elapsed: float):
+    routes = {}
+    for route, results in sorted(samples.items()):
+        latencies = sorted(latency for latency, _ in results)
+        statuses = {}
+        for _, status_code in results:
+            statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+        routes[route] = {
+            "requests": len(results),
+            "errors": sum(1 for _, status_code in results if status_code >= 500 or status_code == 0),
+            "rps": round(len(results) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "statuses": statuses,
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {"elapsed_s": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 2), "routes": routes}
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Workload:
+    """Users and appointments the operations act on, loaded from the seeded database."""
+
+    def __init__(self, url: str, sample_size: int = DEFAULT_SAMPLE_SIZE, rng=None):
+        self.rng = rng or random.Random()
+        self._tokens = {}
+        engine = create_database_engine(url)
+        try:
+            with engine.connect() as connection:
+                self.doctors = connection.scalar(select(func.count()).select_from(models.Doctor))
+                self.patients = connection.scalar(select(func.count()).select_from(models.Patient))
+                now = datetime.now()
+                upcoming = connection.execute(
+                    select(models.Appointment.id, models.Appointment.doctor_id, models.Appointment.patient_id)
+                    .where(models.Appointment.appointment_datetime >= now, models.Appointment.isCancelled == False, models.Appointment.isCompleted == False)  # noqa: E712
+                    .limit(2 * sample_size)
+                ).all()
+                awaiting_feedback = connection.execute(
+                    select(models.Appointment.id, models.Appointment.patient_id)
+                    .where(models.Appointment.isCompleted == True, models.Appointment.feedback.is_(None))  # noqa: E712
+                    .limit(sample_size)
+                ).all()
+        finally:
+            engine.dispose()
+        if not self.doctors or not self.patients:
+            raise SystemExit("The database has no doctors or patients; run the seed command first")
+        self.rng.shuffle(upcoming)
+        self.rng.shuffle(awaiting_feedback)
+        self.to_cancel = upcoming[::2]
+        self.to_complete = upcoming[1::2]
+        self.awaiting_feedback = awaiting_feedback
+
+    # Seeded doctors have user ids 1..doctors and patients the ids after them
+    def doctor(self):
+        index = self.rng.randint(1, self.doctors)
+        return SimpleNamespace(id=index, username=doctor_username(index), role=models.RoleEnum.doctor)
+
+    def patient(self, user_id=None):
+        user_id = user_id or self.doctors + self.rng.randint(1, self.patients)
+        return SimpleNamespace(id=user_id, username=patient_username(user_id - self.doctors), role=models.RoleEnum.patient)
+
+    def headers(self, user):
+        token = self._tokens.get(user.id)
+        if token is None:
+            token = self._tokens[user.id] = create_user_access_token(user, expires_delta=timedelta(hours=12))
+        return {"Authorization": f"Bearer {token}"}
+
+
+# One request per operation; None when the operation has nothing left to act on
+async def perform(client: httpx.AsyncClient, workload: Workload, operation: str):
+    rng = workload.rng
+    if operation == "login":
+        user = workload.patient() if rng.random() < 0.8 else workload.doctor()
+        return await client.post("/token", data={"username": user.username, "password": BENCHMARK_PASSWORD})
+    if operation == "doctors":
+        return await client.get("/doctors", params={"limit": 50})
+    if operation == "patient_dashboard":
+        return await client.get("/dashboard/appointments", headers=workload.headers(workload.patient()))
+    if operation == "doctor_dashboard":
+        return await client.get("/doctor/appointments", headers=workload.headers(workload.doctor()))
+    if operation == "book":
+        start = datetime.now() + timedelta(days=rng.randint(1, 60), minutes=SLOT_MINUTES * rng.randint(0, 47))
+        return await client.post(
+            "/appointment",
+            json={"doctor_id": workload.doctor().id, "appointment_datetime": start.replace(second=0, microsecond=0).isoformat(), "reason": "Benchmark booking"},
+            headers=workload.headers(workload.patient()),
+        )
+    if operation == "cancel":
+        if not workload.to_cancel:
+            return None
+        appointment_id, _, patient_id = workload.to_cancel.pop()
+        return await client.put(f"/appointments/{appointment_id}/cancel", headers=workload.headers(workload.patient(patient_id)))
+    if operation == "complete":
+        if not workload.to_complete:
+            return None
+        appointment_id, doctor_id, _ = workload.to_complete.pop()
+        doctor = SimpleNamespace(id=doctor_id, username=doctor_username(doctor_id), role=models.RoleEnum.doctor)
+        return await client.patch(f"/appointments/{appointment_id}/complete", headers=workload.headers(doctor))
+    if operation == "feedback":
+        if not workload.awaiting_feedback:
+            return None
+        appointment_id, patient_id = workload.awaiting_feedback.pop()
+        return await client.put(
+            f"/appointments/{appointment_id}/feedback",
+            json={"feedback": "Clear explanations and no waiting."},
+            headers=workload.headers(workload.patient(patient_id)),
+        )
+    raise ValueError(f"Unknown operation {operation!r}")
+
+
+async def drive(client: httpx.AsyncClient, workload: Workload, mix, duration: float, concurrency: int, warmup: float = 0):
+    samples = {}
+    operations = list(mix)
+    weights = [mix[operation] for operation in operations]
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def worker():
+        while time.perf_counter() < deadline and any(weights):
+            operation = workload.rng.choices(operations, weights)[0]
+            request_started = time.perf_counter()
+            try:
+                response = await perform(client, workload, operation)
+                status_code = response.status_code if response is not None else None
+            except httpx.HTTPError:
+                status_code = 0
+            finished = time.perf_counter()
+            if status_code is None:
+                # Nothing left to act on, drop the operation from the mix
+                weights[operations.index(operation)] = 0
+            elif request_started >= measure_from:
+                samples.setdefault(ROUTES[operation], []).append((finished - request_started, status_code))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = min(time.perf_counter(), deadline) - measure_from
+    return summarize(samples, max(elapsed, 1e-9))
+
+
+async def run(database_url: str, mix, duration: float, concurrency: int, warmup: float = 0, url=None, sample_size: int = DEFAULT_SAMPLE_SIZE, random_seed=None):
+    started_at = datetime.utcnow().isoformat(timespec="seconds")
+    workload = Workload(database_url, sample_size, random.Random(random_seed))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if url:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            report = await drive(client, workload, mix, duration, concurrency, warmup)
+    else:
+        import main
+
+        # Run the app's startup and shutdown around the load, as uvicorn would
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits, timeout=60) as client:
+                report = await drive(client, workload, mix, duration, concurrency, warmup)
+
+    return {
+        "revision": git_revision(),
+        "started_at": started_at,
+        "target": url or "in-process",
+        "config": {"duration_s": duration, "warmup_s": warmup, "concurrency": concurrency, "mix": mix, "doctors": workload.doctors, "patients": workload.patients},
+        **report,
+    }
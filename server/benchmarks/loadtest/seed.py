@@ -0,0 +1,130 @@
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, text
+from database import create_database_engine
+from hashing import hash_password
+from migrate import upgrade_database
+from specializations import TAXONOMY
+import models
+
+# Every seeded user logs in with this password
+BENCHMARK_PASSWORD = "benchmark"
+# Rows per executemany and transaction
+SEED_CHUNK_SIZE = 10000
+# Appointments are spread from two years back to two months ahead, on 30 minute
+# slots between 09:00 and 17:00
+HISTORY_DAYS = 730
+FUTURE_DAYS = 60
+SLOTS_PER_DAY = 16
+SLOT_MINUTES = 30
+
+SPECIALIZATIONS = sorted(TAXONOMY)
+
+
+def doctor_username(index: int):
+    return f"doctor{index}"
+
+def patient_username(index: int):
+    return f"patient{index}"
+
+
+def _chunks(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _insert(engine, model, rows, chunk_size: int):
+    count = 0
+    for chunk in _chunks(rows, chunk_size):
+        with engine.begin() as connection:
+            connection.execute(insert(model), chunk)
+        count += len(chunk)
+    return count
+
+
+# Doctors get user ids 1..doctors and patients the ids after them, so the load
+# driver can pick users without querying for them
+def _users(doctors: int, patients: int, hashed_password: str):
+    for index in range(1, doctors + 1):
+        yield {"id": index, "username": doctor_username(index), "email": f"{doctor_username(index)}@bench.example", "hashed_password": hashed_password, "role": models.RoleEnum.doctor}
+    for index in range(1, patients + 1):
+        yield {"id": doctors + index, "username": patient_username(index), "email": f"{patient_username(index)}@bench.example", "hashed_password": hashed_password, "role": models.RoleEnum.patient}
+
+def _doctors(doctors: int):
+    for index in range(1, doctors + 1):
+        key = SPECIALIZATIONS[index % len(SPECIALIZATIONS)]
+        yield {
+            "user_id": index,
+            # Core inserts skip the ORM validator that fills specialization_key
+            "specialization": key.replace("_", " ").title(),
+            "specialization_key": key,
+            "qualification": "MD",
+            "experience": index % 30 + 1,
+            "address": f"{index} Benchmark Street",
+        }
+
+def _patients(doctors: int, patients: int):
+    for index in range(1, patients + 1):
+        yield {"user_id": doctors + index, "age": index % 80 + 18, "gender": "female" if index % 2 else "male", "address": f"{index} Patient Lane"}
+
+# Each doctor's appointments sit on evenly spaced, non-overlapping slots
+def _appointments(doctors: int, patients: int, appointments: int, now: datetime, rng: random.Random):
+    first_day = datetime.combine((now - timedelta(days=HISTORY_DAYS)).date(), datetime.min.time()) + timedelta(hours=9)
+    total_slots = (HISTORY_DAYS + FUTURE_DAYS) * SLOTS_PER_DAY
+    for doctor_id in range(1, doctors + 1):
+        count = appointments // doctors + (1 if doctor_id <= appointments % doctors else 0)
+        spacing = max(total_slots // max(count, 1), 1)
+        for k in range(min(count, total_slots)):
+            slot = k * spacing + doctor_id % spacing
+            start = first_day + timedelta(days=slot // SLOTS_PER_DAY, minutes=SLOT_MINUTES * (slot % SLOTS_PER_DAY))
+            past = start < now
+            roll = rng.random()
+            cancelled = roll < (0.1 if past else 0.05)
+            completed = past and not cancelled and roll < 0.8
+            feedback = "Very helpful and attentive." if completed and rng.random() < 0.5 else None
+            yield {
+                "doctor_id": doctor_id,
+                "patient_id": doctors + rng.randint(1, patients),
+                "appointment_datetime": start,
+                "duration_minutes": SLOT_MINUTES,
+                "end_datetime": start + timedelta(minutes=SLOT_MINUTES),
+                "reason": "Routine checkup",
+                "isCompleted": completed,
+                "isCancelled": cancelled,
+                "feedback": feedback,
+                "feedback_version": 1 if feedback else 0,
+            }
+
+
+def seed(url: str, doctors: int, patients: int, appointments: int, chunk_size: int = SEED_CHUNK_SIZE, random_seed: int = 41):
+    upgrade_database(url)
+    engine = create_database_engine(url)
+    try:
+        with engine.connect() as connection:
+            if connection.scalar(select(func.count()).select_from(models.User)):
+                raise SystemExit("Refusing to seed a database that already has users; point DATABASE_URL at a scratch database")
+
+        started = time.perf_counter()
+        # One bcrypt hash shared by every user keeps seeding fast while logins still pay the full verify cost
+        hashed_password = hash_password(BENCHMARK_PASSWORD)
+        counts = {
+            "users": _insert(engine, models.User, _users(doctors, patients, hashed_password), chunk_size),
+            "doctors": _insert(engine, models.Doctor, _doctors(doctors), chunk_size),
+            "patients": _insert(engine, models.Patient, _patients(doctors, patients), chunk_size),
+            "appointments": _insert(engine, models.Appointment, _appointments(doctors, patients, appointments, datetime.now(), random.Random(random_seed)), chunk_size),
+        }
+        # Explicit ids leave PostgreSQL's sequences behind
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as connection:
+                for table in ("users", "doctors", "patients", "appointments"):
+                    connection.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"))
+        counts["seconds"] = round(time.perf_counter() - started, 1)
+        return counts
+    finally:
+        engine.dispose()
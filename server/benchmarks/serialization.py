@@ -0,0 +1,68 @@
+"""Serialization and compression cost of a 5,000-appointment patient dashboard.
+
+Compares FastAPI's default path (jsonable_encoder + stdlib json) with
+FastJSONResponse, and reports the bytes on the wire uncompressed, gzipped and
+brotli-compressed. Run from the server directory:
+
+    python -m benchmarks.serialization [appointments] [repeat]
+"""
+import gzip
+import sys
+import timeit
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+import responses
+from responses import FastJSONResponse
+
+
+def dashboard(appointments: int):
+    start = datetime(2024, 1, 1, 9, 0)
+    data = {"upcoming": [], "past": [], "cancelled": [], "next_cursor": None}
+    for i in range(appointments):
+        appointment = {
+            "id": i + 1,
+            "doctor_id": i % 50 + 1,
+            "doctor_name": f"doctor_{i % 50}",
+            "appointment_datetime": start + timedelta(minutes=30 * i),
+            "reason": "Follow-up consultation for recurring headaches and sleep issues",
+        }
+        bucket = ("upcoming", "past", "cancelled")[i % 3]
+        if bucket == "past":
+            appointment["isCompleted"] = True
+            appointment["feedback"] = "Very thorough, explained the treatment plan clearly."
+        data[bucket].append(appointment)
+    return data
+
+
+def best_of(func, repeat: int):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main(appointments: int = 5000, repeat: int = 20):
+    data = dashboard(appointments)
+    default_render = JSONResponse(None).render
+    fast_render = FastJSONResponse(None).render
+
+    default_ms = best_of(lambda: default_render(jsonable_encoder(data)), repeat)
+    fast_ms = best_of(lambda: fast_render(data), repeat)
+
+    body = fast_render(data)
+    gzip_bytes = len(gzip.compress(body, responses.GZIP_LEVEL))
+    gzip_ms = best_of(lambda: gzip.compress(body, responses.GZIP_LEVEL), repeat)
+
+    print(f"{appointments} appointments, best of {repeat}")
+    print(f"  jsonable_encoder + json : {default_ms:8.2f} ms")
+    print(f"  FastJSONResponse        : {fast_ms:8.2f} ms  ({'orjson' if responses.orjson else 'stdlib json'}, {default_ms / fast_ms:.1f}x)")
+    print(f"  uncompressed            : {len(body):8d} bytes")
+    print(f"  gzip level {responses.GZIP_LEVEL}            : {gzip_bytes:8d} bytes  ({gzip_ms:.2f} ms)")
+    if responses.brotli is not None:
+        brotli_bytes = len(responses.brotli.compress(body, quality=responses.BROTLI_QUALITY))
+        brotli_ms = best_of(lambda: responses.brotli.compress(body, quality=responses.BROTLI_QUALITY), repeat)
+        print(f"  brotli quality {responses.BROTLI_QUALITY}        : {brotli_bytes:8d} bytes  ({brotli_ms:.2f} ms)")
+    else:
+        print("  brotli                  : not installed")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
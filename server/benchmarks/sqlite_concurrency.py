@@ -0,0 +1,117 @@
+"""Read/write throughput of the SQLite engine profile under concurrency.
+
+Runs writer threads booking appointments and reader threads loading a
+dashboard page against a scratch database, once with SQLite's defaults
+(rollback journal, synchronous=FULL) and once with the SQLITE_PRAGMAS profile
+from database.py. Run from the server directory:
+
+    python -m benchmarks.sqlite_concurrency [seconds] [writers] [readers]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from database import POOL_OPTIONS, SQLITE_PRAGMAS, Base, apply_sqlite_pragmas
+import models
+
+PROFILES = {
+    "sqlite defaults": {},
+    "production profile": SQLITE_PRAGMAS,
+}
+
+
+def seed(engine, patients: int = 50, appointments: int = 5000):
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1, 9, 0)
+    with engine.begin() as connection:
+        # Doctor and patient ids are user ids, which the profile's foreign keys check
+        connection.execute(insert(models.User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x", "role": "patient"}
+            for i in range(1, patients + 1)
+        ])
+        connection.execute(insert(models.Appointment), [
+            {
+                "doctor_id": i % 20 + 1,
+                "patient_id": i % patients + 1,
+                "appointment_datetime": start + timedelta(minutes=30 * i),
+                "reason": "Checkup",
+                "isCompleted": False,
+                "isCancelled": False,
+            }
+            for i in range(appointments)
+        ])
+
+
+def run(pragmas, seconds: float, writers: int, readers: int):
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = apply_sqlite_pragmas(create_engine(url, connect_args={"check_same_thread": False}, **POOL_OPTIONS), pragmas)
+        seed(engine)
+
+        counts = {"writes": 0, "reads": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + seconds
+
+        def count(key):
+            with lock:
+                counts[key] += 1
+
+        def writer(worker: int):
+            i = 0
+            while time.monotonic() < deadline:
+                i += 1
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(insert(models.Appointment).values(
+                            doctor_id=worker % 20 + 1,
+                            patient_id=i % 50 + 1,
+                            appointment_datetime=datetime(2025, 1, 1) + timedelta(minutes=i),
+                            reason="Booked during benchmark",
+                            isCompleted=False,
+                            isCancelled=False,
+                        ))
+                    count("writes")
+                except OperationalError:
+                    count("locked")
+
+        def reader(worker: int):
+            while time.monotonic() < deadline:
+                try:
+                    with engine.connect() as connection:
+                        connection.execute(
+                            select(models.Appointment)
+                            .where(models.Appointment.patient_id == worker % 50 + 1)
+                            .order_by(models.Appointment.appointment_datetime, models.Appointment.id)
+                            .limit(100)
+                        ).all()
+                    count("reads")
+                except OperationalError:
+                    count("locked")
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+        return counts
+
+
+def main(seconds: float = 5, writers: int = 4, readers: int = 8):
+    print(f"{writers} writers, {readers} readers, {seconds:g}s per profile")
+    for name, pragmas in PROFILES.items():
+        counts = run(pragmas, seconds, writers, readers)
+        print(
+            f"  {name:<20} writes/s {counts['writes'] / seconds:8.1f}"
+            f"  reads/s {counts['reads'] / seconds:8.1f}  locked errors {counts['locked']}"
+        )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:4]
+    main(float(args[0]) if args else 5, *(int(arg) for arg in args[1:]))
@@ -0,0 +1,259 @@
+"""Bulk import of users with their doctor or patient profiles.
+
+Reads CSV (with a header row) or NDJSON records with the /register fields
+(username, email, password, role) plus the profile fields for the role:
+specialization, experience, qualification and address for doctors; age,
+gender and address for patients. Records without any profile fields create
+only the user. Run from the server directory:
+
+    python bulk_import.py clinic.csv --rejects rejects.ndjson
+    python bulk_import.py - --format ndjson < clinic.ndjson
+
+Records are processed in chunks: passwords are hashed across worker processes
+while the previous chunk is written, and each chunk's rows are inserted with
+executemany in one transaction. Invalid or duplicate records are reported as
+NDJSON and skipped without stopping the load; the exit status is 1 when any
+record was rejected.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from database import DATABASE_URL, create_database_engine
+from doctor_catalog import doctor_catalog
+from hashing import hash_password
+from schemas import RoleEnum, UserCreate
+from specializations import canonical_specialization
+import models
+
+# Records per chunk; each chunk is hashed in parallel and committed in one transaction
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+# Processes hashing passwords, 0 hashes in the importing process
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+
+class DoctorProfileFields(BaseModel):
+    specialization: str
+    experience: int
+    qualification: str
+    address: str
+
+class PatientProfileFields(BaseModel):
+    age: int
+    gender: str
+    address: str
+
+PROFILE_FIELDS = {RoleEnum.doctor: DoctorProfileFields, RoleEnum.patient: PatientProfileFields}
+
+
+class ImportRecord:
+    """A validated input record and where it came from."""
+
+    def __init__(self, line: int, user: UserCreate, profile: Optional[BaseModel]):
+        self.line = line
+        self.user = user
+        self.profile = profile
+
+
+# (line number, raw dict) for every record of the input
+def read_records(stream, format: str):
+    if format == "ndjson":
+        for line, text in enumerate(stream, start=1):
+            if text.strip():
+                try:
+                    yield line, json.loads(text)
+                except ValueError as error:
+                    yield line, error
+    else:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+
+def _error_message(error: Exception):
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors())
+    return str(error)
+
+# The validated record, or the reason it is rejected
+def parse_record(line: int, raw):
+    if isinstance(raw, Exception):
+        return f"Invalid JSON: {raw}"
+    if not isinstance(raw, dict):
+        return "Record must be an object"
+    # Empty CSV cells count as missing
+    raw = {key: value for key, value in raw.items() if key and value not in (None, "")}
+    try:
+        user = UserCreate(**raw)
+        fields = PROFILE_FIELDS[user.role]
+        profile = fields(**raw) if any(name in raw for name in fields.model_fields if name != "address") else None
+    except ValidationError as error:
+        return _error_message(error)
+    return ImportRecord(line, user, profile)
+
+def _chunks(items, size: int):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkImporter:
+    """Streams records into the database in hashed, batched transactions."""
+
+    def __init__(self, engine, executor=None, chunk_size: int = IMPORT_CHUNK_SIZE, rejects=None):
+        self.engine = engine
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.rejects = rejects
+        self.counts = {"read": 0, "imported": 0, "doctors": 0, "patients": 0, "rejected": 0}
+        self._usernames = set()
+        self._emails = set()
+
+    def reject(self, line: int, username, error: str):
+        self.counts["rejected"] += 1
+        if self.rejects is not None:
+            self.rejects.write(json.dumps({"line": line, "username": username, "error": error}) + "\n")
+
+    def _hash_all(self, passwords):
+        if self.executor is None:
+            return map(hash_password, passwords)
+        return self.executor.map(hash_password, passwords)
+
+    # Validate a chunk and drop records that clash with earlier input or existing users
+    def _accepted(self, chunk):
+        records = []
+        for line, raw in chunk:
+            self.counts["read"] += 1
+            record = parse_record(line, raw)
+            if isinstance(record, str):
+                self.reject(line, raw.get("username") if isinstance(raw, dict) else None, record)
+            elif record.user.username in self._usernames:
+                self.reject(line, record.user.username, "Duplicate username in input")
+            elif record.user.email in self._emails:
+                self.reject(line, record.user.username, "Duplicate email in input")
+            else:
+                self._usernames.add(record.user.username)
+                self._emails.add(record.user.email)
+                records.append(record)
+        if not records:
+            return records
+
+        with self.engine.connect() as connection:
+            existing_usernames = set(connection.scalars(select(models.User.username).where(models.User.username.in_([record.user.username for record in records]))))
+            existing_emails = set(connection.scalars(select(models.User.email).where(models.User.email.in_([record.user.email for record in records]))))
+        accepted = []
+        for record in records:
+            if record.user.username in existing_usernames:
+                self.reject(record.line, record.user.username, "Username already exists.")
+            elif record.user.email in existing_emails:
+                self.reject(record.line, record.user.username, "Email already exists.")
+            else:
+                accepted.append(record)
+        return accepted
+
+    def _insert(self, connection, records, hashes):
+        user_ids = connection.scalars(
+            insert(models.User).returning(models.User.id, sort_by_parameter_order=True),
+            [
+                {"username": record.user.username, "email": record.user.email, "hashed_password": hashed, "role": models.RoleEnum(record.user.role.value)}
+                for record, hashed in zip(records, hashes)
+            ],
+        ).all()
+        doctors = []
+        patients = []
+        for record, user_id in zip(records, user_ids):
+            if isinstance(record.profile, DoctorProfileFields):
+                # Core inserts skip the ORM validator that fills specialization_key
+                doctors.append({"user_id": user_id, **record.profile.model_dump(), "specialization_key": canonical_specialization(record.profile.specialization)})
+            elif isinstance(record.profile, PatientProfileFields):
+                patients.append({"user_id": user_id, **record.profile.model_dump()})
+        if doctors:
+            connection.execute(insert(models.Doctor), doctors)
+        if patients:
+            connection.execute(insert(models.Patient), patients)
+        return len(doctors), len(patients)
+
+    # Write a chunk in one transaction; when a concurrent writer took one of its
+    # usernames or emails, fall back to one transaction per record
+    def _write(self, records, hashes):
+        try:
+            with self.engine.begin() as connection:
+                results = [(len(records), *self._insert(connection, records, hashes))]
+        except IntegrityError:
+            results = []
+            for record, hashed in zip(records, hashes):
+                try:
+                    with self.engine.begin() as connection:
+                        results.append((1, *self._insert(connection, [record], [hashed])))
+                except IntegrityError:
+                    self.reject(record.line, record.user.username, "Username or email already exists.")
+        for users, doctors, patients in results:
+            self.counts["imported"] += users
+            self.counts["doctors"] += doctors
+            self.counts["patients"] += patients
+
+    def run(self, records):
+        pending = None
+        for chunk in _chunks(records, self.chunk_size):
+            accepted = self._accepted(chunk)
+            # Start hashing this chunk before writing the previous one
+            hashing = (accepted, self._hash_all([record.user.password for record in accepted])) if accepted else None
+            if pending is not None:
+                self._write(pending[0], list(pending[1]))
+            pending = hashing
+        if pending is not None:
+            self._write(pending[0], list(pending[1]))
+        if self.counts["doctors"]:
+            # Core inserts bypass the ORM events that keep the doctor catalog fresh;
+            # other processes pick the new doctors up within DOCTOR_CATALOG_TTL
+            doctor_catalog.invalidate()
+        return self.counts
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Import users with their doctor or patient profiles.")
+    parser.add_argument("input", help="CSV or NDJSON file, or - for standard input")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension, csv for standard input")
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=IMPORT_HASH_WORKERS, help="hashing processes, 0 hashes in this process")
+    parser.add_argument("--rejects", help="write rejected records here as NDJSON instead of standard error")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    format = args.format or ("ndjson" if args.input.endswith((".ndjson", ".jsonl")) else "csv")
+    stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="") if args.input == "-" else open(args.input, encoding="utf-8-sig", newline="")
+    rejects = open(args.rejects, "w") if args.rejects else sys.stderr
+    engine = create_database_engine(args.database_url or DATABASE_URL)
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 0 else None
+    started = time.perf_counter()
+    try:
+        counts = BulkImporter(engine, executor, args.chunk_size, rejects).run(read_records(stream, format))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        engine.dispose()
+        stream.close()
+        if rejects is not sys.stderr:
+            rejects.close()
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    print(json.dumps(counts))
+    return 1 if counts["rejected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,124 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///./test.db" if os.getenv("TESTING") == "True" else "sqlite:///./main.db"
+# Normalize the postgres:// scheme some hosting providers hand out
+def normalize_url(url: str):
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# DATABASE_URL (or TEST_DATABASE_URL under TESTING) selects the database; the
+# local SQLite files remain the default
+if os.getenv("TESTING") == "True":
+    DATABASE_URL = normalize_url(os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db"))
+else:
+    DATABASE_URL = normalize_url(os.getenv("DATABASE_URL", "sqlite:///./main.db"))
+
+# Optional replica for read-only traffic; reads share the primary's database by default
+if os.getenv("TESTING") == "True":
+    DATABASE_READ_URL = normalize_url(os.getenv("TEST_DATABASE_READ_URL", DATABASE_URL))
+else:
+    DATABASE_READ_URL = normalize_url(os.getenv("DATABASE_READ_URL", DATABASE_URL))
+
+# Connection pool sizing, per engine and process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+# Server databases: check connections before use and replace them before the server drops them
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True") == "True"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite profile applied to every new connection. WAL lets readers run alongside
+# the single writer, and busy_timeout makes writers queue instead of failing with
+# "database is locked". Foreign keys are enforced, as they are on PostgreSQL.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),  # milliseconds
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negative means KiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "foreign_keys": os.getenv("SQLITE_FOREIGN_KEYS", "ON"),
+}
+
+# Async driver variant of a sync database URL
+def to_async_url(url: str):
+    url = normalize_url(url)
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith(("postgresql:", "postgresql+psycopg2:")):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+def is_sqlite(url: str):
+    return url.startswith("sqlite")
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+# Run the SQLite profile pragmas on each connection the engine opens
+def apply_sqlite_pragmas(engine, pragmas=None):
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+POOL_OPTIONS = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+READ_POOL_OPTIONS = {"pool_size": DB_READ_POOL_SIZE, "max_overflow": DB_READ_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+# create_engine arguments for a database URL
+def engine_options(url: str, pool_options=None):
+    pool_options = POOL_OPTIONS if pool_options is None else pool_options
+    if is_sqlite(url):
+        return {"connect_args": {"check_same_thread": False}, **pool_options}
+    return {**pool_options, "pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+
+def create_database_engine(url: str):
+    engine = create_engine(normalize_url(url), **engine_options(url))
+    return apply_sqlite_pragmas(engine) if is_sqlite(url) else engine
+
+# Async engine for a URL; read-only engines get their own pool, and on SQLite
+# their connections refuse writes
+def create_async_database_engine(url: str, read_only: bool = False):
+    options = engine_options(url, READ_POOL_OPTIONS if read_only else POOL_OPTIONS)
+    if is_sqlite(url):
+        # aiosqlite defaults to NullPool, which takes no sizing arguments
+        options["poolclass"] = AsyncAdaptedQueuePool
+    engine = create_async_engine(to_async_url(url), **options)
+    if is_sqlite(url):
+        apply_sqlite_pragmas(engine.sync_engine, {**SQLITE_PRAGMAS, "query_only": "ON"} if read_only else SQLITE_PRAGMAS)
+    return engine
+
+# Sync engine for migrations, scripts and tests
+engine = create_database_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API handlers
+async_engine = create_async_database_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Async engine for handlers that only read, pointed at the replica when one is configured
+async_read_engine = create_async_database_engine(DATABASE_READ_URL, read_only=True)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency to get the database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency to get a read-only database session
+async def get_read_db():
+    async with AsyncReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,120 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import time
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import models
+from responses import decoded_etag
+
+# Upper bound on how stale a snapshot can get, for changes made by other processes
+DOCTOR_CATALOG_TTL = float(os.getenv("DOCTOR_CATALOG_TTL", "300"))
+
+
+class CatalogSnapshot:
+    """All doctors with their usernames, ordered by doctor id, plus a digest of the contents."""
+
+    def __init__(self, doctors):
+        self.doctors = doctors
+        self.ids = [doctor["id"] for doctor in doctors]
+        self.by_user_id = {doctor["user_id"]: doctor for doctor in doctors}
+        self.digest = hashlib.sha256(json.dumps(doctors, sort_keys=True).encode()).hexdigest()
+        self.loaded_at = time.monotonic()
+
+    # Doctors after the given doctor id, at most limit + 1 of them
+    def page(self, after_id, limit: int):
+        start = bisect.bisect_right(self.ids, after_id) if after_id is not None else 0
+        return self.doctors[start:start + limit + 1]
+
+    # Strong ETag for a representation derived from this snapshot and the request parameters
+    def etag(self, *params):
+        return '"' + hashlib.sha256(json.dumps([self.digest, *params]).encode()).hexdigest()[:32] + '"'
+
+
+class DoctorCatalog:
+    """In-memory doctor catalog, rebuilt after commits that touch doctors or users."""
+
+    def __init__(self, ttl: float = DOCTOR_CATALOG_TTL):
+        self.ttl = ttl
+        self.version = 0
+        self._snapshot = None
+        self._lock = asyncio.Lock()
+
+    # The current snapshot if it is still valid; serving from it needs no database access
+    def cached(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            return snapshot
+        return None
+
+    async def get(self, db: AsyncSession):
+        snapshot = self.cached()
+        if snapshot is not None:
+            return snapshot
+        async with self._lock:
+            snapshot = self.cached()
+            if snapshot is not None:
+                return snapshot
+            version = self.version
+            rows = (await db.execute(
+                select(models.Doctor, models.User.username)
+                .join(models.User, models.User.id == models.Doctor.user_id)
+                .order_by(models.Doctor.id)
+            )).all()
+            snapshot = CatalogSnapshot([
+                {
+                    "id": doctor.id,
+                    "user_id": doctor.user_id,
+                    "specialization": doctor.specialization,
+                    "experience": doctor.experience,
+                    "qualification": doctor.qualification,
+                    "address": doctor.address,
+                    "username": username,
+                }
+                for doctor, username in rows
+            ])
+            # A change committed while loading makes this snapshot stale already
+            if self.version == version:
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        self.version += 1
+        self._snapshot = None
+
+
+doctor_catalog = DoctorCatalog()
+
+# Mark the session when it flushes doctor or user changes and drop the snapshot
+# once they are committed, so a reload can never pick up the old rows
+@event.listens_for(models.Doctor, "after_insert")
+@event.listens_for(models.Doctor, "after_update")
+@event.listens_for(models.Doctor, "after_delete")
+@event.listens_for(models.User, "after_insert")
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _mark_catalog_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info["doctor_catalog_changed"] = True
+    else:
+        doctor_catalog.invalidate()
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_catalog(session):
+    if session.info.pop("doctor_catalog_changed", False):
+        doctor_catalog.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop("doctor_catalog_changed", None)
+
+# Whether an If-None-Match header matches the given strong ETag
+def etag_matches(if_none_match, etag: str):
+    if not if_none_match:
+        return False
+    candidates = [decoded_etag(candidate.strip()) for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
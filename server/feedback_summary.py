@@ -0,0 +1,125 @@
+import asyncio
+import os
+from datetime import datetime
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from llm import SUMMARY_TIMEOUT
+import models
+
+# Most feedbacks folded into the summary per model call
+FEEDBACK_SUMMARY_BATCH = int(os.getenv("FEEDBACK_SUMMARY_BATCH", "200"))
+
+# Seconds to wait after a feedback before refreshing, so bursts share one model call
+FEEDBACK_SUMMARY_DEBOUNCE = float(os.getenv("FEEDBACK_SUMMARY_DEBOUNCE", "5"))
+
+NO_FEEDBACK_SUMMARY = "No feedbacks available."
+PENDING_FEEDBACK_SUMMARY = "Feedback insights are being prepared."
+
+SUMMARY_INSTRUCTIONS = "Summarize the following patient feedbacks into short phrases that can be directly displayed under 'Feedback Insights' on a website. Do not include any introductory phrases, headers, or follow-up questions, and avoid phrases like 'Here is a summary'. Only provide the key feedback points. This summary is intended for doctor to improve his service. So the response should be addressed to a doctor.Remember not to include any introductory phrases, headers, or follow-up questions."
+
+MERGE_INSTRUCTIONS = "Update the existing 'Feedback Insights' summary below with the new patient feedbacks. Keep the same format of short phrases addressed to the doctor, merge points that repeat and keep the result about as short as the existing summary. Do not include any introductory phrases, headers, or follow-up questions, and avoid phrases like 'Here is a summary'."
+
+# Feedbacks whose current version is not folded into the summary yet. Each
+# appointment keeps its own mark, so feedback committed late is still picked up
+async def new_feedbacks(db: AsyncSession, doctor_id: int, limit: int = FEEDBACK_SUMMARY_BATCH):
+    query = select(models.Appointment.id, models.Appointment.feedback, models.Appointment.feedback_version).where(
+        models.Appointment.doctor_id == doctor_id,
+        models.Appointment.feedback.isnot(None),
+        models.Appointment.summarized_version.is_distinct_from(models.Appointment.feedback_version),
+    )
+    query = query.order_by(models.Appointment.id).limit(limit)
+    return (await db.execute(query)).all()
+
+def summary_prompt(previous, feedbacks):
+    if previous is None:
+        return f"{SUMMARY_INSTRUCTIONS}Feedbacks: {feedbacks}"
+    return f"{MERGE_INSTRUCTIONS}\nExisting summary: {previous}\nNew feedbacks: {feedbacks}"
+
+# Fold one batch of unseen feedbacks into the stored summary, returning how many were folded
+async def fold_new_feedbacks(db: AsyncSession, llm, doctor_id: int):
+    stored = await db.get(models.FeedbackSummary, doctor_id)
+    rows = await new_feedbacks(db, doctor_id)
+    if not rows:
+        return 0
+
+    response = await llm.complete(
+        [{"role": "user", "content": summary_prompt(stored.summary if stored else None, [row.feedback for row in rows])}],
+        timeout=SUMMARY_TIMEOUT,
+        max_tokens=150,
+        temperature=0.7,
+    )
+    summary = response.choices[0].message.content.strip()
+
+    # Mark the versions that were read; feedback edited meanwhile stays new
+    await db.execute(update(models.Appointment), [
+        {"id": row.id, "summarized_version": row.feedback_version} for row in rows
+    ])
+    # Edited feedback is folded again, so count appointments rather than folds
+    feedback_count = await db.scalar(select(func.count()).where(
+        models.Appointment.doctor_id == doctor_id,
+        models.Appointment.feedback.isnot(None),
+        models.Appointment.summarized_version.isnot(None),
+    ))
+    if stored is None:
+        stored = models.FeedbackSummary(doctor_id=doctor_id)
+        db.add(stored)
+    stored.summary = summary
+    stored.feedback_count = feedback_count
+    stored.updated_at = datetime.utcnow()
+    await db.commit()
+    return len(rows)
+
+# Bring the doctor's stored summary up to date with all of their feedbacks
+async def refresh_feedback_summary(db: AsyncSession, llm, doctor_id: int):
+    while await fold_new_feedbacks(db, llm, doctor_id) == FEEDBACK_SUMMARY_BATCH:
+        pass
+
+# Whether the doctor has feedbacks the stored summary does not cover yet
+async def is_stale(db: AsyncSession, doctor_id: int):
+    return bool(await new_feedbacks(db, doctor_id, limit=1))
+
+
+class SummaryRefresher:
+    """In-process worker refreshing feedback summaries in the background, debounced per doctor."""
+
+    def __init__(self, session_factory, llm, delay: float = FEEDBACK_SUMMARY_DEBOUNCE):
+        self.session_factory = session_factory
+        self.llm = llm
+        self.delay = delay
+        self._tasks = {}
+        self._dirty = set()
+
+    def is_pending(self, doctor_id: int):
+        return doctor_id in self._tasks
+
+    # Queue a refresh; requests arriving while one is queued or running are coalesced into it
+    def schedule(self, doctor_id: int):
+        self._dirty.add(doctor_id)
+        if doctor_id not in self._tasks:
+            self._tasks[doctor_id] = asyncio.create_task(self._run(doctor_id))
+
+    async def _run(self, doctor_id: int):
+        try:
+            # Feedback submitted while a refresh runs gets one more pass afterwards
+            while doctor_id in self._dirty:
+                await asyncio.sleep(self.delay)
+                self._dirty.discard(doctor_id)
+                try:
+                    async with self.session_factory() as db:
+                        await refresh_feedback_summary(db, self.llm, doctor_id)
+                except Exception as e:
+                    print(f"Error refreshing feedback summary for doctor {doctor_id}: {e}")
+        finally:
+            self._tasks.pop(doctor_id, None)
+
+    # Wait for the queued refreshes to finish
+    async def drain(self):
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def aclose(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        self._dirty.clear()
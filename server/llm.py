@@ -0,0 +1,138 @@
+import asyncio
+import os
+import random
+import time
+import httpx
+from groq import APIConnectionError, AsyncGroq, InternalServerError, RateLimitError
+import metrics
+
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama3-70b-8192")
+
+# Shared connection pool for all Groq calls
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "2"))
+
+# Retries on connection errors, timeouts, 429s and 5xx responses
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "2"))
+GROQ_RETRY_BASE_DELAY = float(os.getenv("GROQ_RETRY_BASE_DELAY", "0.25"))
+GROQ_RETRY_MAX_DELAY = float(os.getenv("GROQ_RETRY_MAX_DELAY", "2"))
+
+# Total time budget per AI endpoint in seconds, retries included
+RECOMMEND_TIMEOUT = float(os.getenv("GROQ_RECOMMEND_TIMEOUT", "5"))
+ASSISTANT_TIMEOUT = float(os.getenv("GROQ_ASSISTANT_TIMEOUT", "10"))
+SUMMARY_TIMEOUT = float(os.getenv("GROQ_SUMMARY_TIMEOUT", "15"))
+
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+class LLMTimeoutError(Exception):
+    """The completion did not finish within its time budget."""
+
+
+class GroqClient:
+    """Async Groq client with a pooled HTTP connection, time budgets and jittered retries."""
+
+    def __init__(self, api_key: str, max_connections: int = GROQ_MAX_CONNECTIONS, max_retries: int = GROQ_MAX_RETRIES, client=None):
+        self.max_retries = max_retries
+        self._http_client = None
+        if client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+                timeout=httpx.Timeout(None, connect=GROQ_CONNECT_TIMEOUT),
+            )
+            # Retries are handled here so they respect the endpoint's budget
+            client = AsyncGroq(api_key=api_key, http_client=self._http_client, max_retries=0)
+        self.client = client
+
+    async def complete(self, messages, *, timeout: float, max_tokens: int, temperature: float, model: str = GROQ_MODEL, **options):
+        started = time.perf_counter()
+        outcome = "error"
+        usage = None
+        try:
+            response = await self._create(messages, timeout=timeout, max_tokens=max_tokens, temperature=temperature, model=model, **options)
+            usage = getattr(response, "usage", None)
+            outcome = "ok"
+            return response
+        except LLMTimeoutError:
+            outcome = "timeout"
+            raise
+        finally:
+            metrics.observe_llm_call("completion", time.perf_counter() - started, outcome, usage)
+
+    async def _create(self, messages, *, timeout: float, max_tokens: int, temperature: float, model: str, **options):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise LLMTimeoutError(f"Groq completion exceeded {timeout}s budget")
+            try:
+                return await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        timeout=remaining,
+                        **options,
+                    ),
+                    remaining,
+                )
+            except asyncio.TimeoutError:
+                raise LLMTimeoutError(f"Groq completion exceeded {timeout}s budget")
+            except RETRYABLE_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                metrics.llm_retries.inc()
+                # Exponential backoff with full jitter, never sleeping past the deadline
+                delay = random.uniform(0, min(GROQ_RETRY_MAX_DELAY, GROQ_RETRY_BASE_DELAY * 2 ** attempt))
+                if loop.time() + delay >= deadline:
+                    raise LLMTimeoutError(f"Groq completion exceeded {timeout}s budget")
+                await asyncio.sleep(delay)
+
+    # Yield the completion's text as it is generated. Retries only cover opening
+    # the stream; the whole stream must finish within the time budget.
+    async def stream(self, messages, *, timeout: float, max_tokens: int, temperature: float, model: str = GROQ_MODEL):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        started = time.perf_counter()
+        outcome = "error"
+        usage = None
+        chunks = None
+        try:
+            chunks = await self._create(messages, timeout=timeout, max_tokens=max_tokens, temperature=temperature, model=model, stream=True)
+            iterator = chunks.__aiter__()
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise LLMTimeoutError(f"Groq completion exceeded {timeout}s budget")
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), remaining)
+                except StopAsyncIteration:
+                    outcome = "ok"
+                    return
+                except asyncio.TimeoutError:
+                    raise LLMTimeoutError(f"Groq completion exceeded {timeout}s budget")
+                # Groq reports usage on the last chunk
+                x_groq = getattr(chunk, "x_groq", None)
+                if getattr(x_groq, "usage", None) is not None:
+                    usage = x_groq.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except LLMTimeoutError:
+            outcome = "timeout"
+            raise
+        except GeneratorExit:
+            outcome = "abandoned"
+            raise
+        finally:
+            metrics.observe_llm_call("stream", time.perf_counter() - started, outcome, usage)
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                await close()
+
+    async def aclose(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
@@ -1,27 +1,51 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from sqlalchemy.orm import Session , joinedload
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import and_, delete, func, insert, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import timedelta, datetime
-from typing import List
+from fastapi.responses import StreamingResponse
+from datetime import date, timedelta, datetime
+from contextlib import asynccontextmanager
+from typing import List, Optional
 import os
-from groq import Groq
 from dotenv import load_dotenv
-from database import get_db, engine
+from database import AsyncSessionLocal, async_engine, async_read_engine, get_db, get_read_db
 import models
-from schemas import UserCreate, UserResponse, Token, PatientResponse, PatientCreate , DoctorResponse, DoctorCreate, AppointmentCreate , FeedbackRequest , SymptomsInput , FeedbackResponse , SymptomsInput , VirtualAssistantResponse , FeedbackSummaryResponse , RecommenderInput
-from hashing import hash_password, verify_password
-from oauth2 import create_access_token, oauth2_scheme, verify_token
-
-models.Base.metadata.create_all(bind=engine)
+from schemas import UserCreate, UserResponse, Token, PatientResponse, PatientCreate , DoctorResponse, DoctorCreate, AppointmentCreate , FeedbackRequest , SymptomsInput , FeedbackResponse , SymptomsInput , VirtualAssistantResponse , FeedbackSummaryResponse , RecommenderInput , AppointmentBatchCreate , AppointmentBatchResponse , AvailableSlot , WorkingHoursUpdate
+from hashing import hash_password_async, hashing_pool, verify_password_async
+from oauth2 import CurrentUser, create_user_access_token, get_current_doctor, get_current_patient, get_current_user, get_current_user_record
+from llm import ASSISTANT_TIMEOUT, RECOMMEND_TIMEOUT, GroqClient, LLMTimeoutError
+from specialization_cache import SpecializationCache
+import feedback_summary
+import assistant_sessions
+import scheduling
+import availability
+import metrics
+from doctor_catalog import doctor_catalog, etag_matches
+from responses import CompressionMiddleware, FastJSONResponse
+from assistant import ASSISTANT_SYSTEM_PROMPT, LINE_BREAK, ReplyFormatter, format_assistant_reply, sse_event
+from specializations import canonical_specialization
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, after_cursor, decode_cursor, paginate
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if GROQ_API_KEY is None:
     raise ValueError("GROQ_API_KEY not found in environment variables. Please set it in the .env file.")
-client = Groq(api_key=GROQ_API_KEY)
-
-app = FastAPI()
+llm = GroqClient(api_key=GROQ_API_KEY)
+specialization_cache = SpecializationCache()
+summary_refresher = feedback_summary.SummaryRefresher(AsyncSessionLocal, llm)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is migrated once per deploy (python migrate.py), not by each worker
+    yield
+    await summary_refresher.aclose()
+    hashing_pool.shutdown()
+    await llm.aclose()
+    await async_engine.dispose()
+    await async_read_engine.dispose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 origins = [
     "http://localhost",
@@ -35,24 +59,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
+app.add_middleware(CompressionMiddleware)
+# Outermost, so request latency includes compression
+if metrics.METRICS_ENABLED:
+    metrics.instrument_engine(async_engine.sync_engine, "primary")
+    metrics.instrument_engine(async_read_engine.sync_engine, "read")
+    app.add_middleware(metrics.MetricsMiddleware)
 
 
 # User Registration
 @app.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if a user with the same username already exists
-    existing_user = db.query(models.User).filter(models.User.username == user.username).first()
+    existing_user = await db.scalar(select(models.User).where(models.User.username == user.username))
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already exists.")
 
     # Check if a user with the same email already exists
-    existing_email = db.query(models.User).filter(models.User.email == user.email).first()
+    existing_email = await db.scalar(select(models.User).where(models.User.email == user.email))
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already exists.")
 
     # Hash password and create user
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password_async(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -60,41 +91,35 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         role=user.role
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return db_user
 
 # Login and Token Generation
 @app.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(models.User).where(models.User.username == form_data.username))
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     
-    access_token = create_access_token(data={"sub": user.username}, expires_delta=timedelta(minutes=30))
+    access_token = create_user_access_token(user, expires_delta=timedelta(minutes=30))
     return {"access_token": access_token, "token_type": "bearer", "role": user.role}
 
 # Example protected route
 @app.get("/users/me", response_model=UserResponse)
-def read_users_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
-    
-    username = verify_token(token, credentials_exception)
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
-        raise credentials_exception
+async def read_users_me(user: models.User = Depends(get_current_user_record)):
     return user
 
 @app.post("/patient-profile", response_model=PatientResponse)
-def create_patient_profile(profile: PatientCreate, db: Session = Depends(get_db)):
+async def create_patient_profile(profile: PatientCreate, db: AsyncSession = Depends(get_db)):
     # Check if user exists
-    user = db.query(models.User).filter(models.User.id == profile.user_id).first()
+    user = await db.scalar(select(models.User).where(models.User.id == profile.user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Proceed only if the user exists
-    existing_profile = db.query(models.Patient).filter(models.Patient.user_id == profile.user_id).first()
+    existing_profile = await db.scalar(select(models.Patient).where(models.Patient.user_id == profile.user_id))
     if existing_profile:
         raise HTTPException(status_code=400, detail="Patient profile already exists for this user")
 
@@ -106,15 +131,15 @@ def create_patient_profile(profile: PatientCreate, db: Session = Depends(get_db)
         address=profile.address
     )
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
+    await db.commit()
+    await db.refresh(db_profile)
 
     return db_profile
 
 @app.post("/doctor-profile", response_model=DoctorResponse)
-def create_doctor_profile(profile: DoctorCreate, db: Session = Depends(get_db)):
+async def create_doctor_profile(profile: DoctorCreate, db: AsyncSession = Depends(get_db)):
     # Check if user exists
-    user = db.query(models.User).filter(models.User.id == profile.user_id).first()
+    user = await db.scalar(select(models.User).where(models.User.id == profile.user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -123,7 +148,7 @@ def create_doctor_profile(profile: DoctorCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Only users with role 'doctor' can create a doctor profile")
 
     # Check if a doctor profile already exists for the given user_id
-    existing_profile = db.query(models.Doctor).filter(models.Doctor.user_id == profile.user_id).first()
+    existing_profile = await db.scalar(select(models.Doctor).where(models.Doctor.user_id == profile.user_id))
     if existing_profile:
         raise HTTPException(status_code=400, detail="Doctor profile already exists for this user")
 
@@ -136,8 +161,8 @@ def create_doctor_profile(profile: DoctorCreate, db: Session = Depends(get_db)):
         address=profile.address
     )
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
+    await db.commit()
+    await db.refresh(db_profile)
 
     # Prepare the response including the username from the User model
     response_data = DoctorResponse(
@@ -153,148 +178,247 @@ def create_doctor_profile(profile: DoctorCreate, db: Session = Depends(get_db)):
     return response_data
 
 
-# Get All Doctors with User Information
+# Get All Doctors with User Information, served from the in-memory catalog
 @app.get("/doctors", response_model=list[DoctorResponse])
-def get_all_doctors(db: Session = Depends(get_db)):
-    doctors = db.query(models.Doctor).all()
-    response_data = []
-
-    for doctor in doctors:
-        response_data.append({
-            "id": doctor.id,
-            "user_id": doctor.user_id,
-            "specialization": doctor.specialization,
-            "experience": doctor.experience,
-            "qualification": doctor.qualification,
-            "address": doctor.address,
-            "username": doctor.user.username  # Fetch the related username from User table
-        })
-    
-    return response_data
+async def get_all_doctors(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    snapshot = await doctor_catalog.get(db)
+
+    # Repeat visits revalidate with If-None-Match and get a 304 while the catalog is unchanged
+    etag = snapshot.etag(limit, after_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    rows, next_cursor = paginate(snapshot.page(after_id, limit), limit, lambda doctor: (doctor["id"],))
+    # The next page cursor travels in a header so the body stays a plain list
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Catalog rows are already plain JSON-ready dicts, so skip response model validation
+    return FastJSONResponse(rows, headers=headers)
 
 @app.get("/doctors/{id}", response_model=DoctorResponse)
-def get_doctor_by_id(id: int, db: Session = Depends(get_db)):
-    doctor = db.query(models.Doctor).filter(models.Doctor.user_id == id).first()
+async def get_doctor_by_id(id: int, db: AsyncSession = Depends(get_read_db)):
+    snapshot = await doctor_catalog.get(db)
+    doctor = snapshot.by_user_id.get(id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
-    
-    response_data = {
-        "id": doctor.id,
-        "user_id": doctor.user_id,
-        "specialization": doctor.specialization,
-        "experience": doctor.experience,
-        "qualification": doctor.qualification,
-        "address": doctor.address,
-        "username": doctor.user.username  # Fetch the related username from User table
-    }
-    
-    return response_data
+
+    return doctor
 
 @app.post("/appointment", response_model=UserResponse)
-def appointment(appointment: AppointmentCreate, token: str = Depends(oauth2_scheme) , db: Session = Depends(get_db)):
-        
-    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
-    
-    username = verify_token(token, credentials_exception)
-    user = db.query(models.User).filter(models.User.username == username).first()    # Create user with role
-    db_appointment = models.Appointment(
+async def appointment(
+    appointment: AppointmentCreate,
+    current_user: CurrentUser = Depends(get_current_user),
+    user: models.User = Depends(get_current_user_record),
+    db: AsyncSession = Depends(get_db),
+):
+    doctor_id = await db.scalar(select(models.Doctor.user_id).where(models.Doctor.user_id == appointment.doctor_id))
+    if doctor_id is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+
+    appointment_id = await scheduling.book_slot(
+        db,
         doctor_id=appointment.doctor_id,
-        patient_id=user.id,
-        appointment_datetime = appointment.appointment_datetime,
-        reason = appointment.reason
-    )    
-    print(db_appointment)
-    db.add(db_appointment)
-    db.commit()
-    db.refresh(db_appointment)
-    
-    return user
+        patient_id=current_user.id,
+        start=appointment.appointment_datetime,
+        duration_minutes=appointment.duration_minutes or scheduling.APPOINTMENT_DURATION_MINUTES,
+        reason=appointment.reason,
+    )
+    if appointment_id is None:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=scheduling.SLOT_TAKEN)
+    await db.commit()
 
+    return user
 
-@app.get("/dashboard/appointments")
-def get_patient_appointments(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # Verify the token to get the current username
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials"
+@app.post("/appointments/batch", response_model=AppointmentBatchResponse)
+async def book_appointments_batch(batch: AppointmentBatchCreate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    # Validate every item up front with one doctor lookup and one query for the
+    # doctors' booked slots, then insert the valid ones in a single bulk
+    # statement and transaction
+    doctor_ids = {item.doctor_id for item in batch.appointments}
+    known_doctors = set((await db.scalars(
+        select(models.Doctor.user_id).where(models.Doctor.user_id.in_(doctor_ids))
+    )).all())
+
+    slots = [
+        (item.appointment_datetime, scheduling.end_of(item.appointment_datetime, item.duration_minutes or scheduling.APPOINTMENT_DURATION_MINUTES))
+        for item in batch.appointments
+    ]
+    await scheduling.lock_doctor_schedules(db, known_doctors)
+    schedules = await scheduling.load_schedules(
+        db, known_doctors, min(start for start, _ in slots), max(end for _, end in slots)
     )
-    username = verify_token(token, credentials_exception)
-
-    # Get the user from the database
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or user.role.value != "patient":
-        raise credentials_exception
-
-    # Fetch patient appointments
-    current_datetime = datetime.now()
-    appointments = db.query(models.Appointment).filter(models.Appointment.patient_id == user.id).all()
-
-    # Classify appointments into upcoming, past, and cancelled
-    upcoming_appointments = []
-    past_appointments = []
-    cancelled_appointments = []
-
-    for appointment in appointments:
-        print(appointment)
-        doctor = db.query(models.Doctor).filter(models.Doctor.user_id == appointment.doctor_id).first()
-        doctor_name = doctor.user.username if doctor else "Unknown"
-
-        if appointment.isCancelled:
-            cancelled_appointments.append({
-                "id": appointment.id,
-                "doctor_id": appointment.doctor_id,
-                "doctor_name": doctor_name,
-                "appointment_datetime": appointment.appointment_datetime,
-                "reason": appointment.reason,
-            })
-        elif appointment.appointment_datetime >= current_datetime and not appointment.isCompleted:
-            upcoming_appointments.append({
-                "id": appointment.id,
-                "doctor_id": appointment.doctor_id,
-                "doctor_name": doctor_name,
-                "appointment_datetime": appointment.appointment_datetime,
-                "reason": appointment.reason,
-            })
-        elif appointment.isCompleted:
-            past_appointments.append({
-                "id": appointment.id,
-                "doctor_id": appointment.doctor_id,
-                "doctor_name": doctor_name,
-                "appointment_datetime": appointment.appointment_datetime,
-                "reason": appointment.reason,
-                "isCompleted": appointment.isCompleted,
-                "feedback": appointment.feedback,
+
+    results = []
+    rows = []
+    for index, (item, (start, end)) in enumerate(zip(batch.appointments, slots)):
+        if item.doctor_id not in known_doctors:
+            results.append({"index": index, "error": "Doctor not found"})
+        elif not item.reason.strip():
+            results.append({"index": index, "error": "Reason is required"})
+        elif schedules[item.doctor_id].overlaps(start, end):
+            results.append({"index": index, "error": scheduling.SLOT_TAKEN})
+        else:
+            schedules[item.doctor_id].add(start, end)
+            results.append({"index": index})
+            rows.append({
+                "doctor_id": item.doctor_id,
+                "patient_id": current_user.id,
+                "appointment_datetime": start,
+                "duration_minutes": item.duration_minutes or scheduling.APPOINTMENT_DURATION_MINUTES,
+                "end_datetime": end,
+                "reason": item.reason,
+                "isCompleted": False,
+                "isCancelled": False,
             })
 
-    # Format the response
-    response_data = {
-        "upcoming": upcoming_appointments,
-        "past": past_appointments,
-        "cancelled": cancelled_appointments,
-    }
+    if rows:
+        ids = (await db.scalars(
+            insert(models.Appointment).returning(models.Appointment.id, sort_by_parameter_order=True),
+            rows,
+        )).all()
+        await db.commit()
+        created = iter(ids)
+        for result in results:
+            if "error" not in result:
+                result["id"] = next(created)
+
+    return {"created": len(rows), "results": results}
+
+# Earliest free slots across the doctors of a specialization, from their working
+# hours and booked appointments
+@app.get("/availability", response_model=List[AvailableSlot])
+async def get_availability(
+    specialization: str,
+    start_date: date,
+    end_date: Optional[date] = None,
+    duration_minutes: Optional[int] = Query(None, gt=0, le=scheduling.MAX_APPOINTMENT_MINUTES),
+    limit: int = Query(availability.DEFAULT_AVAILABILITY_LIMIT, ge=1, le=availability.MAX_AVAILABILITY_LIMIT),
+    per_doctor: int = Query(1, ge=1, le=availability.MAX_AVAILABILITY_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+):
+    end_date = end_date or start_date + timedelta(days=availability.MAX_AVAILABILITY_DAYS - 1)
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date")
+    if (end_date - start_date).days >= availability.MAX_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Search at most {availability.MAX_AVAILABILITY_DAYS} days at a time")
+
+    return await availability.earliest_slots(
+        db,
+        canonical_specialization(specialization),
+        start_date,
+        end_date,
+        duration_minutes or scheduling.APPOINTMENT_DURATION_MINUTES,
+        limit=limit,
+        per_doctor=per_doctor,
+    )
 
-    return response_data
+# Dashboard buckets: the condition selecting an appointment into each, and whether
+# it is paged newest first. Upcoming appointments run forward from now; finished
+# and cancelled ones start from the most recent.
+def dashboard_buckets(current_datetime: datetime, finished_bucket: str):
+    cancelled = func.coalesce(models.Appointment.isCancelled, False)
+    completed = func.coalesce(models.Appointment.isCompleted, False)
+    return {
+        "upcoming": (and_(~cancelled, ~completed, models.Appointment.appointment_datetime >= current_datetime), False),
+        finished_bucket: (and_(~cancelled, completed), True),
+        "cancelled": (cancelled, True),
+    }
 
+# One page per bucket in a single UNION ALL query: the first page of every bucket,
+# or with a cursor the next page of the bucket it was issued for. Returns the rows
+# and the next cursor of each bucket served.
+async def dashboard_pages(db: AsyncSession, query, buckets, limit: int, cursor: Optional[str]):
+    if cursor:
+        bucket, *position = decode_cursor(cursor, str, datetime, int)
+        if bucket not in buckets:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        requested = {bucket: position}
+    else:
+        requested = dict.fromkeys(buckets)
+
+    sort_columns = [models.Appointment.appointment_datetime, models.Appointment.id]
+    pages = []
+    for bucket, position in requested.items():
+        condition, newest_first = buckets[bucket]
+        page = query.add_columns(literal(bucket).label("bucket")).where(condition)
+        if position is not None:
+            page = page.where(after_cursor(sort_columns, position, descending=newest_first))
+        order = [column.desc() for column in sort_columns] if newest_first else sort_columns
+        pages.append(select(page.order_by(*order).limit(limit + 1).subquery()))
+    rows = (await db.execute(pages[0] if len(pages) == 1 else union_all(*pages))).all()
+
+    grouped = {bucket: [] for bucket in requested}
+    for row in rows:
+        grouped[row.bucket].append(row)
+    results = {}
+    next_cursors = {}
+    for bucket, bucket_rows in grouped.items():
+        # UNION ALL does not promise to keep each page's order
+        bucket_rows.sort(key=lambda row: (row.appointment_datetime, row.id), reverse=buckets[bucket][1])
+        results[bucket], next_cursors[bucket] = paginate(bucket_rows, limit, lambda row, bucket=bucket: (bucket, row.appointment_datetime, row.id))
+    return results, next_cursors
 
-@app.put("/appointments/{appointment_id}/cancel")
-def cancel_appointment(appointment_id: int, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # Verify the token to get the current username
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials"
+@app.get("/dashboard/appointments")
+async def get_patient_appointments(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user: CurrentUser = Depends(get_current_patient),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # Fetch a page of each bucket of the patient's appointments, together with
+    # the doctor's username, in a single query
+    query = (
+        select(
+            models.Appointment.id,
+            models.Appointment.doctor_id,
+            models.Appointment.appointment_datetime,
+            models.Appointment.reason,
+            models.Appointment.isCompleted,
+            models.Appointment.feedback,
+            models.User.username,
+        )
+        .outerjoin(models.Doctor, models.Doctor.user_id == models.Appointment.doctor_id)
+        .outerjoin(models.User, models.User.id == models.Doctor.user_id)
+        .where(models.Appointment.patient_id == user.id)
     )
-    username = verify_token(token, credentials_exception)
+    pages, next_cursors = await dashboard_pages(db, query, dashboard_buckets(datetime.now(), "past"), limit, cursor)
 
-    # Get the user from the database
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or user.role.value != "patient":
-        raise credentials_exception
+    # Format the response
+    response_data = {"next_cursors": next_cursors}
+    for bucket, rows in pages.items():
+        response_data[bucket] = []
+        for row in rows:
+            appointment_data = {
+                "id": row.id,
+                "doctor_id": row.doctor_id,
+                "doctor_name": row.username or "Unknown",
+                "appointment_datetime": row.appointment_datetime,
+                "reason": row.reason,
+            }
+            if bucket == "past":
+                appointment_data["isCompleted"] = row.isCompleted
+                appointment_data["feedback"] = row.feedback
+            response_data[bucket].append(appointment_data)
+
+    # Render directly, the dashboard can hold thousands of rows
+    return FastJSONResponse(response_data)
 
+
+@app.put("/appointments/{appointment_id}/cancel")
+async def cancel_appointment(appointment_id: int, user: CurrentUser = Depends(get_current_patient), db: AsyncSession = Depends(get_db)):
     # Get the appointment
-    appointment = db.query(models.Appointment).filter(
+    appointment = await db.scalar(select(models.Appointment).where(
         models.Appointment.id == appointment_id,
         models.Appointment.patient_id == user.id
-    ).first()
+    ))
 
     if not appointment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
@@ -304,29 +428,17 @@ def cancel_appointment(appointment_id: int, token: str = Depends(oauth2_scheme),
 
     # Mark the appointment as cancelled
     appointment.isCancelled = True
-    db.commit()
+    await db.commit()
 
     return {"message": "Appointment cancelled successfully"}
 
 @app.put("/appointments/{appointment_id}/feedback")
-def submit_feedback(appointment_id: int, request: FeedbackRequest, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # Verify the token to get the current username
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials"
-    )
-    username = verify_token(token, credentials_exception)
-    
-    # Get the user from the database
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or user.role.value != "patient":
-        raise credentials_exception
-
+async def submit_feedback(appointment_id: int, request: FeedbackRequest, user: CurrentUser = Depends(get_current_patient), db: AsyncSession = Depends(get_db)):
     # Get the appointment
-    appointment = db.query(models.Appointment).filter(
+    appointment = await db.scalar(select(models.Appointment).where(
         models.Appointment.id == appointment_id,
         models.Appointment.patient_id == user.id
-    ).first()
+    ))
 
     if not appointment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
@@ -336,80 +448,56 @@ def submit_feedback(appointment_id: int, request: FeedbackRequest, token: str =
 
     # Update the appointment feedback
     appointment.feedback = request.feedback
-    db.commit()
+    await db.commit()
+    summary_refresher.schedule(appointment.doctor_id)
 
     return {"message": "Feedback submitted successfully"}
 
-from sqlalchemy.orm import joinedload
-
 @app.get("/doctor/appointments")
-def get_doctor_appointments(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # Verify the token to get the current username
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials"
+async def get_doctor_appointments(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user: CurrentUser = Depends(get_current_doctor),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # Fetch a page of each bucket of the doctor's appointments, together with
+    # the patient's username, in a single query
+    query = (
+        select(
+            models.Appointment.id,
+            models.Appointment.appointment_datetime,
+            models.Appointment.reason,
+            models.Appointment.feedback,
+            models.User.username,
+        )
+        .outerjoin(models.Patient, models.Patient.user_id == models.Appointment.patient_id)
+        .outerjoin(models.User, models.User.id == models.Patient.user_id)
+        .where(models.Appointment.doctor_id == user.id)
     )
-    username = verify_token(token, credentials_exception)
-
-    # Get the user from the database
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or user.role.value != "doctor":
-        raise credentials_exception
-
-    # Fetch doctor appointments
-    current_datetime = datetime.now()
-    appointments = db.query(models.Appointment).filter(models.Appointment.doctor_id == user.id).all()
-
-    # Classify appointments into upcoming, past, and cancelled
-    upcoming_appointments = []
-    completed_appointments = []
-    cancelled_appointments = []
-
-    for appointment in appointments:
-        patient = db.query(models.Patient).filter(models.Patient.user_id == appointment.patient_id).first()
-        patient_name = patient.user.username if patient else "Unknown"
-
-        appointment_data = {
-            "id": appointment.id,
-            "patient_name": patient_name,
-            "appointment_datetime": appointment.appointment_datetime,
-            "reason": appointment.reason,
-            "feedback": appointment.feedback
-        }
-
-        if appointment.isCancelled:
-            cancelled_appointments.append(appointment_data)
-        elif appointment.isCompleted:
-            completed_appointments.append(appointment_data)
-        elif appointment.appointment_datetime >= current_datetime:
-            upcoming_appointments.append(appointment_data)
+    pages, next_cursors = await dashboard_pages(db, query, dashboard_buckets(datetime.now(), "completed"), limit, cursor)
 
     # Format the response
-    response_data = {
-        "upcoming": upcoming_appointments,
-        "completed": completed_appointments,
-        "cancelled": cancelled_appointments,
-    }
+    response_data = {"next_cursors": next_cursors}
+    for bucket, rows in pages.items():
+        response_data[bucket] = [
+            {
+                "id": row.id,
+                "patient_name": row.username or "Unknown",
+                "appointment_datetime": row.appointment_datetime,
+                "reason": row.reason,
+                "feedback": row.feedback
+            }
+            for row in rows
+        ]
 
-    return response_data
+    # Render directly, the dashboard can hold thousands of rows
+    return FastJSONResponse(response_data)
 
 
 @app.patch("/appointments/{appointment_id}/complete")
-def mark_appointment_as_completed(appointment_id: int, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # Verify the token to get the current username
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials"
-    )
-    username = verify_token(token, credentials_exception)
-
-    # Get the user from the database and ensure they are a doctor
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or user.role.value != "doctor":
-        raise credentials_exception
-
+async def mark_appointment_as_completed(appointment_id: int, user: CurrentUser = Depends(get_current_doctor), db: AsyncSession = Depends(get_db)):
     # Get the appointment
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
+    appointment = await db.scalar(select(models.Appointment).where(models.Appointment.id == appointment_id))
 
     if not appointment or appointment.doctor_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
@@ -419,26 +507,14 @@ def mark_appointment_as_completed(appointment_id: int, token: str = Depends(oaut
 
     # Mark the appointment as completed
     appointment.isCompleted = True
-    db.commit()
+    await db.commit()
 
     return {"message": "Appointment marked as completed successfully"}
 
 @app.patch("/appointments/{appointment_id}/cancel")
-def cancel_appointment_by_doctor(appointment_id: int, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # Verify the token to get the current username
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials"
-    )
-    username = verify_token(token, credentials_exception)
-
-    # Get the user from the database and ensure they are a doctor
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or user.role.value != "doctor":
-        raise credentials_exception
-
+async def cancel_appointment_by_doctor(appointment_id: int, user: CurrentUser = Depends(get_current_doctor), db: AsyncSession = Depends(get_db)):
     # Get the appointment
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
+    appointment = await db.scalar(select(models.Appointment).where(models.Appointment.id == appointment_id))
 
     if not appointment or appointment.doctor_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
@@ -448,12 +524,42 @@ def cancel_appointment_by_doctor(appointment_id: int, token: str = Depends(oauth
 
     # Mark the appointment as cancelled
     appointment.isCancelled = True
-    db.commit()
+    await db.commit()
 
     return {"message": "Appointment cancelled successfully"}
 
+# The doctor's weekly working hours; doctors without any work the default hours
+@app.get("/doctor/working-hours", response_model=WorkingHoursUpdate)
+async def get_working_hours(user: CurrentUser = Depends(get_current_doctor), db: AsyncSession = Depends(get_read_db)):
+    shifts = (await db.scalars(
+        select(models.DoctorWorkingHours)
+        .where(models.DoctorWorkingHours.doctor_id == user.id)
+        .order_by(models.DoctorWorkingHours.weekday, models.DoctorWorkingHours.start_time)
+    )).all()
+    if not shifts:
+        return {"shifts": [
+            {"weekday": weekday, "start_time": start, "end_time": end}
+            for weekday, day_shifts in sorted(availability.DEFAULT_TEMPLATE.items())
+            for start, end in day_shifts
+        ]}
+    return {"shifts": [{"weekday": shift.weekday, "start_time": shift.start_time, "end_time": shift.end_time} for shift in shifts]}
+
+# Replace the doctor's weekly working hours
+@app.put("/doctor/working-hours", response_model=WorkingHoursUpdate)
+async def set_working_hours(hours: WorkingHoursUpdate, user: CurrentUser = Depends(get_current_doctor), db: AsyncSession = Depends(get_db)):
+    if any(shift.end_time <= shift.start_time for shift in hours.shifts):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Shifts must end after they start")
+
+    await db.execute(delete(models.DoctorWorkingHours).where(models.DoctorWorkingHours.doctor_id == user.id))
+    db.add_all(
+        models.DoctorWorkingHours(doctor_id=user.id, weekday=shift.weekday, start_time=shift.start_time, end_time=shift.end_time)
+        for shift in hours.shifts
+    )
+    await db.commit()
+    return hours
+
 @app.post("/recommend-doctor")
-def recommend_doctor(input: RecommenderInput, db: Session = Depends(get_db)):
+async def recommend_doctor(input: RecommenderInput, db: AsyncSession = Depends(get_db)):
 
     # Prepare Groq API request
     system_prompt = {
@@ -464,18 +570,26 @@ def recommend_doctor(input: RecommenderInput, db: Session = Depends(get_db)):
     chat_history = [system_prompt, {"role": "user", "content": input.symptoms}]
 
     try:
-        # Get response from Groq API
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=chat_history,
-            max_tokens=10,  # Keeping max_tokens low since we need only one word
-            temperature=0.5
-        )
-
-        specialization = response.choices[0].message.content.strip()
+        # Repeat and near-identical symptoms are answered from the cache
+        specialization = await specialization_cache.get(db, input.symptoms)
+        if specialization is None:
+            # Get response from Groq API
+            response = await llm.complete(
+                chat_history,
+                timeout=RECOMMEND_TIMEOUT,
+                max_tokens=10,  # Keeping max_tokens low since we need only one word
+                temperature=0.5
+            )
+
+            specialization = response.choices[0].message.content.strip()
+            await specialization_cache.set(db, input.symptoms, specialization)
 
         # Query doctors based on the recommended specialization
-        doctors = db.query(models.Doctor).filter(models.Doctor.specialization.ilike(f"%{specialization}%")).all()
+        doctors = (await db.execute(
+            select(models.Doctor, models.User.username)
+            .join(models.User, models.User.id == models.Doctor.user_id)
+            .where(models.Doctor.specialization_key == canonical_specialization(specialization))
+        )).all()
 
         if not doctors:
             raise HTTPException(status_code=404, detail="No doctors found for the given specialization.")
@@ -485,35 +599,59 @@ def recommend_doctor(input: RecommenderInput, db: Session = Depends(get_db)):
             {
                 "id": doctor.id,
                 "user_id": doctor.user_id,
-                "username": doctor.user.username,
+                "username": username,
                 "specialization": doctor.specialization,
                 "experience": doctor.experience,
                 "address": doctor.address,
             }
-            for doctor in doctors
+            for doctor, username in doctors
         ]
 
         return {"doctors": doctors_list}
 
+    except LLMTimeoutError as e:
+        print(f"Groq API request timed out: {e}")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="AI recommendation timed out.")
     except Exception as e:
         print(f"Error in Groq API request: {e}")
         raise HTTPException(status_code=500, detail="Failed to get a recommendation from AI.")
     
+@app.get("/recommend-doctor/cache-stats")
+async def get_recommendation_cache_stats():
+    return specialization_cache.stats()
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/api/doctors/{doctor_id}/feedbacks", response_model=List[FeedbackResponse])
-def get_doctor_feedbacks(doctor_id: int, db: Session = Depends(get_db)):
+async def get_doctor_feedbacks(
+    doctor_id: int,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
     # Verify if the doctor exists in the database
-    doctor = db.query(models.Doctor).filter(models.Doctor.user_id == doctor_id).first()
+    doctor = await db.scalar(select(models.Doctor).where(models.Doctor.user_id == doctor_id))
     if not doctor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Doctor not found"
         )
 
-    # Fetch all appointments for the doctor that have feedback
-    appointments = db.query(models.Appointment).filter(
+    # Fetch a page of appointments for the doctor that have feedback
+    query = select(models.Appointment).where(
         models.Appointment.doctor_id == doctor_id,
         models.Appointment.feedback.isnot(None)
-    ).all()
+    )
+    if cursor:
+        query = query.where(after_cursor([models.Appointment.id], decode_cursor(cursor, int)))
+    appointments = (await db.scalars(query.order_by(models.Appointment.id).limit(limit + 1))).all()
+    appointments, next_cursor = paginate(appointments, limit, lambda appointment: (appointment.id,))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     # Extract feedbacks from appointments and format response
     feedbacks = [
@@ -527,34 +665,33 @@ def get_doctor_feedbacks(doctor_id: int, db: Session = Depends(get_db)):
     return feedbacks
 
 
-def format_assistant_reply(text):
-    # Breaking the response into parts and formatting
-    parts = text.split('*')
-    formatted_parts = ["<strong>Assistant:</strong> " + parts[0].strip()]  # Adding bold to the assistant label
-    for part in parts[1:]:
-        formatted_parts.append("• " + part.strip())  # Adding bullet points to each item
+# Requests carrying a message continue a server-held session (a new one without a
+# session_id); requests with only chatHistory stay stateless
+async def open_assistant_turn(input: SymptomsInput, db: AsyncSession):
+    if input.message is None:
+        return None
+    session = await assistant_sessions.open_session(db, input.session_id)
+    await assistant_sessions.add_message(db, session.id, "user", input.message)
+    return session
 
-    formatted_text = "<br>".join(formatted_parts)  # Joining parts with line breaks for HTML
-    return formatted_text
+# Messages to send for the turn, token-budgeted for sessions
+async def assistant_prompt(input: SymptomsInput, session, db: AsyncSession):
+    if session is None:
+        return [ASSISTANT_SYSTEM_PROMPT] + input.chatHistory
+    return await assistant_sessions.build_prompt(db, llm, session, ASSISTANT_SYSTEM_PROMPT)
 
 
 @app.post("/virtual-assistant", response_model=VirtualAssistantResponse)
-def virtual_assistant(input: SymptomsInput, db: Session = Depends(get_db)):
-
-        # Define the system prompt for the AI to guide its behavior
-    system_prompt = {
-        "role": "system",
-        "content": "You are a medical assistant helping a patient prepare for their doctor's appointment. Based on the symptoms they provide, generate a concise list of questions they should ask their doctor and possible information they should prepare before the appointment. Keep responses short , brief and to the point. Ask one question at atime. Do not ask many questions"
-    }
-
-    chat_history = [system_prompt] + input.chatHistory
-
+async def virtual_assistant(input: SymptomsInput, db: AsyncSession = Depends(get_db)):
+    session = await open_assistant_turn(input, db)
 
     try:
-        # Pass the entire chat history to the model
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",  # Replace with an appropriate Groq model
-            messages=chat_history,  # Full chat history sent to the model
+        chat_history = await assistant_prompt(input, session, db)
+
+        # Pass the chat history to the model
+        response = await llm.complete(
+            chat_history,
+            timeout=ASSISTANT_TIMEOUT,
             max_tokens=150,
             temperature=0.7,
         )
@@ -562,70 +699,73 @@ def virtual_assistant(input: SymptomsInput, db: Session = Depends(get_db)):
         # Extract the assistant's reply
         assistant_reply = response.choices[0].message.content.strip()
         formatted_reply = format_assistant_reply(assistant_reply)  # Format the reply
+        if session is not None:
+            await assistant_sessions.add_message(db, session.id, "assistant", assistant_reply)
 
         # Split reply into suggestions (if there are multiple suggestions)
-        suggestions = assistant_reply.split("\n")
         suggestions = formatted_reply.split("<br>")  # Split formatted reply into multiple parts if necessary
 
-        return {"suggestions": suggestions}
+        return {"suggestions": suggestions, "session_id": session.id if session else None}
 
+    except LLMTimeoutError as e:
+        print(f"Groq API request timed out: {e}")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="AI response timed out")
     except Exception as e:
         print(f"Error communicating with Groq API: {e}")
         raise HTTPException(status_code=500, detail="Error generating response from AI")
-    
-@app.get("/doctor/feedback-summary", response_model=FeedbackSummaryResponse)
-def get_feedback_summary(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # Verify the token and get the doctor's information
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials"
-    )
-    try:
-        username = verify_token(token, credentials_exception)
-    except HTTPException:
-        raise credentials_exception
 
-    # Fetch the user information and ensure it is a doctor
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or user.role.value != "doctor":
-        raise credentials_exception
-
-    # Now retrieve feedback for this doctor
+@app.post("/virtual-assistant/stream")
+async def virtual_assistant_stream(input: SymptomsInput, db: AsyncSession = Depends(get_db)):
+    # Same conversation as /virtual-assistant, forwarded as server-sent events while the
+    # model generates: "delta" events carry formatted HTML to append, a final "done"
+    # event carries the suggestions list (and session id) the non-streaming endpoint returns
+    session = await open_assistant_turn(input, db)
     try:
-        doctor_id = user.id
-
-        # Get all feedbacks for the given doctor ID
-        appointments = db.query(models.Appointment).filter(
-            models.Appointment.doctor_id == doctor_id,
-            models.Appointment.feedback.isnot(None)
-        ).all()
-
-        # Extract feedbacks from appointments
-        feedbacks = [appointment.feedback for appointment in appointments if appointment.feedback]
-
-        if not feedbacks:
-            return {"summary": "No feedbacks available."}
-
-        # Create a prompt for Groq API to generate the summary
-        prompt = f"Summarize the following patient feedbacks into short phrases that can be directly displayed under 'Feedback Insights' on a website. Do not include any introductory phrases, headers, or follow-up questions, and avoid phrases like 'Here is a summary'. Only provide the key feedback points. This summary is intended for doctor to improve his service. So the response should be addressed to a doctor.Remember not to include any introductory phrases, headers, or follow-up questions.Feedbacks: {feedbacks}"
-
-        # Call Groq API to generate the summary
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",  # Adjust as needed
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=150,
-            temperature=0.7,
-        )
-
-        # Extract the generated summary
-        summary = response.choices[0].message.content.strip()
-
-        return {"summary": summary}
-
-    except Exception as e:
-        print(f"Error generating feedback summary: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error generating feedback summary")
-
-
-
+        chat_history = await assistant_prompt(input, session, db)
+    except LLMTimeoutError as e:
+        print(f"Groq API request timed out: {e}")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="AI response timed out")
+
+    async def events():
+        formatter = ReplyFormatter()
+        reply = ""
+        formatted_reply = ""
+        try:
+            async for text in llm.stream(chat_history, timeout=ASSISTANT_TIMEOUT, max_tokens=150, temperature=0.7):
+                reply += text
+                fragment = formatter.feed(text)
+                if fragment:
+                    formatted_reply += fragment
+                    yield sse_event({"text": fragment}, event="delta")
+            fragment = formatter.close()
+            if fragment:
+                formatted_reply += fragment
+                yield sse_event({"text": fragment}, event="delta")
+
+            # The request's session is closed once streaming starts, so store the reply with a new one
+            if session is not None:
+                async with AsyncSessionLocal() as stream_db:
+                    await assistant_sessions.add_message(stream_db, session.id, "assistant", reply.strip())
+            yield sse_event({"suggestions": formatted_reply.split(LINE_BREAK), "session_id": session.id if session else None}, event="done")
+
+        except LLMTimeoutError as e:
+            print(f"Groq API request timed out: {e}")
+            yield sse_event({"detail": "AI response timed out"}, event="error")
+        except Exception as e:
+            print(f"Error communicating with Groq API: {e}")
+            yield sse_event({"detail": "Error generating response from AI"}, event="error")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
+@app.get("/doctor/feedback-summary", response_model=FeedbackSummaryResponse)
+async def get_feedback_summary(user: CurrentUser = Depends(get_current_doctor), db: AsyncSession = Depends(get_db)):
+    # Serve the precomputed summary right away; the background refresher folds in new feedback
+    stored = await db.get(models.FeedbackSummary, user.id)
+    if not summary_refresher.is_pending(user.id) and await feedback_summary.is_stale(db, user.id):
+        summary_refresher.schedule(user.id)
+    refresh_pending = summary_refresher.is_pending(user.id)
+
+    if stored is None:
+        summary = feedback_summary.PENDING_FEEDBACK_SUMMARY if refresh_pending else feedback_summary.NO_FEEDBACK_SUMMARY
+        return {"summary": summary, "updated_at": None, "refresh_pending": refresh_pending}
+    return {"summary": stored.summary, "updated_at": stored.updated_at, "refresh_pending": refresh_pending}
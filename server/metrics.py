@@ -0,0 +1,225 @@
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+
+# Set to False to skip the request middleware and database instrumentation
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram buckets: seconds for latencies, statement counts for queries per request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Route label for requests no route matched, so unknown paths cannot grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic total per label combination."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_labels(self.labels, label_values)} {_number(value)}"
+
+
+class Histogram:
+    """Bucketed observations per label combination; buckets are cumulated when rendered."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Per-bucket counts with a final overflow bucket, then the sum
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((label_values, list(values)) for label_values, values in self._series.items())
+        for label_values, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                bucket = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labels, label_values, bucket)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {_number(values[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}"
+
+
+class Registry:
+    """The metrics exposed on /metrics."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name: str, documentation: str, labels=()):
+        metric = Counter(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency, response body included.", ("method", "route", "status")
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "Database statements executed per HTTP request.", ("route",), QUERY_COUNT_BUCKETS
+)
+http_request_db_duration = registry.histogram(
+    "http_request_db_duration_seconds", "Time spent in database statements per HTTP request.", ("route",)
+)
+db_queries = registry.counter("db_queries_total", "Database statements executed.", ("engine",))
+db_query_duration = registry.counter("db_query_duration_seconds_total", "Time spent in database statements.", ("engine",))
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds", "Groq call latency, retries included; streams until their last chunk.", ("operation", "outcome")
+)
+llm_retries = registry.counter("llm_retries_total", "Groq calls retried after a retryable error.")
+llm_tokens = registry.counter("llm_tokens_total", "Tokens reported by Groq.", ("type",))
+
+
+class RequestStats:
+    """Database work done on behalf of the current request."""
+
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+_request_stats = ContextVar("request_stats", default=None)
+
+# Count every statement the engine runs, and charge it to the current request.
+# AsyncSession runs statements in a greenlet that shares the request's context.
+def instrument_engine(engine, name: str):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query(connection, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish_query(connection, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        db_queries.inc(name)
+        db_query_duration.inc(name, amount=elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+
+    return engine
+
+# Record one Groq call and the token usage it reported
+def observe_llm_call(operation: str, seconds: float, outcome: str, usage=None):
+    llm_request_duration.observe(seconds, operation, outcome)
+    if usage is not None:
+        llm_tokens.inc("prompt", amount=getattr(usage, "prompt_tokens", None) or 0)
+        llm_tokens.inc("completion", amount=getattr(usage, "completion_tokens", None) or 0)
+
+
+class MetricsMiddleware:
+    """Per-route latency and database work of every HTTP request.
+
+    Requests are labelled with the matched route's path template rather than
+    the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            http_request_duration.observe(elapsed, scope["method"], route, str(status_code))
+            http_request_db_queries.observe(stats.queries, route)
+            http_request_db_duration.observe(stats.query_seconds, route)
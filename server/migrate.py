@@ -0,0 +1,48 @@
+import os
+import sys
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, func, inspect, select
+
+from database import DATABASE_URL
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+# Revision matching the schema that create_all produced before migrations existed
+BASELINE_REVISION = "0001"
+
+# PostgreSQL advisory lock held while upgrading, so instances started together
+# migrate one at a time and the later ones find the schema already current
+MIGRATION_LOCK_KEY = 7003
+
+
+def get_alembic_config(connection=None):
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+# Upgrade the database to the latest revision. Databases created by the old
+# create_all bootstrap have tables but no alembic_version, so they are stamped
+# at the baseline revision first and then upgraded in place. Deploys run this
+# once before starting the API workers.
+def upgrade_database(url: str = DATABASE_URL, revision: str = "head"):
+    engine = create_engine(url)
+    try:
+        with engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(select(func.pg_advisory_xact_lock(MIGRATION_LOCK_KEY)))
+            tables = inspect(connection).get_table_names()
+            config = get_alembic_config(connection)
+            if "users" in tables and "alembic_version" not in tables:
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, revision)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    upgrade_database(sys.argv[1] if len(sys.argv) > 1 else DATABASE_URL)
@@ -0,0 +1,36 @@
+"""Composite indexes for the appointment hot paths
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-11-04 00:00:01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Doctor dashboard and feedback lookups
+    op.create_index("ix_appointments_doctor_datetime", "appointments", ["doctor_id", "appointment_datetime"])
+    # Patient dashboard
+    op.create_index("ix_appointments_patient_datetime", "appointments", ["patient_id", "appointment_datetime"])
+    # Feedback listing and summaries only look at rows that carry feedback
+    op.create_index(
+        "ix_appointments_doctor_feedback",
+        "appointments",
+        ["doctor_id"],
+        sqlite_where=sa.text("feedback IS NOT NULL"),
+        postgresql_where=sa.text("feedback IS NOT NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_appointments_doctor_feedback", table_name="appointments")
+    op.drop_index("ix_appointments_patient_datetime", table_name="appointments")
+    op.drop_index("ix_appointments_doctor_datetime", table_name="appointments")
@@ -0,0 +1,33 @@
+"""Persistent symptom to specialization cache
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-11-05 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "specialization_cache",
+        sa.Column("symptoms_hash", sa.String(length=64), nullable=False),
+        sa.Column("symptoms", sa.String(), nullable=False),
+        sa.Column("specialization", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("symptoms_hash"),
+    )
+    op.create_index("ix_specialization_cache_last_used_at", "specialization_cache", ["last_used_at"])
+
+
+def downgrade():
+    op.drop_index("ix_specialization_cache_last_used_at", table_name="specialization_cache")
+    op.drop_table("specialization_cache")
@@ -0,0 +1,39 @@
+"""Canonical specialization key on doctors
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-11-06 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from specializations import canonical_specialization
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("doctors", sa.Column("specialization_key", sa.String(), nullable=True))
+
+    # Backfill existing doctors from the taxonomy, one UPDATE per distinct specialization
+    connection = op.get_bind()
+    doctors = sa.table("doctors", sa.column("specialization", sa.String), sa.column("specialization_key", sa.String))
+    for specialization in connection.execute(sa.select(doctors.c.specialization).distinct()).scalars().all():
+        connection.execute(
+            doctors.update().where(doctors.c.specialization == specialization).values(specialization_key=canonical_specialization(specialization))
+        )
+
+    with op.batch_alter_table("doctors") as batch_op:
+        batch_op.alter_column("specialization_key", existing_type=sa.String(), nullable=False)
+        batch_op.create_index("ix_doctors_specialization_key", ["specialization_key"])
+
+
+def downgrade():
+    with op.batch_alter_table("doctors") as batch_op:
+        batch_op.drop_index("ix_doctors_specialization_key")
+        batch_op.drop_column("specialization_key")
@@ -0,0 +1,43 @@
+"""Incremental feedback summaries
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-11-07 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("appointments", sa.Column("feedback_at", sa.DateTime(), nullable=True))
+
+    # Existing feedbacks have no write time; order them by appointment time
+    appointments = sa.table("appointments", sa.column("feedback", sa.String), sa.column("feedback_at", sa.DateTime), sa.column("appointment_datetime", sa.DateTime))
+    op.execute(
+        appointments.update().where(appointments.c.feedback.isnot(None)).values(feedback_at=appointments.c.appointment_datetime)
+    )
+
+    op.create_table(
+        "feedback_summaries",
+        sa.Column("doctor_id", sa.Integer(), nullable=False),
+        sa.Column("summary", sa.String(), nullable=False),
+        sa.Column("feedback_count", sa.Integer(), nullable=False),
+        sa.Column("watermark_at", sa.DateTime(), nullable=True),
+        sa.Column("watermark_id", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["doctor_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("doctor_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("feedback_summaries")
+    with op.batch_alter_table("appointments") as batch_op:
+        batch_op.drop_column("feedback_at")
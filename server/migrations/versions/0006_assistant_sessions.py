@@ -0,0 +1,47 @@
+"""Server-side virtual assistant sessions
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-11-08 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "assistant_sessions",
+        sa.Column("id", sa.String(length=64), nullable=False),
+        sa.Column("summary", sa.String(), nullable=True),
+        sa.Column("summarized_through", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_assistant_sessions_expires_at", "assistant_sessions", ["expires_at"])
+
+    op.create_table(
+        "assistant_messages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("session_id", sa.String(length=64), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("content", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["session_id"], ["assistant_sessions.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_assistant_messages_session_id", "assistant_messages", ["session_id", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_assistant_messages_session_id", table_name="assistant_messages")
+    op.drop_table("assistant_messages")
+    op.drop_index("ix_assistant_sessions_expires_at", table_name="assistant_sessions")
+    op.drop_table("assistant_sessions")
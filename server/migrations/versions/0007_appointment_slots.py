@@ -0,0 +1,51 @@
+"""Appointment durations and the doctor slot index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-11-10 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Existing appointments were booked as 30 minute slots
+LEGACY_DURATION_MINUTES = 30
+
+
+def upgrade():
+    op.add_column("appointments", sa.Column("duration_minutes", sa.Integer(), nullable=True))
+    op.add_column("appointments", sa.Column("end_datetime", sa.DateTime(), nullable=True))
+
+    # Backfill the end of every existing appointment in one statement
+    appointments = sa.table(
+        "appointments",
+        sa.column("appointment_datetime", sa.DateTime),
+        sa.column("duration_minutes", sa.Integer),
+        sa.column("end_datetime", sa.DateTime),
+    )
+    start = appointments.c.appointment_datetime
+    if op.get_bind().dialect.name == "postgresql":
+        end = start + sa.text(f"interval '{LEGACY_DURATION_MINUTES} minutes'")
+    else:
+        # datetime() drops the fractional seconds SQLAlchemy stores; keep them so the
+        # new values sort and compare like every other stored timestamp
+        end = sa.func.datetime(start, f"+{LEGACY_DURATION_MINUTES} minutes").concat(sa.func.substr(start, 20))
+    op.execute(appointments.update().values(duration_minutes=LEGACY_DURATION_MINUTES, end_datetime=end))
+
+    with op.batch_alter_table("appointments") as batch_op:
+        batch_op.alter_column("duration_minutes", existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column("end_datetime", existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index("ix_appointments_doctor_slot", ["doctor_id", "appointment_datetime", "end_datetime"])
+
+
+def downgrade():
+    with op.batch_alter_table("appointments") as batch_op:
+        batch_op.drop_index("ix_appointments_doctor_slot")
+        batch_op.drop_column("end_datetime")
+        batch_op.drop_column("duration_minutes")
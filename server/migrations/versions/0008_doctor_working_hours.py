@@ -0,0 +1,34 @@
+"""Doctor working-hours templates
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-11-11 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "doctor_working_hours",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("doctor_id", sa.Integer(), nullable=False),
+        sa.Column("weekday", sa.Integer(), nullable=False),
+        sa.Column("start_time", sa.Time(), nullable=False),
+        sa.Column("end_time", sa.Time(), nullable=False),
+        sa.ForeignKeyConstraint(["doctor_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_doctor_working_hours_doctor_weekday", "doctor_working_hours", ["doctor_id", "weekday"])
+
+
+def downgrade():
+    op.drop_index("ix_doctor_working_hours_doctor_weekday", table_name="doctor_working_hours")
+    op.drop_table("doctor_working_hours")
@@ -0,0 +1,48 @@
+"""Point appointment and prescription doctor/patient keys at users
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-11-12 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+# The columns store user ids, but 0001 declared them against the profile tables
+RETARGETED_COLUMNS = {
+    "appointments": {"doctor_id": "doctors", "patient_id": "patients"},
+    "prescriptions": {"doctor_id": "doctors", "patient_id": "patients"},
+}
+
+# SQLite reports its foreign keys without names; batch mode names them with this
+# convention so they can be dropped while the table is recreated
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _retarget(table: str, old_targets, new_targets):
+    foreign_keys = sa.inspect(op.get_bind()).get_foreign_keys(table)
+    with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+        for foreign_key in foreign_keys:
+            column = foreign_key["constrained_columns"][0]
+            if old_targets.get(column) != foreign_key["referred_table"]:
+                continue
+            name = foreign_key["name"] or f"fk_{table}_{column}_{foreign_key['referred_table']}"
+            batch_op.drop_constraint(name, type_="foreignkey")
+        for column, referred_table in new_targets.items():
+            batch_op.create_foreign_key(f"fk_{table}_{column}_{referred_table}", referred_table, [column], ["id"])
+
+
+def upgrade():
+    for table, columns in RETARGETED_COLUMNS.items():
+        _retarget(table, columns, {column: "users" for column in columns})
+
+
+def downgrade():
+    for table, columns in RETARGETED_COLUMNS.items():
+        _retarget(table, {column: "users" for column in columns}, columns)
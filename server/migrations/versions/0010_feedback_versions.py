@@ -0,0 +1,86 @@
+"""Track summarized feedback per appointment
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2024-11-13 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+appointments = sa.table(
+    "appointments",
+    sa.column("id", sa.Integer),
+    sa.column("doctor_id", sa.Integer),
+    sa.column("appointment_datetime", sa.DateTime),
+    sa.column("feedback", sa.String),
+    sa.column("feedback_at", sa.DateTime),
+    sa.column("feedback_version", sa.Integer),
+    sa.column("summarized_version", sa.Integer),
+)
+summaries = sa.table(
+    "feedback_summaries",
+    sa.column("doctor_id", sa.Integer),
+    sa.column("watermark_at", sa.DateTime),
+    sa.column("watermark_id", sa.Integer),
+)
+
+
+def upgrade():
+    op.add_column("appointments", sa.Column("feedback_version", sa.Integer(), nullable=True))
+    op.add_column("appointments", sa.Column("summarized_version", sa.Integer(), nullable=True))
+
+    # Every existing feedback is its first version, and is summarized if it sits
+    # at or before its doctor's watermark
+    has_feedback = appointments.c.feedback.isnot(None)
+    op.execute(appointments.update().values(feedback_version=sa.case((has_feedback, 1), else_=0)))
+    covered = sa.exists().where(
+        summaries.c.doctor_id == appointments.c.doctor_id,
+        sa.or_(
+            appointments.c.feedback_at < summaries.c.watermark_at,
+            sa.and_(appointments.c.feedback_at == summaries.c.watermark_at, appointments.c.id <= summaries.c.watermark_id),
+        ),
+    )
+    op.execute(appointments.update().where(has_feedback, covered).values(summarized_version=1))
+
+    with op.batch_alter_table("appointments") as batch_op:
+        batch_op.alter_column("feedback_version", existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column("feedback_at")
+    with op.batch_alter_table("feedback_summaries") as batch_op:
+        batch_op.drop_column("watermark_id")
+        batch_op.drop_column("watermark_at")
+
+
+def downgrade():
+    op.add_column("appointments", sa.Column("feedback_at", sa.DateTime(), nullable=True))
+    op.add_column("feedback_summaries", sa.Column("watermark_at", sa.DateTime(), nullable=True))
+    op.add_column("feedback_summaries", sa.Column("watermark_id", sa.Integer(), nullable=True))
+
+    # As in 0005, feedbacks are ordered by appointment time; the watermark is the
+    # newest one that was summarized
+    op.execute(
+        appointments.update().where(appointments.c.feedback.isnot(None)).values(feedback_at=appointments.c.appointment_datetime)
+    )
+    summarized = sa.and_(
+        appointments.c.doctor_id == summaries.c.doctor_id,
+        appointments.c.feedback.isnot(None),
+        appointments.c.summarized_version.isnot(None),
+    )
+    op.execute(summaries.update().values(
+        watermark_at=sa.select(sa.func.max(appointments.c.feedback_at)).where(summarized).scalar_subquery()
+    ))
+    op.execute(summaries.update().values(
+        watermark_id=sa.select(sa.func.max(appointments.c.id)).where(
+            summarized, appointments.c.feedback_at == summaries.c.watermark_at
+        ).scalar_subquery()
+    ))
+
+    with op.batch_alter_table("appointments") as batch_op:
+        batch_op.drop_column("summarized_version")
+        batch_op.drop_column("feedback_version")
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Enum as SQLEnum, ForeignKey , Boolean , DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Enum as SQLEnum, ForeignKey , Boolean , DateTime, Index, Time, inspect, text
+from sqlalchemy.orm import relationship, validates
 from database import Base
+from specializations import canonical_specialization
+from datetime import timedelta
 import enum
 
 # Enum for Role
@@ -34,8 +36,6 @@ class Patient(Base):
 
     # Relationship with User
     user = relationship("User", back_populates="patient_profile")
-    appointments = relationship("Appointment", back_populates="patient")
-    prescriptions = relationship("Prescription", back_populates="patient")
 
 
 
@@ -46,35 +46,76 @@ class Doctor(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), unique=True, nullable=False)
     specialization = Column(String, nullable=False)
+    # Canonical taxonomy key used for indexed specialization lookups
+    specialization_key = Column(String, nullable=False, index=True)
     qualification = Column(String, nullable=False)
     experience = Column(Integer, nullable=False)
     address = Column(String, nullable=False)
 
     # Relationship with User
     user = relationship("User", back_populates="doctor_profile")
-    appointments = relationship("Appointment", back_populates="doctor")
-    prescriptions = relationship("Prescription", back_populates="doctor")
 
+    @validates("specialization")
+    def _set_specialization_key(self, key, specialization):
+        self.specialization_key = canonical_specialization(specialization)
+        return specialization
 
 
+
+# Length of an appointment when none is given
+DEFAULT_APPOINTMENT_MINUTES = 30
+
+def _default_end_datetime(context):
+    params = context.get_current_parameters()
+    duration = params.get("duration_minutes") or DEFAULT_APPOINTMENT_MINUTES
+    return params["appointment_datetime"] + timedelta(minutes=duration)
+
 #Appointment Model
 class Appointment(Base):
     __tablename__ = "appointments"
 
     id = Column(Integer, primary_key=True, index=True)
-    doctor_id = Column(Integer, ForeignKey('doctors.id'), nullable=False)
-    patient_id = Column(Integer, ForeignKey('patients.id'), nullable=False)
+    # The doctor's and patient's user ids
+    doctor_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    patient_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     appointment_datetime = Column(DateTime, nullable=False)
+    duration_minutes = Column(Integer, nullable=False, default=DEFAULT_APPOINTMENT_MINUTES)
+    end_datetime = Column(DateTime, nullable=False, default=_default_end_datetime)
     isCompleted= Column(Boolean, default=False)
     isCancelled= Column(Boolean, default=False)
     feedback = Column(String, nullable=True)
+    # Bumped on every feedback write; the summary records the version it folded in
+    feedback_version = Column(Integer, nullable=False, default=0)
+    summarized_version = Column(Integer, nullable=True)
     reason = Column(String, nullable=False)
 
     # Relationships
-    doctor = relationship("Doctor", back_populates="appointments")
-    patient = relationship("Patient", back_populates="appointments")
+    doctor = relationship("User", foreign_keys=[doctor_id])
+    patient = relationship("User", foreign_keys=[patient_id])
     prescription = relationship("Prescription", back_populates="appointment", uselist=False)
 
+    @validates("feedback")
+    def _bump_feedback_version(self, key, feedback):
+        # Incremented in the UPDATE itself so concurrent writes cannot reuse a version
+        if inspect(self).has_identity:
+            self.feedback_version = Appointment.feedback_version + 1
+        else:
+            self.feedback_version = 1
+        return feedback
+
+    # Indexes for the dashboard, feedback, summary and slot overlap queries
+    __table_args__ = (
+        Index("ix_appointments_doctor_datetime", "doctor_id", "appointment_datetime"),
+        Index("ix_appointments_doctor_slot", "doctor_id", "appointment_datetime", "end_datetime"),
+        Index("ix_appointments_patient_datetime", "patient_id", "appointment_datetime"),
+        Index(
+            "ix_appointments_doctor_feedback",
+            "doctor_id",
+            sqlite_where=text("feedback IS NOT NULL"),
+            postgresql_where=text("feedback IS NOT NULL"),
+        ),
+    )
+
 
 # Prescription Model
 class Prescription(Base):
@@ -82,13 +123,79 @@ class Prescription(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     appointment_id = Column(Integer, ForeignKey('appointments.id'), nullable=False)
-    doctor_id = Column(Integer, ForeignKey('doctors.id'), nullable=False)
-    patient_id = Column(Integer, ForeignKey('patients.id'), nullable=False)
+    # The doctor's and patient's user ids, as on appointments
+    doctor_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    patient_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     complaints = Column(String, nullable=False)
     medicines = Column(String, nullable=False)
     notes = Column(String, nullable=True)
 
     # Relationships
     appointment = relationship("Appointment", back_populates="prescription")
-    doctor = relationship("Doctor", back_populates="prescriptions")
-    patient = relationship("Patient", back_populates="prescriptions")
\ No newline at end of file
+    doctor = relationship("User", foreign_keys=[doctor_id])
+    patient = relationship("User", foreign_keys=[patient_id])
+
+
+# Weekly working-hours template of a doctor, one row per shift; doctor_id is the doctor's user id
+class DoctorWorkingHours(Base):
+    __tablename__ = "doctor_working_hours"
+
+    id = Column(Integer, primary_key=True)
+    doctor_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    weekday = Column(Integer, nullable=False)  # Monday is 0
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+
+    __table_args__ = (
+        Index("ix_doctor_working_hours_doctor_weekday", "doctor_id", "weekday"),
+    )
+
+
+# Cached AI answers for /recommend-doctor, keyed on the normalized symptoms
+class SpecializationCacheEntry(Base):
+    __tablename__ = "specialization_cache"
+
+    symptoms_hash = Column(String(64), primary_key=True)
+    symptoms = Column(String, nullable=False)
+    specialization = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    last_used_at = Column(DateTime, nullable=False, index=True)
+
+
+# Per-doctor AI feedback summary and how many appointments' feedback it covers
+class FeedbackSummary(Base):
+    __tablename__ = "feedback_summaries"
+
+    doctor_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    summary = Column(String, nullable=False)
+    feedback_count = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+# Server-held virtual assistant conversation, with a rolling summary of its older turns
+class AssistantSession(Base):
+    __tablename__ = "assistant_sessions"
+
+    id = Column(String(64), primary_key=True)
+    summary = Column(String, nullable=True)
+    summarized_through = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    messages = relationship("AssistantMessage", back_populates="session")
+
+
+class AssistantMessage(Base):
+    __tablename__ = "assistant_messages"
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String(64), ForeignKey('assistant_sessions.id'), nullable=False)
+    role = Column(String, nullable=False)
+    content = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    session = relationship("AssistantSession", back_populates="messages")
+
+    __table_args__ = (
+        Index("ix_assistant_messages_session_id", "session_id", "id"),
+    )
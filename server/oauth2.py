@@ -2,12 +2,21 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import NamedTuple, Optional
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import os
+from cache import TTLCache
+from database import get_db
+import models
 
 SECRET_KEY = "secretkey"  
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # Create the access token
@@ -21,13 +30,93 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-# Verify the token (user retrieval omitted for brevity)
-def verify_token(token: str, credentials_exception):
+class TokenClaims(NamedTuple):
+    sub: str
+    uid: Optional[int] = None
+    role: Optional[models.RoleEnum] = None
+
+class CurrentUser(NamedTuple):
+    id: int
+    username: str
+    role: models.RoleEnum
+
+# Access token carrying the user's id and role so requests can be authorized without a lookup
+def create_user_access_token(user: models.User, expires_delta: Optional[timedelta] = None):
+    return create_access_token(
+        data={"sub": user.username, "uid": user.id, "role": user.role.value},
+        expires_delta=expires_delta,
+    )
+
+# Verify the token and return its claims
+def verify_token(token: str, credentials_exception) -> TokenClaims:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        return username
     except JWTError:
         raise credentials_exception
+
+    username = payload.get("sub")
+    if username is None:
+        raise credentials_exception
+    uid = payload.get("uid")
+    role = payload.get("role")
+    try:
+        return TokenClaims(
+            sub=username,
+            uid=int(uid) if uid is not None else None,
+            role=models.RoleEnum(role) if role is not None else None,
+        )
+    except (TypeError, ValueError):
+        raise credentials_exception
+
+# username -> CurrentUser for recently authenticated users
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+def invalidate_user(username: str):
+    user_cache.pop(username)
+
+@event.listens_for(models.User, "after_insert")
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.username)
+    # A rename changes the cache key, so drop the old username as well
+    for username in inspect(target).attrs.username.history.deleted or ():
+        invalidate_user(username)
+
+# Dependency resolving the bearer token to the authenticated user
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    claims = verify_token(token, credentials_exception)
+    if claims.uid is not None and claims.role is not None:
+        return CurrentUser(id=claims.uid, username=claims.sub, role=claims.role)
+
+    # Tokens issued before the uid/role claims existed need a (cached) lookup
+    username = claims.sub
+    current_user = user_cache.get(username)
+    if current_user is None:
+        row = (await db.execute(
+            select(models.User.id, models.User.role).where(models.User.username == username)
+        )).first()
+        if row is None:
+            raise credentials_exception
+        current_user = CurrentUser(id=row.id, username=username, role=row.role)
+        user_cache.set(username, current_user)
+    return current_user
+
+# Dependency loading the authenticated user's row, for handlers that return it
+async def get_current_user_record(current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    user = await db.get(models.User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    return user
+
+# Dependency factory that also checks the user's role
+def require_role(role: models.RoleEnum):
+    async def get_user_with_role(current_user: CurrentUser = Depends(get_current_user)):
+        if current_user.role != role:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+        return current_user
+    return get_user_with_role
+
+get_current_patient = require_role(models.RoleEnum.patient)
+get_current_doctor = require_role(models.RoleEnum.doctor)
@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Encode the sort key of the last row of a page into an opaque cursor
+def encode_cursor(*values):
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+# Decode a cursor back into its sort key values
+def decode_cursor(cursor: str, *types):
+    invalid_cursor = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise invalid_cursor
+        return [datetime.fromisoformat(value) if kind is datetime else kind(value) for kind, value in zip(types, payload)]
+    except (ValueError, TypeError):
+        raise invalid_cursor
+
+# Keyset condition selecting rows strictly after the cursor position, in
+# ascending order or, with descending, in descending order
+def after_cursor(columns, values, descending: bool = False):
+    conditions = []
+    for index, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [columns[i] == values[i] for i in range(index)]
+        conditions.append(and_(*equal_prefix, column < value if descending else column > value))
+    return or_(*conditions)
+
+# Split a limit + 1 result set into the page and the cursor of the next page
+def paginate(rows, limit: int, sort_key):
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(*sort_key(page[-1]))
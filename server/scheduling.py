@@ -0,0 +1,108 @@
+import bisect
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import Boolean, DateTime, Integer, String, and_, exists, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+
+# Length of an appointment booked without a duration
+APPOINTMENT_DURATION_MINUTES = int(os.getenv("APPOINTMENT_DURATION_MINUTES", str(models.DEFAULT_APPOINTMENT_MINUTES)))
+# Longest appointment that can be booked. Overlap checks only look this far back
+# from a slot's start, which keeps them to a short index range scan however much
+# history a doctor has, so it must not be lowered below existing durations.
+MAX_APPOINTMENT_MINUTES = int(os.getenv("MAX_APPOINTMENT_MINUTES", "240"))
+
+# First key of the PostgreSQL advisory locks that serialize bookings per doctor
+SCHEDULE_LOCK_NAMESPACE = 7021
+
+SLOT_TAKEN = "Doctor is not available at this time"
+
+
+def end_of(start: datetime, duration_minutes: int):
+    return start + timedelta(minutes=duration_minutes)
+
+# Active appointments of the doctor that overlap [start, end). The lower bound on
+# the start time lets ix_appointments_doctor_slot answer it from a small range.
+def overlapping(doctor_id: int, start: datetime, end: datetime):
+    return and_(
+        models.Appointment.doctor_id == doctor_id,
+        models.Appointment.appointment_datetime > start - timedelta(minutes=MAX_APPOINTMENT_MINUTES),
+        models.Appointment.appointment_datetime < end,
+        models.Appointment.end_datetime > start,
+        func.coalesce(models.Appointment.isCancelled, False) == False,  # noqa: E712
+    )
+
+# Serialize bookings for the given doctors until the transaction ends, so the
+# availability checks and the insert see the same schedule. PostgreSQL takes an
+# advisory lock per doctor, in id order so batches cannot deadlock. SQLite's
+# driver only opens a transaction at the first write, so reads before it could
+# see a schedule another writer is about to change; BEGIN IMMEDIATE takes the
+# database's write lock before anything is read.
+async def lock_doctor_schedules(db: AsyncSession, doctor_ids):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        # Already writing in this transaction means the write lock is held
+        if not raw_connection.driver_connection.in_transaction:
+            await connection.exec_driver_sql("BEGIN IMMEDIATE")
+    elif dialect == "postgresql":
+        for doctor_id in sorted(set(doctor_ids)):
+            await db.execute(select(func.pg_advisory_xact_lock(SCHEDULE_LOCK_NAMESPACE, doctor_id)))
+
+# Insert the appointment only if the doctor is free for the whole slot, in one
+# statement. Returns the new appointment id, or None when the slot is taken.
+async def book_slot(db: AsyncSession, doctor_id: int, patient_id: int, start: datetime, duration_minutes: int, reason: str):
+    end = end_of(start, duration_minutes)
+    await lock_doctor_schedules(db, [doctor_id])
+    values = select(
+        literal(doctor_id, Integer),
+        literal(patient_id, Integer),
+        literal(start, DateTime),
+        literal(duration_minutes, Integer),
+        literal(end, DateTime),
+        literal(reason, String),
+        literal(False, Boolean),
+        literal(False, Boolean),
+    ).where(~exists().where(overlapping(doctor_id, start, end)))
+    statement = insert(models.Appointment).from_select(
+        ["doctor_id", "patient_id", "appointment_datetime", "duration_minutes", "end_datetime", "reason", "isCompleted", "isCancelled"],
+        values,
+    ).returning(models.Appointment.id)
+    return await db.scalar(statement)
+
+
+class DoctorSchedule:
+    """Booked slots of one doctor, sorted by start, for checking many slots at once."""
+
+    def __init__(self, slots=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(slots):
+            self.add(start, end)
+
+    def overlaps(self, start: datetime, end: datetime):
+        first = bisect.bisect_right(self.starts, start - timedelta(minutes=MAX_APPOINTMENT_MINUTES))
+        last = bisect.bisect_left(self.starts, end)
+        return any(self.ends[i] > start for i in range(first, last))
+
+    def add(self, start: datetime, end: datetime):
+        index = bisect.bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+
+# Schedules of the given doctors, holding their active appointments that could
+# overlap anything in [start, end)
+async def load_schedules(db: AsyncSession, doctor_ids, start: datetime, end: datetime):
+    schedules = {doctor_id: DoctorSchedule() for doctor_id in doctor_ids}
+    rows = await db.execute(
+        select(models.Appointment.doctor_id, models.Appointment.appointment_datetime, models.Appointment.end_datetime).where(
+            models.Appointment.doctor_id.in_(list(schedules)),
+            models.Appointment.appointment_datetime > start - timedelta(minutes=MAX_APPOINTMENT_MINUTES),
+            models.Appointment.appointment_datetime < end,
+            func.coalesce(models.Appointment.isCancelled, False) == False,  # noqa: E712
+        ).order_by(models.Appointment.doctor_id, models.Appointment.appointment_datetime)
+    )
+    for doctor_id, slot_start, slot_end in rows:
+        schedules[doctor_id].add(slot_start, slot_end)
+    return schedules
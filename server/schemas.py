@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from enum import Enum
-from datetime import datetime
-from typing import List
+from datetime import datetime, time
+from typing import List, Optional
+from scheduling import MAX_APPOINTMENT_MINUTES
 
 # Define Role Enum for Pydantic Models
 class RoleEnum(str, Enum):
@@ -68,6 +69,40 @@ class AppointmentCreate(BaseModel):
     doctor_id: int
     appointment_datetime: datetime
     reason: str
+    # Defaults to APPOINTMENT_DURATION_MINUTES
+    duration_minutes: Optional[int] = Field(default=None, gt=0, le=MAX_APPOINTMENT_MINUTES)
+
+# Most appointments accepted by one batch booking request
+APPOINTMENT_BATCH_LIMIT = 1000
+
+class AppointmentBatchCreate(BaseModel):
+    appointments: List[AppointmentCreate] = Field(min_length=1, max_length=APPOINTMENT_BATCH_LIMIT)
+
+# Outcome of one batch item, in request order: the new appointment id or why it was rejected
+class AppointmentBatchResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class AppointmentBatchResponse(BaseModel):
+    created: int
+    results: List[AppointmentBatchResult]
+
+# One shift of a doctor's weekly working hours; Monday is weekday 0
+class WorkingHoursShift(BaseModel):
+    weekday: int = Field(ge=0, le=6)
+    start_time: time
+    end_time: time
+
+class WorkingHoursUpdate(BaseModel):
+    # No rows means the default template, so an empty week cannot be stored
+    shifts: List[WorkingHoursShift] = Field(min_length=1)
+
+class AvailableSlot(BaseModel):
+    doctor_id: int
+    username: str
+    start: datetime
+    end: datetime
 
 class AppointmentResponse(BaseModel):
     id: int
@@ -100,11 +135,17 @@ class ChatMessage(BaseModel):
     role: str
     content: str
 
+# Either the whole chatHistory, or just the new message of a server-held session
 class SymptomsInput(BaseModel):
-    chatHistory: List[ChatMessage]
+    chatHistory: List[ChatMessage] = []
+    session_id: Optional[str] = None
+    message: Optional[str] = None
 
 class VirtualAssistantResponse(BaseModel):
     suggestions: List[str]
+    session_id: Optional[str] = None
 
 class FeedbackSummaryResponse(BaseModel):
-    summary: str
\ No newline at end of file
+    summary: str
+    updated_at: Optional[datetime] = None
+    refresh_pending: bool = False
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from cache import TTLCache
+from specializations import normalize_text
+import models
+
+SPECIALIZATION_CACHE_SIZE = int(os.getenv("SPECIALIZATION_CACHE_SIZE", "10000"))
+SPECIALIZATION_CACHE_TTL = float(os.getenv("SPECIALIZATION_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Near-identical symptom texts share a key
+def normalize_symptoms(symptoms: str):
+    return normalize_text(symptoms)
+
+
+class SpecializationCache:
+    """Symptoms -> specialization cache: in-memory LRU in front of a table in the local DB."""
+
+    def __init__(self, maxsize: int = SPECIALIZATION_CACHE_SIZE, ttl: float = SPECIALIZATION_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def key_for(symptoms: str):
+        normalized = normalize_symptoms(symptoms)
+        return hashlib.sha256(normalized.encode()).hexdigest(), normalized
+
+    async def get(self, db: AsyncSession, symptoms: str) -> Optional[str]:
+        key, _ = self.key_for(symptoms)
+
+        # Memory entries carry the persisted expiry so they never outlive the row
+        entry = self.memory.get(key)
+        if entry is not None and entry[1] > time.time():
+            self.hits += 1
+            return entry[0]
+
+        now = datetime.utcnow()
+        row = await db.get(models.SpecializationCacheEntry, key)
+        if row is None or row.created_at + timedelta(seconds=self.ttl) <= now:
+            self.misses += 1
+            return None
+
+        row.last_used_at = now
+        await db.commit()
+        expires_at = time.time() + (row.created_at + timedelta(seconds=self.ttl) - now).total_seconds()
+        self.memory.set(key, (row.specialization, expires_at))
+        self.hits += 1
+        return row.specialization
+
+    async def set(self, db: AsyncSession, symptoms: str, specialization: str):
+        key, normalized = self.key_for(symptoms)
+        now = datetime.utcnow()
+        await db.merge(models.SpecializationCacheEntry(
+            symptoms_hash=key,
+            symptoms=normalized,
+            specialization=specialization,
+            created_at=now,
+            last_used_at=now,
+        ))
+        await db.flush()
+
+        # Evict the least recently used rows beyond the size limit
+        stale = (
+            select(models.SpecializationCacheEntry.symptoms_hash)
+            .order_by(models.SpecializationCacheEntry.last_used_at.desc())
+            .offset(self.maxsize)
+        )
+        await db.execute(delete(models.SpecializationCacheEntry).where(models.SpecializationCacheEntry.symptoms_hash.in_(stale)))
+        await db.commit()
+        self.memory.set(key, (specialization, time.time() + self.ttl))
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries_in_memory": len(self.memory)}
+
+    def clear_memory(self):
+        self.memory.clear()
@@ -0,0 +1,55 @@
+import re
+
+# Canonical specialization keys and the names patients, doctors and the AI use for them
+TAXONOMY = {
+    "allergy_immunology": ["allergist", "immunologist", "allergy specialist", "allergy and immunology"],
+    "cardiology": ["cardiologist", "heart specialist", "heart doctor", "cardiac specialist", "cardiovascular specialist"],
+    "dentistry": ["dentist", "dental surgeon", "dental specialist"],
+    "dermatology": ["dermatologist", "skin specialist", "skin doctor"],
+    "endocrinology": ["endocrinologist", "diabetologist", "hormone specialist", "diabetes specialist"],
+    "gastroenterology": ["gastroenterologist", "stomach specialist", "digestive specialist", "gi specialist"],
+    "general_practice": ["general practitioner", "gp", "family medicine", "family doctor", "family physician", "general physician", "physician"],
+    "gynecology": ["gynecologist", "gynaecologist", "gynaecology", "obstetrician", "obstetrics", "obgyn", "ob gyn", "obstetrics and gynecology", "women's health specialist", "ob/gyn"],
+    "hematology": ["hematologist", "haematologist", "haematology", "blood specialist"],
+    "internal_medicine": ["internist", "internal medicine specialist"],
+    "nephrology": ["nephrologist", "kidney specialist", "renal specialist"],
+    "neurology": ["neurologist", "brain specialist", "nerve specialist"],
+    "oncology": ["oncologist", "cancer specialist"],
+    "ophthalmology": ["ophthalmologist", "eye specialist", "eye doctor"],
+    "orthopedics": ["orthopedist", "orthopaedist", "orthopaedics", "orthopedic", "orthopaedic", "orthopedic surgeon", "orthopaedic surgeon", "bone specialist"],
+    "otolaryngology": ["otolaryngologist", "ent", "ent specialist", "ear nose and throat", "ear nose and throat specialist"],
+    "pediatrics": ["pediatrician", "paediatrician", "paediatrics", "child specialist", "children's doctor"],
+    "psychiatry": ["psychiatrist", "mental health specialist"],
+    "pulmonology": ["pulmonologist", "lung specialist", "chest specialist", "respiratory specialist"],
+    "rheumatology": ["rheumatologist", "joint specialist"],
+    "urology": ["urologist", "urinary specialist"],
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Fold case, punctuation and whitespace
+def normalize_text(text: str):
+    text = _PUNCTUATION.sub(" ", text.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+# Folded name or synonym -> canonical key
+_LOOKUP = {}
+for _key, _synonyms in TAXONOMY.items():
+    _LOOKUP[normalize_text(_key.replace("_", " "))] = _key
+    for _synonym in _synonyms:
+        _LOOKUP[normalize_text(_synonym)] = _key
+
+# Practitioner -> field suffix rules for names missing from the taxonomy
+_SUFFIX_RULES = [("ologist", "ology"), ("iatrist", "iatry"), ("iatrician", "iatrics")]
+
+# Map a free-text specialization to its canonical, indexable key
+def canonical_specialization(name: str):
+    folded = normalize_text(name)
+    if folded in _LOOKUP:
+        return _LOOKUP[folded]
+    for practitioner, field in _SUFFIX_RULES:
+        if folded.endswith(practitioner):
+            folded = folded[: -len(practitioner)] + field
+            break
+    return _LOOKUP.get(folded, folded.replace(" ", "_"))
@@ -0,0 +1,138 @@
+# tests/test_appointment_batch.py
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User, Doctor, Appointment
+from hashing import hash_password
+from datetime import datetime, timedelta
+from oauth2 import create_user_access_token
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+# Fixture creating a doctor with a profile and a patient
+@pytest.fixture(scope="function")
+def doctor_and_patient(db_session):
+    doctor_user = User(username="batch_doctor", email="batch_doctor@example.com", hashed_password=hash_password("password"), role="doctor")
+    patient_user = User(username="batch_patient", email="batch_patient@example.com", hashed_password=hash_password("password"), role="patient")
+    db_session.add_all([doctor_user, patient_user])
+    db_session.commit()
+    db_session.add(Doctor(user_id=doctor_user.id, specialization="Cardiology", experience=5, qualification="MD", address="1 Batch St"))
+    db_session.commit()
+    return {"doctor": doctor_user, "patient": patient_user}
+
+def book(client_with_db, patient, appointments):
+    return client_with_db.post(
+        "/appointments/batch",
+        json={"appointments": appointments},
+        headers={"Authorization": f"Bearer {create_user_access_token(patient)}"},
+    )
+
+def slot(doctor_id, hours, reason="Follow-up"):
+    return {"doctor_id": doctor_id, "appointment_datetime": (datetime(2030, 1, 1, 9) + timedelta(hours=hours)).isoformat(), "reason": reason}
+
+# Test cases
+def test_batch_creates_all_appointments(client_with_db, doctor_and_patient, db_session):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+
+    response = book(client_with_db, patient, [slot(doctor.id, hours) for hours in range(200)])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 200
+    assert [result["index"] for result in body["results"]] == list(range(200))
+    ids = [result["id"] for result in body["results"]]
+    stored = {appointment.id: appointment for appointment in db_session.query(Appointment).all()}
+    assert set(ids) == set(stored)
+    assert stored[ids[5]].appointment_datetime == datetime(2030, 1, 1, 14)
+    assert stored[ids[5]].patient_id == patient.id
+
+def test_batch_reports_per_item_errors(client_with_db, doctor_and_patient, db_session):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+
+    response = book(client_with_db, patient, [
+        slot(doctor.id, 1),
+        slot(99999, 2),
+        slot(doctor.id, 1),
+        slot(doctor.id, 3, reason="  "),
+        slot(doctor.id, 4),
+    ])
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert response.json()["created"] == 2
+    assert results[0]["id"] is not None and results[0]["error"] is None
+    assert results[1] == {"index": 1, "id": None, "error": "Doctor not found"}
+    assert results[2]["error"] == "Doctor is not available at this time"
+    assert results[3]["error"] == "Reason is required"
+    assert results[4]["id"] is not None
+    assert db_session.query(Appointment).count() == 2
+
+def test_batch_requires_authentication(client_with_db, doctor_and_patient):
+    response = client_with_db.post("/appointments/batch", json={"appointments": [slot(doctor_and_patient["doctor"].id, 1)]})
+
+    assert response.status_code == 401
+
+def test_empty_batch_is_rejected(client_with_db, doctor_and_patient):
+    assert book(client_with_db, doctor_and_patient["patient"], []).status_code == 422
+
+def test_concurrent_batches_cannot_double_book(client_with_db, doctor_and_patient, db_session):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+    headers = {"Authorization": f"Bearer {create_user_access_token(patient)}"}
+
+    async def race():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+            return await asyncio.gather(*(
+                async_client.post("/appointments/batch", json={"appointments": [slot(doctor.id, 1, reason=f"Batch {i}")]}, headers=headers)
+                for i in range(5)
+            ))
+
+    responses = asyncio.run(race())
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert sum(response.json()["created"] for response in responses) == 1
+    assert db_session.query(Appointment).count() == 1
@@ -3,7 +3,9 @@ import pytest
 from fastapi.testclient import TestClient
 from main import app
 from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import get_db, get_read_db, engine_options, to_async_url
 from models import User, Appointment
 from hashing import hash_password
 from datetime import datetime, timedelta
@@ -12,6 +14,11 @@ import uuid
 
 os.environ["TESTING"] = "True"
 
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 client = TestClient(app)
 
 @pytest.fixture(scope="function")
@@ -21,8 +28,8 @@ def db_session():
     from sqlalchemy.orm import sessionmaker
     from database import Base
 
-    DATABASE_URL = "sqlite:///./test.db"
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+    engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
     Base.metadata.create_all(bind=engine)
@@ -36,13 +43,12 @@ def db_session():
 
 @pytest.fixture(scope="function")
 def client_with_db(db_session):
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            db_session.close()
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     yield client
     app.dependency_overrides.clear()
 
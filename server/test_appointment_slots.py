@@ -0,0 +1,175 @@
+# tests/test_appointment_slots.py
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User, Doctor, Appointment
+from hashing import hash_password
+from datetime import datetime, timedelta
+from oauth2 import create_user_access_token
+from scheduling import DoctorSchedule, overlapping
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+START = datetime(2030, 1, 1, 9)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+# Fixture creating a doctor with a profile and a patient
+@pytest.fixture(scope="function")
+def doctor_and_patient(db_session):
+    doctor_user = User(username="slot_doctor", email="slot_doctor@example.com", hashed_password=hash_password("password"), role="doctor")
+    patient_user = User(username="slot_patient", email="slot_patient@example.com", hashed_password=hash_password("password"), role="patient")
+    db_session.add_all([doctor_user, patient_user])
+    db_session.commit()
+    db_session.add(Doctor(user_id=doctor_user.id, specialization="Cardiology", experience=5, qualification="MD", address="1 Slot St"))
+    db_session.commit()
+    return {"doctor": doctor_user, "patient": patient_user}
+
+def book(client_with_db, patient, doctor_id, minutes, duration=None):
+    payload = {"doctor_id": doctor_id, "appointment_datetime": (START + timedelta(minutes=minutes)).isoformat(), "reason": "Checkup"}
+    if duration is not None:
+        payload["duration_minutes"] = duration
+    return client_with_db.post("/appointment", json=payload, headers={"Authorization": f"Bearer {create_user_access_token(patient)}"})
+
+# Test cases
+def test_booking_stores_the_slot_end(client_with_db, doctor_and_patient, db_session):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+
+    assert book(client_with_db, patient, doctor.id, 0, duration=45).status_code == 200
+    assert book(client_with_db, patient, doctor.id, 60).status_code == 200
+
+    first, second = db_session.query(Appointment).order_by(Appointment.appointment_datetime).all()
+    assert (first.duration_minutes, first.end_datetime) == (45, START + timedelta(minutes=45))
+    assert (second.duration_minutes, second.end_datetime) == (30, START + timedelta(minutes=90))
+
+def test_overlapping_booking_is_rejected(client_with_db, doctor_and_patient, db_session):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+    assert book(client_with_db, patient, doctor.id, 0, duration=60).status_code == 200
+
+    response = book(client_with_db, patient, doctor.id, 45)
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Doctor is not available at this time"
+    assert book(client_with_db, patient, doctor.id, -15, duration=20).status_code == 409
+    assert db_session.query(Appointment).count() == 1
+
+def test_adjacent_and_cancelled_slots_are_free(client_with_db, doctor_and_patient, db_session):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+    assert book(client_with_db, patient, doctor.id, 0).status_code == 200
+    assert book(client_with_db, patient, doctor.id, 30).status_code == 200
+    assert book(client_with_db, patient, doctor.id, -30).status_code == 200
+
+    db_session.query(Appointment).filter(Appointment.appointment_datetime == START).update({"isCancelled": True})
+    db_session.commit()
+
+    assert book(client_with_db, patient, doctor.id, 0).status_code == 200
+
+def test_other_doctors_are_not_affected(client_with_db, doctor_and_patient, db_session):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+    other = User(username="other_doctor", email="other_doctor@example.com", hashed_password=hash_password("password"), role="doctor")
+    db_session.add(other)
+    db_session.commit()
+    db_session.add(Doctor(user_id=other.id, specialization="Dermatology", experience=3, qualification="MD", address="2 Slot St"))
+    db_session.commit()
+
+    assert book(client_with_db, patient, doctor.id, 0).status_code == 200
+    assert book(client_with_db, patient, other.id, 0).status_code == 200
+
+def test_unknown_doctor_is_not_found(client_with_db, doctor_and_patient, db_session):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+
+    response = book(client_with_db, patient, doctor.id + patient.id + 1, 0)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Doctor not found"
+
+    # A user without a doctor profile cannot be booked either
+    assert book(client_with_db, patient, patient.id, 0).status_code == 404
+    assert db_session.query(Appointment).count() == 0
+
+def test_duration_is_bounded(client_with_db, doctor_and_patient):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+
+    assert book(client_with_db, patient, doctor.id, 0, duration=0).status_code == 422
+    assert book(client_with_db, patient, doctor.id, 0, duration=24 * 60).status_code == 422
+
+def test_batch_checks_existing_appointments(client_with_db, doctor_and_patient):
+    doctor, patient = doctor_and_patient["doctor"], doctor_and_patient["patient"]
+    assert book(client_with_db, patient, doctor.id, 0, duration=60).status_code == 200
+
+    response = client_with_db.post(
+        "/appointments/batch",
+        json={"appointments": [
+            {"doctor_id": doctor.id, "appointment_datetime": (START + timedelta(minutes=30)).isoformat(), "reason": "Checkup"},
+            {"doctor_id": doctor.id, "appointment_datetime": (START + timedelta(minutes=60)).isoformat(), "reason": "Checkup", "duration_minutes": 90},
+            {"doctor_id": doctor.id, "appointment_datetime": (START + timedelta(minutes=120)).isoformat(), "reason": "Checkup"},
+        ]},
+        headers={"Authorization": f"Bearer {create_user_access_token(patient)}"},
+    )
+
+    results = response.json()["results"]
+    assert results[0]["error"] == "Doctor is not available at this time"
+    assert results[1]["id"] is not None
+    assert results[2]["error"] == "Doctor is not available at this time"
+
+def test_doctor_schedule_matches_interval_overlap():
+    slots = [(START + timedelta(minutes=m), START + timedelta(minutes=m + d)) for m, d in [(0, 30), (60, 120), (300, 15)]]
+    schedule = DoctorSchedule(slots)
+
+    for minutes in range(-150, 400, 5):
+        for duration in (5, 30, 90):
+            start, end = START + timedelta(minutes=minutes), START + timedelta(minutes=minutes + duration)
+            expected = any(start < slot_end and slot_start < end for slot_start, slot_end in slots)
+            assert schedule.overlaps(start, end) == expected
+
+def test_overlap_check_uses_the_slot_index(db_session):
+    if not DATABASE_URL.startswith("sqlite"):
+        pytest.skip("query plans are checked on SQLite")
+    query = select(Appointment.id).where(overlapping(1, START, START + timedelta(minutes=30)))
+
+    with engine.connect() as connection:
+        compiled = query.compile(connection, compile_kwargs={"literal_binds": True})
+        plan = " ".join(str(row[-1]) for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}"))
+
+    assert plan.startswith("SEARCH")
+    assert "ix_appointments_doctor_slot" in plan or "ix_appointments_doctor_datetime" in plan
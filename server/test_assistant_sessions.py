@@ -0,0 +1,145 @@
+# tests/test_assistant_sessions.py
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+import main
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import AssistantMessage, AssistantSession
+from llm import GroqClient
+import assistant_sessions
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+class FakeCompletions:
+    """Answers every call with a numbered reply and records the messages it was sent."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, messages, **kwargs):
+        self.calls.append([dict(message) if isinstance(message, dict) else message.dict() for message in messages])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"Reply {len(self.calls)}"))])
+
+@pytest.fixture(scope="function")
+def fake_llm(monkeypatch):
+    completions = FakeCompletions()
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(main, "llm", GroqClient(api_key="test", client=fake))
+    return completions
+
+def turn(client_with_db, message, session_id=None):
+    return client_with_db.post("/virtual-assistant", json={"session_id": session_id, "message": message})
+
+# Test cases
+def test_session_keeps_history_on_the_server(client_with_db, fake_llm):
+    first = turn(client_with_db, "I have a headache")
+    assert first.status_code == 200
+    session_id = first.json()["session_id"]
+    assert session_id
+
+    second = turn(client_with_db, "It started yesterday", session_id)
+
+    assert second.status_code == 200
+    assert second.json()["session_id"] == session_id
+    prompt = fake_llm.calls[-1]
+    assert [message["content"] for message in prompt[1:]] == ["I have a headache", "Reply 1", "It started yesterday"]
+    assert [message["role"] for message in prompt[1:]] == ["user", "assistant", "user"]
+
+def test_chat_history_requests_stay_stateless(client_with_db, fake_llm, db_session):
+    response = client_with_db.post("/virtual-assistant", json={"chatHistory": [{"role": "user", "content": "I have a headache"}]})
+
+    assert response.status_code == 200
+    assert response.json()["session_id"] is None
+    assert db_session.query(AssistantSession).count() == 0
+
+def test_unknown_session_is_404(client_with_db, fake_llm):
+    response = turn(client_with_db, "Hello", "missing-session")
+
+    assert response.status_code == 404
+    assert fake_llm.calls == []
+
+def test_expired_session_is_404(client_with_db, fake_llm, db_session):
+    session_id = turn(client_with_db, "I have a headache").json()["session_id"]
+    session = db_session.get(AssistantSession, session_id)
+    session.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db_session.commit()
+
+    assert turn(client_with_db, "Still there?", session_id).status_code == 404
+
+def test_long_conversation_is_compacted_under_budget(client_with_db, fake_llm, monkeypatch, db_session):
+    monkeypatch.setattr(assistant_sessions, "ASSISTANT_PROMPT_TOKEN_BUDGET", 400)
+    monkeypatch.setattr(assistant_sessions, "ASSISTANT_SUMMARY_TOKENS", 40)
+
+    session_id = None
+    for index in range(8):
+        response = turn(client_with_db, f"Symptom detail {index}: " + "x" * 300, session_id)
+        assert response.status_code == 200
+        session_id = response.json()["session_id"]
+
+    answer_prompts = [call for call in fake_llm.calls if call[0]["content"] == main.ASSISTANT_SYSTEM_PROMPT["content"]]
+    compaction_prompts = [call for call in fake_llm.calls if call not in answer_prompts]
+    assert compaction_prompts
+    assert "Symptom detail 0" in compaction_prompts[0][0]["content"]
+    for prompt in answer_prompts:
+        assert sum(assistant_sessions.estimate_tokens(message["content"]) for message in prompt) <= 400
+    # The newest message is always sent verbatim
+    assert answer_prompts[-1][-1]["content"].startswith("Symptom detail 7")
+    assert db_session.get(AssistantSession, session_id).summarized_through is not None
+
+def test_stream_stores_the_reply(client_with_db, fake_llm, monkeypatch, db_session):
+    async def stream(*args, **kwargs):
+        for text in ["Drink ", "water"]:
+            yield text
+    monkeypatch.setattr(main.llm, "stream", stream)
+    monkeypatch.setattr(main, "AsyncSessionLocal", AsyncTestingSessionLocal)
+
+    response = client_with_db.post("/virtual-assistant/stream", json={"message": "I feel dizzy"})
+
+    assert response.status_code == 200
+    assert '"session_id"' in response.text
+    contents = [message.content for message in db_session.query(AssistantMessage).order_by(AssistantMessage.id)]
+    assert contents == ["I feel dizzy", "Drink water"]
@@ -0,0 +1,101 @@
+# tests/test_assistant_stream.py
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+import main
+from assistant import ReplyFormatter, format_assistant_reply
+from llm import GroqClient, LLMTimeoutError
+
+client = TestClient(main.app)
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+class FakeStream:
+    """Async iterator over scripted chunks, sleeping ``delay`` seconds before each one."""
+
+    def __init__(self, texts, delay=0):
+        self.texts = list(texts)
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.texts:
+            raise StopAsyncIteration
+        await asyncio.sleep(self.delay)
+        return chunk(self.texts.pop(0))
+
+    async def close(self):
+        self.closed = True
+
+class FakeCompletions:
+    def __init__(self, stream):
+        self.stream = stream
+        self.kwargs = None
+
+    async def create(self, **kwargs):
+        self.kwargs = kwargs
+        return self.stream
+
+def fake_client(stream):
+    completions = FakeCompletions(stream)
+    return GroqClient(api_key="test", client=SimpleNamespace(chat=SimpleNamespace(completions=completions))), completions
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields.get("event"), json.loads(fields["data"])))
+    return events
+
+# Test cases
+@pytest.mark.parametrize("pieces", [
+    ["Bring ", "your reports. ", "*", " Ask about ", "diet *Ask about", " sleep  \n"],
+    ["  leading space", "*", "*", "   "],
+    [],
+])
+def test_formatter_matches_full_reply_formatting(pieces):
+    formatter = ReplyFormatter()
+    streamed = "".join(formatter.feed(piece) for piece in pieces) + formatter.close()
+
+    assert streamed == format_assistant_reply("".join(pieces).strip())
+
+def test_stream_endpoint_forwards_formatted_deltas(monkeypatch):
+    groq_client, completions = fake_client(FakeStream(["Keep a ", "symptom diary.", " *Note", " the times"]))
+    monkeypatch.setattr(main, "llm", groq_client)
+
+    response = client.post("/virtual-assistant/stream", json={"chatHistory": [{"role": "user", "content": "headache"}]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert completions.kwargs["stream"] is True
+    events = parse_events(response.text)
+    deltas = [data["text"] for event, data in events if event == "delta"]
+    assert len(deltas) > 1
+    assert events[-1] == ("done", {"suggestions": ["<strong>Assistant:</strong> Keep a symptom diary.", "• Note the times"], "session_id": None})
+    assert "".join(deltas) == "<br>".join(events[-1][1]["suggestions"])
+
+def test_stream_endpoint_reports_timeout(monkeypatch):
+    groq_client, _ = fake_client(FakeStream(["Keep a ", "symptom diary."], delay=5))
+    monkeypatch.setattr(main, "llm", groq_client)
+    monkeypatch.setattr(main, "ASSISTANT_TIMEOUT", 0.05)
+
+    response = client.post("/virtual-assistant/stream", json={"chatHistory": [{"role": "user", "content": "headache"}]})
+
+    assert parse_events(response.text)[-1] == ("error", {"detail": "AI response timed out"})
+
+def test_slow_stream_hits_budget_and_closes():
+    stream = FakeStream(["a", "b"], delay=5)
+    groq_client, _ = fake_client(stream)
+
+    async def consume():
+        return [text async for text in groq_client.stream([{"role": "user", "content": "hi"}], timeout=0.05, max_tokens=5, temperature=0)]
+
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(consume())
+    assert stream.closed
@@ -0,0 +1,144 @@
+# tests/test_availability.py
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User, Doctor, Appointment, DoctorWorkingHours
+from hashing import hash_password
+from datetime import date, datetime, time, timedelta
+from oauth2 import create_user_access_token
+from availability import merge_intervals, subtract_intervals
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# A Monday far enough ahead to be in the future
+MONDAY = date(2030, 1, 7)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+def add_doctor(db_session, name, specialization="Cardiology"):
+    user = User(username=name, email=f"{name}@example.com", hashed_password=hash_password("password"), role="doctor")
+    db_session.add(user)
+    db_session.commit()
+    db_session.add(Doctor(user_id=user.id, specialization=specialization, experience=5, qualification="MD", address="1 Clinic St"))
+    db_session.commit()
+    return user
+
+def book(db_session, doctor, start, minutes=30):
+    db_session.add(Appointment(doctor_id=doctor.id, patient_id=1, appointment_datetime=start, duration_minutes=minutes, end_datetime=start + timedelta(minutes=minutes), reason="Checkup"))
+    db_session.commit()
+
+def at(day, hour, minute=0):
+    return datetime.combine(day, time(hour, minute))
+
+def search(client_with_db, **params):
+    params.setdefault("specialization", "cardiologist")
+    params.setdefault("start_date", MONDAY.isoformat())
+    return client_with_db.get("/availability", params=params)
+
+# Test cases
+def test_earliest_slots_skip_booked_time(client_with_db, db_session):
+    doctor = add_doctor(db_session, "busy_doctor")
+    book(db_session, doctor, at(MONDAY, 9), minutes=60)
+    book(db_session, doctor, at(MONDAY, 10, 15))
+
+    response = search(client_with_db, per_doctor=3)
+
+    assert response.status_code == 200
+    assert [slot["start"] for slot in response.json()] == ["2030-01-07T10:45:00", "2030-01-07T11:00:00", "2030-01-07T11:15:00"]
+    assert response.json()[0]["end"] == "2030-01-07T11:15:00"
+    assert response.json()[0]["username"] == "busy_doctor"
+
+def test_slots_are_merged_across_doctors(client_with_db, db_session):
+    early = add_doctor(db_session, "early_doctor")
+    late = add_doctor(db_session, "late_doctor")
+    add_doctor(db_session, "skin_doctor", specialization="Dermatology")
+    book(db_session, late, at(MONDAY, 9), minutes=120)
+
+    response = search(client_with_db, limit=3)
+
+    assert [(slot["doctor_id"], slot["start"]) for slot in response.json()] == [
+        (early.id, "2030-01-07T09:00:00"),
+        (late.id, "2030-01-07T11:00:00"),
+    ]
+
+def test_working_hours_templates_are_used(client_with_db, db_session):
+    doctor = add_doctor(db_session, "weekend_doctor")
+    db_session.add(DoctorWorkingHours(doctor_id=doctor.id, weekday=5, start_time=time(14), end_time=time(16)))
+    db_session.commit()
+
+    response = search(client_with_db, duration_minutes=90, per_doctor=5)
+
+    assert [slot["start"] for slot in response.json()] == ["2030-01-12T14:00:00", "2030-01-12T14:15:00", "2030-01-12T14:30:00", "2030-01-19T14:00:00", "2030-01-19T14:15:00"]
+
+def test_doctor_sets_working_hours(client_with_db, db_session):
+    doctor = add_doctor(db_session, "scheduling_doctor")
+    headers = {"Authorization": f"Bearer {create_user_access_token(doctor)}"}
+
+    assert client_with_db.get("/doctor/working-hours", headers=headers).json()["shifts"][0] == {"weekday": 0, "start_time": "09:00:00", "end_time": "17:00:00"}
+
+    shifts = [{"weekday": 1, "start_time": "08:00:00", "end_time": "12:00:00"}]
+    assert client_with_db.put("/doctor/working-hours", json={"shifts": shifts}, headers=headers).status_code == 200
+    assert client_with_db.get("/doctor/working-hours", headers=headers).json()["shifts"] == shifts
+    assert search(client_with_db).json()[0]["start"] == "2030-01-08T08:00:00"
+
+    invalid = [{"weekday": 1, "start_time": "12:00:00", "end_time": "08:00:00"}]
+    assert client_with_db.put("/doctor/working-hours", json={"shifts": invalid}, headers=headers).status_code == 400
+
+def test_empty_working_hours_are_rejected(client_with_db, db_session):
+    doctor = add_doctor(db_session, "empty_week_doctor")
+    headers = {"Authorization": f"Bearer {create_user_access_token(doctor)}"}
+    shifts = [{"weekday": 2, "start_time": "10:00:00", "end_time": "14:00:00"}]
+    assert client_with_db.put("/doctor/working-hours", json={"shifts": shifts}, headers=headers).status_code == 200
+
+    assert client_with_db.put("/doctor/working-hours", json={"shifts": []}, headers=headers).status_code == 422
+    assert client_with_db.get("/doctor/working-hours", headers=headers).json()["shifts"] == shifts
+
+def test_date_range_is_validated(client_with_db, db_session):
+    assert search(client_with_db, end_date="2030-01-01").status_code == 400
+    assert search(client_with_db, end_date="2031-01-01").status_code == 400
+    assert search(client_with_db, specialization="Unknown").json() == []
+
+def test_interval_helpers():
+    assert merge_intervals([(1, 3), (2, 4), (4, 5), (7, 8)]) == [(1, 5), (7, 8)]
+    assert list(subtract_intervals([(0, 10), (20, 30)], [(2, 4), (6, 22), (29, 40)])) == [(0, 2), (4, 6), (22, 29)]
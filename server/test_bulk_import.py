@@ -0,0 +1,82 @@
+# tests/test_bulk_import.py
+import io
+import json
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database import Base
+from models import User, Doctor, Patient
+from hashing import hash_password, verify_password
+from bulk_import import BulkImporter, read_records
+
+CSV_HEADER = "username,email,password,role,specialization,experience,qualification,address,age,gender\n"
+
+# Fixture with an empty database holding one existing user
+@pytest.fixture(scope="function")
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(username="existing", email="existing@example.com", hashed_password=hash_password("password"), role="patient"))
+        db.commit()
+    yield engine
+    engine.dispose()
+
+def run_import(engine, text, format="csv", chunk_size=2):
+    rejects = io.StringIO()
+    counts = BulkImporter(engine, chunk_size=chunk_size, rejects=rejects).run(read_records(io.StringIO(text), format))
+    return counts, [json.loads(line) for line in rejects.getvalue().splitlines()]
+
+# Test cases
+def test_imports_users_with_profiles(engine):
+    counts, rejects = run_import(engine, CSV_HEADER + "\n".join([
+        "dr_ann,ann@example.com,secret1,doctor,Cardiologist,12,MD,1 Heart St,,",
+        "pat_bob,bob@example.com,secret2,patient,,,,2 Main St,34,male",
+        "plain_doctor,plain@example.com,secret3,doctor,,,,,,",
+    ]))
+
+    assert rejects == []
+    assert counts == {"read": 3, "imported": 3, "doctors": 1, "patients": 1, "rejected": 0}
+    with sessionmaker(bind=engine)() as db:
+        ann = db.query(User).filter_by(username="dr_ann").one()
+        assert verify_password("secret1", ann.hashed_password)
+        doctor = db.query(Doctor).filter_by(user_id=ann.id).one()
+        assert (doctor.specialization_key, doctor.experience) == ("cardiology", 12)
+        bob = db.query(User).filter_by(username="pat_bob").one()
+        assert db.query(Patient).filter_by(user_id=bob.id).one().age == 34
+        assert db.query(Doctor).count() == 1
+
+def test_rejects_are_reported_without_stopping(engine):
+    counts, rejects = run_import(engine, CSV_HEADER + "\n".join([
+        "good_one,good1@example.com,secret,patient,,,,1 A St,30,female",
+        "bad_email,not-an-email,secret,patient,,,,1 A St,30,female",
+        "existing,new@example.com,secret,patient,,,,1 A St,30,female",
+        "good_one,other@example.com,secret,patient,,,,1 A St,30,female",
+        "no_age,noage@example.com,secret,patient,,,,1 A St,,female",
+        "good_two,good2@example.com,secret,doctor,Dermatology,abc,MD,1 B St,,",
+        "good_three,good3@example.com,secret,doctor,Dermatology,3,MD,1 B St,,",
+    ]))
+
+    assert counts["read"] == 7
+    assert counts["imported"] == 2
+    assert counts["rejected"] == 5
+    by_line = {reject["line"]: reject for reject in rejects}
+    assert {line: reject["username"] for line, reject in by_line.items()} == {
+        3: "bad_email", 4: "existing", 5: "good_one", 6: "no_age", 7: "good_two",
+    }
+    assert by_line[4]["error"] == "Username already exists."
+    assert by_line[5]["error"] == "Duplicate username in input"
+    assert "age" in by_line[6]["error"]
+
+def test_ndjson_input(engine):
+    text = "\n".join([
+        json.dumps({"username": "json_pat", "email": "json@example.com", "password": "secret", "role": "patient", "age": 40, "gender": "male", "address": "3 C St"}),
+        "{not json",
+        "",
+        json.dumps(["not", "an", "object"]),
+    ])
+
+    counts, rejects = run_import(engine, text, format="ndjson")
+
+    assert (counts["imported"], counts["patients"], counts["rejected"]) == (1, 1, 2)
+    assert [reject["line"] for reject in rejects] == [2, 4]
@@ -0,0 +1,159 @@
+# tests/test_current_user.py
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User
+from hashing import hash_password
+from oauth2 import create_access_token, user_cache, verify_token
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+@pytest.fixture(scope="function")
+def patient(db_session):
+    user = User(username="cached_patient", email="cached_patient@example.com", hashed_password=hash_password("patientpassword"), role="patient")
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+# Helper function to get token for a user
+def get_token(username, password):
+    response = client.post("/token", data={"username": username, "password": password})
+    return response.json().get("access_token")
+
+def users_queries_during(request):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = request()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return response, len(statements)
+
+# Tokens issued before the uid and role claims were added
+def legacy_token(username):
+    return create_access_token(data={"sub": username})
+
+# Test cases
+def test_token_carries_id_and_role(client_with_db, patient):
+    token = get_token(patient.username, "patientpassword")
+
+    claims = verify_token(token, Exception("invalid"))
+
+    assert claims.sub == patient.username
+    assert claims.uid == patient.id
+    assert claims.role.value == "patient"
+
+def test_claims_skip_user_lookup(client_with_db, patient):
+    token = get_token(patient.username, "patientpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response, queries = users_queries_during(lambda: client_with_db.get("/dashboard/appointments", headers=headers))
+
+    assert response.status_code == 200
+    assert queries == 0
+
+def test_invalid_role_claim_is_rejected(client_with_db, patient):
+    token = create_access_token(data={"sub": patient.username, "uid": patient.id, "role": "admin"})
+
+    response = client_with_db.get("/dashboard/appointments", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 401
+
+def test_legacy_token_lookup_is_cached(client_with_db, patient):
+    headers = {"Authorization": f"Bearer {legacy_token(patient.username)}"}
+
+    first, first_queries = users_queries_during(lambda: client_with_db.get("/dashboard/appointments", headers=headers))
+    second, second_queries = users_queries_during(lambda: client_with_db.get("/dashboard/appointments", headers=headers))
+
+    assert first.status_code == second.status_code == 200
+    assert first_queries == 1
+    assert second_queries == 0
+
+def test_role_check(client_with_db, patient):
+    token = get_token(patient.username, "patientpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client_with_db.get("/dashboard/appointments", headers=headers).status_code == 200
+    assert client_with_db.get("/doctor/appointments", headers=headers).status_code == 401
+
+def test_user_change_invalidates_cache(client_with_db, patient, db_session):
+    client_with_db.get("/dashboard/appointments", headers={"Authorization": f"Bearer {legacy_token(patient.username)}"})
+    assert user_cache.get(patient.username) is not None
+
+    patient.email = "changed@example.com"
+    db_session.commit()
+
+    assert user_cache.get(patient.username) is None
+
+def test_deleted_user_with_legacy_token_is_rejected(client_with_db, patient, db_session):
+    headers = {"Authorization": f"Bearer {legacy_token(patient.username)}"}
+    client_with_db.get("/dashboard/appointments", headers=headers)
+
+    db_session.delete(patient)
+    db_session.commit()
+
+    assert client_with_db.get("/dashboard/appointments", headers=headers).status_code == 401
+
+def test_deleted_user_cannot_use_their_token(client_with_db, patient, db_session):
+    headers = {"Authorization": f"Bearer {get_token(patient.username, 'patientpassword')}"}
+    assert client_with_db.get("/users/me", headers=headers).status_code == 200
+
+    db_session.delete(patient)
+    db_session.commit()
+
+    assert client_with_db.get("/users/me", headers=headers).status_code == 401
+    response = client_with_db.post(
+        "/appointment",
+        json={"doctor_id": 1, "appointment_datetime": "2030-01-01T09:00:00", "reason": "Checkup"},
+        headers=headers,
+    )
+    assert response.status_code == 401
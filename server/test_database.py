@@ -0,0 +1,86 @@
+# tests/test_database.py
+import asyncio
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from database import SQLITE_PRAGMAS, apply_sqlite_pragmas, create_async_database_engine, engine_options, to_async_url
+
+def read_pragmas(connection):
+    return {
+        name: connection.execute(text(f"PRAGMA {name}")).scalar()
+        for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "foreign_keys")
+    }
+
+# Test cases
+def test_every_sync_connection_gets_the_profile(tmp_path):
+    engine = apply_sqlite_pragmas(create_engine(f"sqlite:///{tmp_path / 'sync.db'}"))
+    try:
+        with engine.connect() as connection:
+            pragmas = read_pragmas(connection)
+    finally:
+        engine.dispose()
+
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["synchronous"] == 1  # NORMAL
+    assert pragmas["busy_timeout"] == SQLITE_PRAGMAS["busy_timeout"]
+    assert pragmas["cache_size"] == SQLITE_PRAGMAS["cache_size"]
+    assert pragmas["foreign_keys"] == 1
+
+def test_async_connections_get_the_profile(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        apply_sqlite_pragmas(engine.sync_engine)
+        try:
+            async with engine.connect() as connection:
+                return await connection.run_sync(read_pragmas)
+        finally:
+            await engine.dispose()
+
+    pragmas = asyncio.run(run())
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["busy_timeout"] == SQLITE_PRAGMAS["busy_timeout"]
+
+def test_profile_overrides(tmp_path):
+    engine = apply_sqlite_pragmas(create_engine(f"sqlite:///{tmp_path / 'custom.db'}"), {"foreign_keys": "ON", "busy_timeout": 250})
+    try:
+        with engine.connect() as connection:
+            pragmas = read_pragmas(connection)
+    finally:
+        engine.dispose()
+
+    assert pragmas["foreign_keys"] == 1
+    assert pragmas["busy_timeout"] == 250
+
+def test_async_driver_urls():
+    assert to_async_url("sqlite:///./main.db") == "sqlite+aiosqlite:///./main.db"
+    assert to_async_url("postgresql://pms:secret@db:5432/pms") == "postgresql+asyncpg://pms:secret@db:5432/pms"
+    assert to_async_url("postgres://pms:secret@db/pms") == "postgresql+asyncpg://pms:secret@db/pms"
+    assert to_async_url("postgresql+psycopg2://db/pms") == "postgresql+asyncpg://db/pms"
+
+def test_server_databases_get_a_checked_recycled_pool():
+    options = engine_options("postgresql://db/pms")
+
+    assert options["pool_pre_ping"] is True
+    assert options["pool_recycle"] > 0
+    assert "connect_args" not in options
+
+def test_read_only_engine_refuses_writes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE notes (body TEXT)"))
+        connection.execute(text("INSERT INTO notes VALUES ('kept')"))
+    engine.dispose()
+
+    async def run(statement):
+        read_engine = create_async_database_engine(url, read_only=True)
+        try:
+            async with read_engine.begin() as connection:
+                return (await connection.execute(text(statement))).fetchall()
+        finally:
+            await read_engine.dispose()
+
+    assert asyncio.run(run("SELECT body FROM notes")) == [("kept",)]
+    with pytest.raises(OperationalError):
+        asyncio.run(run("INSERT INTO notes VALUES ('lost')"))
@@ -0,0 +1,125 @@
+# tests/test_doctor_catalog.py
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User, Doctor
+from doctor_catalog import doctor_catalog
+from hashing import hash_password
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+# Fixture creating two doctors with profiles
+@pytest.fixture(scope="function")
+def setup_doctors(db_session):
+    doctor_catalog.invalidate()
+    hashed_password = hash_password("password")
+    users = [
+        User(username=f"catalog_doctor_{i}", email=f"catalog_doctor_{i}@example.com", hashed_password=hashed_password, role="doctor")
+        for i in range(2)
+    ]
+    db_session.add_all(users)
+    db_session.commit()
+    db_session.add_all([
+        Doctor(user_id=user.id, specialization="Cardiology", experience=5, qualification="MD", address="1 Catalog St")
+        for user in users
+    ])
+    db_session.commit()
+    return users
+
+class ForbiddenSession:
+    """Stands in for the database session and fails on any use."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"database accessed: {name}")
+
+# Test cases
+def test_doctors_carry_a_strong_etag(client_with_db, setup_doctors):
+    response = client_with_db.get("/doctors")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["etag"].startswith('"')
+
+def test_revalidation_returns_304_without_the_database(client_with_db, setup_doctors):
+    etag = client_with_db.get("/doctors").headers["etag"]
+
+    async def forbidden_db():
+        yield ForbiddenSession()
+    app.dependency_overrides[get_read_db] = forbidden_db
+
+    response = client_with_db.get("/doctors", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    assert client_with_db.get(f"/doctors/{setup_doctors[0].id}").json()["username"] == "catalog_doctor_0"
+
+def test_new_doctor_profile_changes_the_etag(client_with_db, setup_doctors, db_session):
+    etag = client_with_db.get("/doctors").headers["etag"]
+
+    user = User(username="catalog_doctor_new", email="catalog_doctor_new@example.com", hashed_password=hash_password("password"), role="doctor")
+    db_session.add(user)
+    db_session.commit()
+    response = client_with_db.post("/doctor-profile", json={
+        "user_id": user.id,
+        "specialization": "Dermatology",
+        "experience": 3,
+        "qualification": "MBBS",
+        "address": "2 Catalog St",
+    })
+    assert response.status_code == 200
+
+    response = client_with_db.get("/doctors", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert [doctor["username"] for doctor in response.json()][-1] == "catalog_doctor_new"
+
+def test_pages_have_distinct_etags(client_with_db, setup_doctors):
+    first = client_with_db.get("/doctors", params={"limit": 1})
+    second = client_with_db.get("/doctors", params={"limit": 1, "cursor": first.headers["x-next-cursor"]})
+
+    assert first.headers["etag"] != second.headers["etag"]
+    assert second.json()[0]["username"] == "catalog_doctor_1"
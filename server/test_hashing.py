@@ -0,0 +1,32 @@
+# tests/test_hashing.py
+import asyncio
+import time
+from fastapi import HTTPException
+from hashing import HashingPool, hash_password, verify_password
+
+def slow_identity(value):
+    time.sleep(0.2)
+    return value
+
+def test_pool_hashes_and_verifies():
+    pool = HashingPool(workers=1, queue_size=1)
+    try:
+        hashed = asyncio.run(pool.run(hash_password, "secret"))
+        assert asyncio.run(pool.run(verify_password, "secret", hashed))
+        assert not asyncio.run(pool.run(verify_password, "wrong", hashed))
+    finally:
+        pool.shutdown()
+
+def test_pool_rejects_when_queue_is_full():
+    pool = HashingPool(workers=0, queue_size=1)
+
+    async def burst():
+        return await asyncio.gather(*(pool.run(slow_identity, i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(burst())
+
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 429
+    assert rejected[0].headers["Retry-After"] == "1"
+    assert pool.in_flight == 0
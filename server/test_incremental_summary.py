@@ -0,0 +1,222 @@
+# tests/test_incremental_summary.py
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+import main
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User, Doctor, Appointment, FeedbackSummary
+from hashing import hash_password
+from llm import GroqClient
+from feedback_summary import PENDING_FEEDBACK_SUMMARY, SummaryRefresher, refresh_feedback_summary
+from oauth2 import create_user_access_token
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+class FakeCompletions:
+    def __init__(self):
+        self.prompts = []
+
+    async def create(self, messages, **kwargs):
+        self.prompts.append(messages[0]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"Summary {len(self.prompts)}"))])
+
+# Fake Groq client recording the prompts it receives
+@pytest.fixture(scope="function")
+def fake_llm(monkeypatch):
+    completions = FakeCompletions()
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(main, "llm", GroqClient(api_key="test", client=fake))
+    return completions
+
+# A doctor with two completed appointments, one of them already reviewed
+@pytest.fixture(scope="function")
+def doctor_with_feedback(db_session):
+    doctor_user = User(username="summary_doctor", email="summary_doctor@example.com", hashed_password=hash_password("doctorpassword"), role="doctor")
+    patient_user = User(username="summary_patient", email="summary_patient@example.com", hashed_password=hash_password("patientpassword"), role="patient")
+    db_session.add_all([doctor_user, patient_user])
+    db_session.commit()
+    db_session.add(Doctor(user_id=doctor_user.id, specialization="Cardiology", experience=10, qualification="MD", address="1 Summary St"))
+    reviewed = Appointment(doctor_id=doctor_user.id, patient_id=patient_user.id, appointment_datetime=datetime.now() - timedelta(days=5), isCompleted=True, reason="Checkup", feedback="Very punctual")
+    pending = Appointment(doctor_id=doctor_user.id, patient_id=patient_user.id, appointment_datetime=datetime.now() - timedelta(days=1), isCompleted=True, reason="Follow-up")
+    db_session.add_all([reviewed, pending])
+    db_session.commit()
+    return {"doctor": doctor_user, "patient": patient_user, "pending": pending}
+
+def get_summary(client_with_db, doctor):
+    response = client_with_db.get("/doctor/feedback-summary", headers={"Authorization": f"Bearer {create_user_access_token(doctor)}"})
+    assert response.status_code == 200
+    return response.json()
+
+def refresh(doctor_id):
+    async def run():
+        async with AsyncTestingSessionLocal() as session:
+            await refresh_feedback_summary(session, main.llm, doctor_id)
+    asyncio.run(run())
+
+def add_feedback(db_session, appointment, feedback):
+    appointment = db_session.get(Appointment, appointment.id)
+    appointment.feedback = feedback
+    db_session.commit()
+
+# Record refresh requests instead of running them on the request's event loop
+@pytest.fixture(scope="function")
+def scheduled(monkeypatch):
+    doctor_ids = []
+    monkeypatch.setattr(main.summary_refresher, "schedule", doctor_ids.append)
+    monkeypatch.setattr(main.summary_refresher, "is_pending", lambda doctor_id: doctor_id in doctor_ids)
+    return doctor_ids
+
+# Test cases
+def test_summary_is_served_from_storage(client_with_db, doctor_with_feedback, fake_llm, scheduled, db_session):
+    doctor = doctor_with_feedback["doctor"]
+    refresh(doctor.id)
+
+    first = get_summary(client_with_db, doctor)
+    second = get_summary(client_with_db, doctor)
+
+    assert first == second
+    assert first["summary"] == "Summary 1"
+    assert first["refresh_pending"] is False
+    assert first["updated_at"] is not None
+    assert len(fake_llm.prompts) == 1
+    assert scheduled == []
+    stored = db_session.get(FeedbackSummary, doctor.id)
+    assert stored.feedback_count == 1
+
+def test_only_new_feedback_is_sent(doctor_with_feedback, fake_llm, db_session):
+    doctor = doctor_with_feedback["doctor"]
+    refresh(doctor.id)
+    add_feedback(db_session, doctor_with_feedback["pending"], "Explained the treatment clearly")
+    refresh(doctor.id)
+
+    merge_prompt = fake_llm.prompts[1]
+    assert "Summary 1" in merge_prompt
+    assert "Explained the treatment clearly" in merge_prompt
+    assert "Very punctual" not in merge_prompt
+
+def test_feedback_committed_late_is_folded(doctor_with_feedback, fake_llm, db_session):
+    doctor, patient = doctor_with_feedback["doctor"], doctor_with_feedback["patient"]
+    late = Appointment(doctor_id=doctor.id, patient_id=patient.id, appointment_datetime=datetime.now() - timedelta(days=2), isCompleted=True, reason="Checkup")
+    db_session.add(late)
+    db_session.commit()
+    refresh(doctor.id)
+
+    # Written first but committed after a refresh has covered a newer feedback
+    late_session = TestingSessionLocal()
+    late_session.get(Appointment, late.id).feedback = "Listened carefully"
+    add_feedback(db_session, doctor_with_feedback["pending"], "Explained the treatment clearly")
+    refresh(doctor.id)
+    late_session.commit()
+    late_session.close()
+    refresh(doctor.id)
+
+    assert len(fake_llm.prompts) == 3
+    assert "Listened carefully" in fake_llm.prompts[2]
+    assert "Explained the treatment clearly" not in fake_llm.prompts[2]
+    db_session.expire_all()
+    assert db_session.get(FeedbackSummary, doctor.id).feedback_count == 3
+
+def test_edited_feedback_is_folded_again_and_counted_once(doctor_with_feedback, fake_llm, db_session):
+    doctor = doctor_with_feedback["doctor"]
+    add_feedback(db_session, doctor_with_feedback["pending"], "Rushed")
+    refresh(doctor.id)
+    add_feedback(db_session, doctor_with_feedback["pending"], "Rushed, but answered every question")
+    refresh(doctor.id)
+
+    assert "Rushed, but answered every question" in fake_llm.prompts[1]
+    assert "Very punctual" not in fake_llm.prompts[1]
+    db_session.expire_all()
+    assert db_session.get(FeedbackSummary, doctor.id).feedback_count == 2
+
+def test_submit_feedback_schedules_refresh(client_with_db, doctor_with_feedback, fake_llm, scheduled):
+    doctor = doctor_with_feedback["doctor"]
+    patient_token = create_user_access_token(doctor_with_feedback["patient"])
+    response = client_with_db.put(
+        f"/appointments/{doctor_with_feedback['pending'].id}/feedback",
+        json={"feedback": "Explained the treatment clearly"},
+        headers={"Authorization": f"Bearer {patient_token}"},
+    )
+
+    assert response.status_code == 200
+    assert scheduled == [doctor.id]
+    assert fake_llm.prompts == []
+
+def test_stale_summary_is_served_while_refresh_is_pending(client_with_db, doctor_with_feedback, fake_llm, scheduled, db_session):
+    doctor = doctor_with_feedback["doctor"]
+    refresh(doctor.id)
+    add_feedback(db_session, doctor_with_feedback["pending"], "Explained the treatment clearly")
+
+    summary = get_summary(client_with_db, doctor)
+
+    assert summary["summary"] == "Summary 1"
+    assert summary["refresh_pending"] is True
+    assert scheduled == [doctor.id]
+    assert len(fake_llm.prompts) == 1
+
+def test_missing_summary_is_pending(client_with_db, doctor_with_feedback, fake_llm, scheduled):
+    summary = get_summary(client_with_db, doctor_with_feedback["doctor"])
+
+    assert summary["summary"] == PENDING_FEEDBACK_SUMMARY
+    assert summary["refresh_pending"] is True
+    assert summary["updated_at"] is None
+
+def test_refresher_debounces_per_doctor(doctor_with_feedback, fake_llm, db_session):
+    doctor = doctor_with_feedback["doctor"]
+    refresher = SummaryRefresher(AsyncTestingSessionLocal, main.llm, delay=0.01)
+
+    async def burst():
+        for _ in range(3):
+            refresher.schedule(doctor.id)
+        assert refresher.is_pending(doctor.id)
+        await refresher.drain()
+    asyncio.run(burst())
+
+    assert len(fake_llm.prompts) == 1
+    assert not refresher.is_pending(doctor.id)
+    db_session.expire_all()
+    assert db_session.get(FeedbackSummary, doctor.id).summary == "Summary 1"
@@ -0,0 +1,107 @@
+# tests/test_llm.py
+import asyncio
+import time
+from types import SimpleNamespace
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from groq import APIConnectionError
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+import llm
+import main
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from llm import GroqClient, LLMTimeoutError
+from specialization_cache import SpecializationCache
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engines
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+client = TestClient(main.app)
+
+# Override the default get_db function to use a clean test database
+@pytest.fixture(scope="function")
+def client_with_db():
+    Base.metadata.create_all(bind=engine)
+
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    main.app.dependency_overrides[get_db] = override_get_db
+    main.app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    main.app.dependency_overrides.clear()
+    Base.metadata.drop_all(bind=engine)
+
+class FakeCompletions:
+    """Plays back a scripted list of outcomes: exceptions, delays in seconds or results."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, (int, float)):
+            await asyncio.sleep(outcome)
+            return "late"
+        return outcome
+
+def fake_groq(outcomes):
+    completions = FakeCompletions(outcomes)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions)), completions
+
+def connection_error():
+    return APIConnectionError(request=httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions"))
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(llm, "GROQ_RETRY_BASE_DELAY", 0.001)
+
+def complete(groq_client, timeout=1.0):
+    return asyncio.run(groq_client.complete([{"role": "user", "content": "hi"}], timeout=timeout, max_tokens=5, temperature=0))
+
+# Test cases
+def test_retries_transient_errors():
+    fake, completions = fake_groq([connection_error(), connection_error(), "ok"])
+
+    assert complete(GroqClient(api_key="test", max_retries=2, client=fake)) == "ok"
+    assert completions.calls == 3
+
+def test_retries_are_bounded():
+    fake, completions = fake_groq([connection_error(), connection_error()])
+
+    with pytest.raises(APIConnectionError):
+        complete(GroqClient(api_key="test", max_retries=1, client=fake))
+    assert completions.calls == 2
+
+def test_slow_completion_hits_budget():
+    fake, _ = fake_groq([5])
+
+    started = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        complete(GroqClient(api_key="test", client=fake), timeout=0.05)
+    assert time.monotonic() - started < 1
+
+def test_endpoint_returns_504_on_timeout(client_with_db, monkeypatch):
+    fake, _ = fake_groq([5])
+    monkeypatch.setattr(main, "llm", GroqClient(api_key="test", client=fake))
+    monkeypatch.setattr(main, "specialization_cache", SpecializationCache())
+    monkeypatch.setattr(main, "RECOMMEND_TIMEOUT", 0.05)
+
+    response = client_with_db.post("/recommend-doctor", json={"symptoms": "chest pain"})
+
+    assert response.status_code == 504
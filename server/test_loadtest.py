@@ -0,0 +1,52 @@
+# tests/test_loadtest.py
+import pytest
+from sqlalchemy import create_engine, func, select
+from benchmarks.loadtest.driver import DEFAULT_MIX, Workload, parse_mix, percentile, summarize
+from benchmarks.loadtest.seed import seed
+import models
+
+# Test cases
+def test_parse_mix():
+    assert parse_mix("") == DEFAULT_MIX
+    assert parse_mix("doctors=20, book=2.5,login") == {"doctors": 20, "book": 2.5, "login": 1}
+    with pytest.raises(ValueError):
+        parse_mix("unknown=1")
+
+def test_percentiles_use_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+
+def test_summary_reports_each_route():
+    report = summarize({"GET /doctors": [(0.010, 200), (0.020, 200), (0.030, 500)]}, elapsed=2)
+
+    route = report["routes"]["GET /doctors"]
+    assert (route["requests"], route["errors"], route["rps"]) == (3, 1, 1.5)
+    assert (route["p50_ms"], route["p99_ms"]) == (20.0, 30.0)
+    assert route["statuses"] == {"200": 2, "500": 1}
+    assert report["requests"] == 3
+
+def test_seed_builds_a_consistent_dataset(tmp_path):
+    url = f"sqlite:///{tmp_path / 'seed.db'}"
+
+    counts = seed(url, doctors=5, patients=20, appointments=300, chunk_size=64)
+
+    assert (counts["users"], counts["doctors"], counts["patients"], counts["appointments"]) == (25, 5, 20, 300)
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        # No doctor is double booked
+        overlaps = connection.scalar(select(func.count()).select_from(models.Appointment).group_by(
+            models.Appointment.doctor_id, models.Appointment.appointment_datetime
+        ).having(func.count() > 1))
+        assert overlaps is None
+        assert connection.scalar(select(func.min(models.Appointment.patient_id))) > 5
+    engine.dispose()
+
+    workload = Workload(url, sample_size=10)
+    assert (workload.doctors, workload.patients) == (5, 20)
+    assert workload.patient().username.startswith("patient")
+
+    with pytest.raises(SystemExit):
+        seed(url, doctors=1, patients=1, appointments=1)
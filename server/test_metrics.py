@@ -0,0 +1,95 @@
+# tests/test_metrics.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+import main
+import metrics
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from doctor_catalog import doctor_catalog
+from llm import GroqClient
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engines
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+metrics.instrument_engine(async_engine.sync_engine, "test")
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+client = TestClient(main.app)
+
+# Override the default get_db function to use a clean test database
+@pytest.fixture(scope="function")
+def client_with_db():
+    Base.metadata.create_all(bind=engine)
+
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    main.app.dependency_overrides[get_db] = override_get_db
+    main.app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    main.app.dependency_overrides.clear()
+    Base.metadata.drop_all(bind=engine)
+
+# Test cases
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.Registry()
+    histogram = registry.histogram("job_seconds", "Job latency.", ("job",), buckets=(0.1, 1))
+    histogram.observe(0.05, "import")
+    histogram.observe(0.5, "import")
+    histogram.observe(3, "import")
+    registry.counter("jobs_total", "Jobs run.", ("job",)).inc('say "hi"', amount=2)
+
+    assert registry.render().splitlines() == [
+        "# HELP job_seconds Job latency.",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{job="import",le="0.1"} 1',
+        'job_seconds_bucket{job="import",le="1"} 2',
+        'job_seconds_bucket{job="import",le="+Inf"} 3',
+        'job_seconds_sum{job="import"} 3.55',
+        'job_seconds_count{job="import"} 3',
+        "# HELP jobs_total Jobs run.",
+        "# TYPE jobs_total counter",
+        'jobs_total{job="say \\"hi\\""} 2',
+    ]
+
+def test_requests_are_recorded_per_route(client_with_db):
+    doctor_catalog.invalidate()
+    before = metrics.http_request_duration.count("GET", "/doctors", "200")
+    queries_before = metrics.db_queries.value("test")
+
+    assert client_with_db.get("/doctors").status_code == 200
+    assert client_with_db.get("/no-such-page").status_code == 404
+
+    assert metrics.http_request_duration.count("GET", "/doctors", "200") == before + 1
+    assert metrics.http_request_duration.count("GET", "unmatched", "404") >= 1
+    assert metrics.db_queries.value("test") > queries_before
+
+    response = client_with_db.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_count{method="GET",route="/doctors",status="200"}' in response.text
+    assert 'http_request_db_queries_bucket{route="/doctors",le="+Inf"}' in response.text
+
+def test_llm_calls_record_latency_and_tokens():
+    async def create(**kwargs):
+        return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=12, completion_tokens=5))
+
+    groq_client = GroqClient(api_key="test", client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    calls = metrics.llm_request_duration.count("completion", "ok")
+    prompt_tokens = metrics.llm_tokens.value("prompt")
+
+    asyncio.run(groq_client.complete([{"role": "user", "content": "hi"}], timeout=1, max_tokens=5, temperature=0))
+
+    assert metrics.llm_request_duration.count("completion", "ok") == calls + 1
+    assert metrics.llm_tokens.value("prompt") == prompt_tokens + 12
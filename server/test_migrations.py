@@ -0,0 +1,132 @@
+# tests/test_migrations.py
+import os
+import shutil
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from database import Base
+from migrate import get_alembic_config, upgrade_database
+import models  # noqa: F401
+
+# Server databases are checked through TEST_DATABASE_URL
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+
+HOT_PATH_INDEXES = {
+    "ix_appointments_doctor_datetime",
+    "ix_appointments_doctor_slot",
+    "ix_appointments_patient_datetime",
+    "ix_appointments_doctor_feedback",
+}
+
+def appointment_indexes(url):
+    engine = create_engine(url)
+    try:
+        return {index["name"] for index in inspect(engine).get_indexes("appointments")}
+    finally:
+        engine.dispose()
+
+def test_upgrade_fresh_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    upgrade_database(url)
+
+    assert HOT_PATH_INDEXES <= appointment_indexes(url)
+
+def test_upgrade_legacy_database_in_place(tmp_path):
+    # Databases bootstrapped by create_all have no alembic_version table
+    legacy_path = tmp_path / "legacy.db"
+    shutil.copy("main.db", legacy_path)
+    url = f"sqlite:///{legacy_path}"
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        appointments_before = connection.execute(text("SELECT COUNT(*) FROM appointments")).scalar()
+    engine.dispose()
+
+    upgrade_database(url)
+    upgrade_database(url)  # Running again is a no-op
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM appointments")).scalar() == appointments_before
+    engine.dispose()
+    assert HOT_PATH_INDEXES <= appointment_indexes(url)
+
+def test_upgrade_backfills_appointment_ends(tmp_path):
+    url = f"sqlite:///{tmp_path / 'backfill.db'}"
+    upgrade_database(url, "0006")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO appointments (doctor_id, patient_id, appointment_datetime, reason, isCompleted, isCancelled) "
+            "VALUES (1, 2, '2024-01-01 23:45:00.250000', 'Checkup', 0, 0), (1, 2, '2024-01-02 09:00:00.000000', 'Checkup', 0, 0)"
+        ))
+    engine.dispose()
+
+    upgrade_database(url)
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT duration_minutes, end_datetime FROM appointments ORDER BY id")).all()
+    engine.dispose()
+    assert rows == [(30, "2024-01-02 00:15:00.250000"), (30, "2024-01-02 09:30:00.000000")]
+
+def test_upgrade_marks_summarized_feedback(tmp_path):
+    url = f"sqlite:///{tmp_path / 'feedback.db'}"
+    upgrade_database(url, "0009")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO appointments (id, doctor_id, patient_id, appointment_datetime, duration_minutes, end_datetime, reason, feedback, feedback_at) VALUES "
+            "(1, 1, 2, '2024-01-01 09:00:00', 30, '2024-01-01 09:30:00', 'Checkup', 'Kind', '2024-01-02 10:00:00'), "
+            "(2, 1, 2, '2024-01-03 09:00:00', 30, '2024-01-03 09:30:00', 'Checkup', 'Late', '2024-01-04 10:00:00'), "
+            "(3, 1, 2, '2024-01-05 09:00:00', 30, '2024-01-05 09:30:00', 'Checkup', NULL, NULL)"
+        ))
+        connection.execute(text(
+            "INSERT INTO feedback_summaries (doctor_id, summary, feedback_count, watermark_at, watermark_id, updated_at) "
+            "VALUES (1, 'Kind', 1, '2024-01-02 10:00:00', 1, '2024-01-02 11:00:00')"
+        ))
+    engine.dispose()
+
+    upgrade_database(url)
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT feedback_version, summarized_version FROM appointments ORDER BY id")).all()
+    engine.dispose()
+    assert rows == [(1, 1), (1, None), (0, None)]
+
+def test_migrations_match_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'drift.db'}"
+    upgrade_database(url)
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    engine.dispose()
+
+    assert diff == []
+
+def test_migrations_match_models_on_server_database():
+    if DATABASE_URL.startswith("sqlite"):
+        pytest.skip("set TEST_DATABASE_URL to a PostgreSQL database")
+    upgrade_database(DATABASE_URL)
+
+    engine = create_engine(DATABASE_URL)
+    try:
+        with engine.connect() as connection:
+            diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+        foreign_keys = {
+            (fk["constrained_columns"][0], fk["referred_table"])
+            for fk in inspect(engine).get_foreign_keys("appointments")
+        }
+    finally:
+        # Leave the database empty for the create_all fixtures of the other modules
+        with engine.begin() as connection:
+            command.downgrade(get_alembic_config(connection), "base")
+            connection.execute(text("DROP TABLE alembic_version"))
+        engine.dispose()
+
+    assert diff == []
+    assert foreign_keys == {("doctor_id", "users"), ("patient_id", "users")}
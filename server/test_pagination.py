@@ -0,0 +1,175 @@
+# tests/test_pagination.py
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User, Doctor, Appointment
+from hashing import hash_password
+from datetime import datetime, timedelta
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+# Fixture creating five doctors with profiles, one patient and their appointments
+@pytest.fixture(scope="function")
+def setup_doctors_and_appointments(db_session):
+    hashed_password = hash_password("password")
+    doctor_users = [
+        User(username=f"doctor_{i}", email=f"doctor_{i}@example.com", hashed_password=hashed_password, role="doctor")
+        for i in range(5)
+    ]
+    patient_user = User(username="patient", email="patient@example.com", hashed_password=hashed_password, role="patient")
+    db_session.add_all(doctor_users + [patient_user])
+    db_session.commit()
+
+    db_session.add_all([
+        Doctor(user_id=user.id, specialization="Cardiology", experience=5, qualification="MBBS", address="1 Heart St")
+        for user in doctor_users
+    ])
+
+    # All appointments share one timestamp so that the id tie-breaker is exercised
+    appointment_time = datetime.now() + timedelta(days=1)
+    db_session.add_all([
+        Appointment(doctor_id=doctor_users[0].id, patient_id=patient_user.id, appointment_datetime=appointment_time, reason=f"Visit {i}")
+        for i in range(5)
+    ])
+    db_session.add_all([
+        Appointment(doctor_id=doctor_users[0].id, patient_id=patient_user.id, appointment_datetime=appointment_time - timedelta(days=10), reason="Past", isCompleted=True, feedback=f"Feedback {i}")
+        for i in range(3)
+    ])
+    db_session.commit()
+
+    return {"doctor": doctor_users[0], "patient": patient_user}
+
+# Helper function to get token for a user
+def get_token(username, password):
+    response = client.post("/token", data={"username": username, "password": password})
+    return response.json().get("access_token")
+
+# Test cases
+def test_doctors_pagination(client_with_db, setup_doctors_and_appointments):
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client_with_db.get("/doctors", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen.extend(doctor["username"] for doctor in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [f"doctor_{i}" for i in range(5)]
+
+# Follow every bucket's cursor of a dashboard until each bucket is exhausted
+def read_dashboard(path, headers, limit):
+    first = client.get(path, params={"limit": limit}, headers=headers).json()
+    buckets = {bucket: list(first[bucket]) for bucket in first["next_cursors"]}
+    for bucket, cursor in first["next_cursors"].items():
+        while cursor:
+            page = client.get(path, params={"limit": limit, "cursor": cursor}, headers=headers).json()
+            # A cursor only pages on through the bucket it came from
+            assert set(page) == {bucket, "next_cursors"}
+            assert len(page[bucket]) <= limit
+            buckets[bucket].extend(page[bucket])
+            cursor = page["next_cursors"][bucket]
+    return first, buckets
+
+def test_patient_dashboard_pagination(client_with_db, setup_doctors_and_appointments):
+    token = get_token("patient", "password")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first, buckets = read_dashboard("/dashboard/appointments", headers, limit=2)
+
+    # Every bucket's first page comes back at once
+    assert [a["reason"] for a in first["upcoming"]] == ["Visit 0", "Visit 1"]
+    assert len(first["past"]) == 2
+    assert first["cancelled"] == []
+    assert first["next_cursors"]["cancelled"] is None
+    # Upcoming runs forward from now, past starts from the most recent
+    assert [a["reason"] for a in buckets["upcoming"]] == [f"Visit {i}" for i in range(5)]
+    past_ids = [a["id"] for a in buckets["past"]]
+    assert past_ids == sorted(past_ids, reverse=True) and len(past_ids) == 3
+
+def test_doctor_dashboard_pagination(client_with_db, setup_doctors_and_appointments):
+    token = get_token("doctor_0", "password")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first, buckets = read_dashboard("/doctor/appointments", headers, limit=2)
+
+    assert len(first["upcoming"]) == 2 and len(first["completed"]) == 2
+    assert [a["reason"] for a in buckets["upcoming"]] == [f"Visit {i}" for i in range(5)]
+    assert buckets["upcoming"][0]["patient_name"] == "Unknown"
+    assert [a["feedback"] for a in buckets["completed"]] == ["Feedback 2", "Feedback 1", "Feedback 0"]
+
+def test_dashboard_rejects_cursor_of_another_bucket(client_with_db, setup_doctors_and_appointments):
+    headers = {"Authorization": f"Bearer {get_token('doctor_0', 'password')}"}
+    cursor = client_with_db.get("/dashboard/appointments", params={"limit": 1}, headers={"Authorization": f"Bearer {get_token('patient', 'password')}"}).json()["next_cursors"]["past"]
+
+    response = client_with_db.get("/doctor/appointments", params={"cursor": cursor}, headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+def test_feedbacks_pagination(client_with_db, setup_doctors_and_appointments):
+    doctor = setup_doctors_and_appointments["doctor"]
+
+    response = client_with_db.get(f"/api/doctors/{doctor.id}/feedbacks", params={"limit": 2})
+    assert [f["feedback"] for f in response.json()] == ["Feedback 0", "Feedback 1"]
+
+    response = client_with_db.get(f"/api/doctors/{doctor.id}/feedbacks", params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]})
+    assert [f["feedback"] for f in response.json()] == ["Feedback 2"]
+    assert "X-Next-Cursor" not in response.headers
+
+def test_invalid_cursor(client_with_db, setup_doctors_and_appointments):
+    response = client_with_db.get("/doctors", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+def test_limit_is_bounded(client_with_db, setup_doctors_and_appointments):
+    response = client_with_db.get("/doctors", params={"limit": 100000})
+    assert response.status_code == 422
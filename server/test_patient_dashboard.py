@@ -0,0 +1,141 @@
+# tests/test_patient_dashboard.py
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User, Doctor, Appointment
+from hashing import hash_password
+from datetime import datetime, timedelta
+import os
+import uuid
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+# Fixture for setting up a doctor (with profile) and a patient
+@pytest.fixture(scope="function")
+def setup_doctor_and_patient(db_session):
+    doctor_username = f"doctoruser_{uuid.uuid4().hex[:8]}"
+    doctor_user = User(username=doctor_username, email=f"{doctor_username}@example.com", hashed_password=hash_password("doctorpassword"), role="doctor")
+    patient_username = f"patientuser_{uuid.uuid4().hex[:8]}"
+    patient_user = User(username=patient_username, email=f"{patient_username}@example.com", hashed_password=hash_password("patientpassword"), role="patient")
+    db_session.add_all([doctor_user, patient_user])
+    db_session.commit()
+
+    db_session.add(Doctor(user_id=doctor_user.id, specialization="Cardiology", experience=5, qualification="MBBS", address="1 Heart St"))
+    db_session.commit()
+
+    return {"doctor_id": doctor_user.id, "doctor_username": doctor_username, "patient_id": patient_user.id, "patient_username": patient_username}
+
+def add_appointments(db_session, doctor_id, patient_id, count):
+    now = datetime.now()
+    for i in range(count):
+        db_session.add_all([
+            Appointment(doctor_id=doctor_id, patient_id=patient_id, appointment_datetime=now + timedelta(days=i + 1), reason="Upcoming"),
+            Appointment(doctor_id=doctor_id, patient_id=patient_id, appointment_datetime=now - timedelta(days=i + 1), reason="Past", isCompleted=True, feedback="Good"),
+            Appointment(doctor_id=doctor_id, patient_id=patient_id, appointment_datetime=now + timedelta(days=i + 1), reason="Cancelled", isCancelled=True),
+        ])
+    db_session.commit()
+
+# Helper function to get token for a user
+def get_token(username, password):
+    response = client.post("/token", data={"username": username, "password": password})
+    return response.json().get("access_token")
+
+def count_dashboard_queries(client_with_db, token):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client_with_db.get("/dashboard/appointments", headers={"Authorization": f"Bearer {token}"})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return response.json(), len(statements)
+
+# Test cases
+def test_patient_dashboard_buckets(client_with_db, setup_doctor_and_patient, db_session):
+    users = setup_doctor_and_patient
+    add_appointments(db_session, users["doctor_id"], users["patient_id"], 1)
+    token = get_token(users["patient_username"], "patientpassword")
+
+    data, _ = count_dashboard_queries(client_with_db, token)
+
+    assert [a["reason"] for a in data["upcoming"]] == ["Upcoming"]
+    assert [a["reason"] for a in data["cancelled"]] == ["Cancelled"]
+    assert data["past"][0]["feedback"] == "Good"
+    assert data["past"][0]["isCompleted"] is True
+    assert data["upcoming"][0]["doctor_name"] == users["doctor_username"]
+
+def test_patient_dashboard_unknown_doctor(client_with_db, setup_doctor_and_patient, db_session):
+    # Orphaned appointments only survive in SQLite databases written without foreign key checks
+    if not DATABASE_URL.startswith("sqlite"):
+        pytest.skip("foreign keys reject orphaned appointments")
+    users = setup_doctor_and_patient
+    db_session.add(Appointment(doctor_id=99999, patient_id=users["patient_id"], appointment_datetime=datetime.now() + timedelta(days=1), reason="Orphan"))
+    db_session.commit()
+    token = get_token(users["patient_username"], "patientpassword")
+
+    data, _ = count_dashboard_queries(client_with_db, token)
+
+    assert data["upcoming"][0]["doctor_name"] == "Unknown"
+
+def test_patient_dashboard_query_count_is_constant(client_with_db, setup_doctor_and_patient, db_session):
+    users = setup_doctor_and_patient
+    token = get_token(users["patient_username"], "patientpassword")
+
+    # Warm the authenticated-user cache so both measurements see the same auth cost
+    count_dashboard_queries(client_with_db, token)
+
+    add_appointments(db_session, users["doctor_id"], users["patient_id"], 1)
+    _, few_queries = count_dashboard_queries(client_with_db, token)
+
+    add_appointments(db_session, users["doctor_id"], users["patient_id"], 20)
+    data, many_queries = count_dashboard_queries(client_with_db, token)
+
+    assert len(data["upcoming"]) == 21
+    assert many_queries == few_queries
+    assert many_queries <= 2
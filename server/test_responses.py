@@ -0,0 +1,68 @@
+# tests/test_responses.py
+import gzip
+import json
+from datetime import datetime
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+import models
+from responses import CompressionMiddleware, FastJSONResponse, decoded_etag
+
+app = FastAPI(default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+@app.get("/small")
+async def small():
+    return {"ok": True}
+
+@app.get("/large")
+async def large():
+    return FastJSONResponse([{"id": i, "reason": "Regular checkup"} for i in range(100)], headers={"ETag": '"catalog"'})
+
+@app.get("/events")
+async def events():
+    async def stream():
+        yield "data: " + "x" * 1000 + "\n\n"
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+client = TestClient(app)
+
+# Test cases
+def test_renders_datetimes_and_enums():
+    body = FastJSONResponse({"at": datetime(2024, 11, 1, 9, 30), "role": models.RoleEnum.doctor}).body
+
+    assert json.loads(body) == {"at": "2024-11-01T09:30:00", "role": "doctor"}
+
+def test_small_responses_are_not_compressed():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"ok": True}
+
+def test_large_responses_are_compressed():
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < 100 * 20
+    assert len(response.json()) == 100
+    assert response.headers["etag"] == '"catalog-gzip"'
+    assert decoded_etag(response.headers["etag"]) == '"catalog"'
+
+def test_uncompressed_without_accept_encoding():
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"catalog"'
+
+def test_event_streams_are_never_compressed():
+    response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text.startswith("data: ")
+
+def test_gzip_output_is_valid():
+    with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert json.loads(gzip.decompress(raw))[0] == {"id": 0, "reason": "Regular checkup"}
@@ -0,0 +1,138 @@
+# tests/test_specialization_cache.py
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+import main
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User, Doctor, SpecializationCacheEntry
+from hashing import hash_password
+from llm import GroqClient
+from specialization_cache import SpecializationCache, normalize_symptoms
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+class FakeCompletions:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.answer))])
+
+# Fresh cache and a fake Groq client answering "Cardiologist"
+@pytest.fixture(scope="function")
+def fake_llm(monkeypatch):
+    completions = FakeCompletions("Cardiologist")
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(main, "llm", GroqClient(api_key="test", client=fake))
+    monkeypatch.setattr(main, "specialization_cache", SpecializationCache())
+    return completions
+
+@pytest.fixture(scope="function")
+def cardiologist(db_session):
+    user = User(username="heart_doctor", email="heart_doctor@example.com", hashed_password=hash_password("doctorpassword"), role="doctor")
+    db_session.add(user)
+    db_session.commit()
+    db_session.add(Doctor(user_id=user.id, specialization="Cardiologist", experience=10, qualification="MD", address="1 Heart St"))
+    db_session.commit()
+    return user
+
+def recommend(client_with_db, symptoms):
+    response = client_with_db.post("/recommend-doctor", json={"symptoms": symptoms})
+    assert response.status_code == 200
+    return response.json()
+
+# Test cases
+def test_normalize_symptoms():
+    assert normalize_symptoms("  Chest PAIN!!  and,\tshortness of breath. ") == "chest pain and shortness of breath"
+
+def test_near_identical_symptoms_hit_cache(client_with_db, cardiologist, fake_llm):
+    first = recommend(client_with_db, "Chest pain and shortness of breath")
+    second = recommend(client_with_db, "chest pain, and shortness of breath!")
+
+    assert first == second
+    assert fake_llm.calls == 1
+    stats = client_with_db.get("/recommend-doctor/cache-stats").json()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_cache_survives_restart(client_with_db, cardiologist, fake_llm):
+    recommend(client_with_db, "Chest pain")
+    main.specialization_cache.clear_memory()
+
+    recommend(client_with_db, "chest pain")
+
+    assert fake_llm.calls == 1
+
+def test_expired_entry_is_refreshed(client_with_db, cardiologist, fake_llm, db_session):
+    recommend(client_with_db, "Chest pain")
+    main.specialization_cache.clear_memory()
+    entry = db_session.query(SpecializationCacheEntry).one()
+    entry.created_at = datetime.utcnow() - timedelta(seconds=main.specialization_cache.ttl + 1)
+    db_session.commit()
+
+    recommend(client_with_db, "Chest pain")
+
+    assert fake_llm.calls == 2
+
+def test_least_recently_used_rows_are_evicted(db_session):
+    cache = SpecializationCache(maxsize=2)
+
+    async def fill():
+        async with AsyncTestingSessionLocal() as session:
+            await cache.set(session, "headache", "Neurologist")
+            await cache.set(session, "rash", "Dermatologist")
+            cache.clear_memory()
+            await cache.get(session, "headache")  # Refreshes last_used_at
+            await cache.set(session, "cough", "Pulmonologist")
+
+    asyncio.run(fill())
+
+    remaining = {entry.symptoms for entry in db_session.query(SpecializationCacheEntry).all()}
+    assert remaining == {"headache", "cough"}
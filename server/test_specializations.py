@@ -0,0 +1,100 @@
+# tests/test_specializations.py
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+import main
+from main import app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from database import Base, get_db, get_read_db, engine_options, to_async_url
+from models import User, Doctor
+from hashing import hash_password
+from llm import GroqClient
+from specialization_cache import SpecializationCache
+from specializations import canonical_specialization
+import os
+
+# Set the environment to use the test database
+os.environ["TESTING"] = "True"
+
+# Create the test database engine
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Create the test client for FastAPI
+client = TestClient(app)
+
+# Fixture to create a clean database for every test
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+# Override the default get_db function to use the test database session
+@pytest.fixture(scope="function")
+def client_with_db(db_session):
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield client
+    app.dependency_overrides.clear()
+
+# Doctors registered under different spellings of their specialization
+@pytest.fixture(scope="function")
+def doctors(db_session):
+    specializations = {"cardio_one": "Cardiology", "cardio_two": "Cardiologist", "skin_doc": "Dermatologist"}
+    for username, specialization in specializations.items():
+        user = User(username=username, email=f"{username}@example.com", hashed_password=hash_password("doctorpassword"), role="doctor")
+        db_session.add(user)
+        db_session.commit()
+        db_session.add(Doctor(user_id=user.id, specialization=specialization, experience=5, qualification="MD", address="1 Clinic Rd"))
+    db_session.commit()
+
+def fake_llm_answering(answer):
+    async def create(**kwargs):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+    return GroqClient(api_key="test", client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+
+# Test cases
+@pytest.mark.parametrize("name", ["Cardiology", "Cardiologist", "cardiologist.", "Heart specialist", "HEART DOCTOR"])
+def test_cardiology_synonyms(name):
+    assert canonical_specialization(name) == "cardiology"
+
+def test_unknown_specializations_fold_practitioner_suffix():
+    assert canonical_specialization("Sports Medicine") == "sports_medicine"
+    assert canonical_specialization("Virologist") == canonical_specialization("Virology")
+
+def test_doctor_profile_sets_key(client_with_db, db_session):
+    user = User(username="new_doctor", email="new_doctor@example.com", hashed_password=hash_password("doctorpassword"), role="doctor")
+    db_session.add(user)
+    db_session.commit()
+
+    response = client_with_db.post("/doctor-profile", json={"user_id": user.id, "specialization": "Heart Specialist", "experience": 3, "qualification": "MD", "address": "2 Clinic Rd"})
+
+    assert response.status_code == 200
+    assert db_session.query(Doctor).filter(Doctor.user_id == user.id).one().specialization_key == "cardiology"
+
+def test_recommendation_matches_synonyms(client_with_db, doctors, monkeypatch):
+    monkeypatch.setattr(main, "llm", fake_llm_answering("Heart specialist"))
+    monkeypatch.setattr(main, "specialization_cache", SpecializationCache())
+
+    response = client_with_db.post("/recommend-doctor", json={"symptoms": "chest pain"})
+
+    assert response.status_code == 200
+    assert sorted(doctor["username"] for doctor in response.json()["doctors"]) == ["cardio_one", "cardio_two"]